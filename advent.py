@@ -1,25 +1,47 @@
 #!/usr/bin/env python
 import argparse
 import datetime
+import glob
 import importlib
 import logging
+import multiprocessing
 import os
+import re
 import subprocess
 import sys
+import time
+from contextlib import nullcontext
+from multiprocessing.connection import wait
 from urllib.request import urlopen, Request
 
 from rich import box
 from rich.console import Console
+from rich.live import Live
 from rich.logging import RichHandler
 from rich.table import Table
 
-from util import timing
+import bench
+import cache
+from profiler import DeterministicProfiler, SamplingProfiler
+from util import collecting, span, timing
 
 
 PROMPT_SEPARATOR = ' [blue]|[/] '
 PROMPT_SUFFIX = ' [yellow]>[/] '
 TEMPLATE_FILENAME = 'skeleton.py'
 MODULES = {}
+BATCH_TIMEOUT = 300  # seconds
+BENCH_THRESHOLD = 10  # percent
+PROFILE_TOP = 25
+PROFILE_OUTPUT = 'profile.folded'
+BATCH_STATUS = {
+        'ok': '[green]OK[/]',
+        'cached': '[blue]Cached[/]',
+        'error': '[red]Error[/]',
+        'timeout': '[red]Timeout[/]',
+        'crashed': '[red]Crashed[/]',
+        'missing': '[yellow]No input[/]',
+        }
 
 
 def make_url(year: int, day: int) -> str:
@@ -124,10 +146,37 @@ def write_input_to_file(filename: str) -> tuple:
 
 def run_day(
         year: int, day: int, input_file: str = '',
-        test: bool = False, draw: bool = False) -> int:
+        test: bool = False, draw: bool = False,
+        trace: str = '', trace_format: str = 'chrome',
+        profile: str = '', profile_top: int = PROFILE_TOP,
+        profile_output: str = PROFILE_OUTPUT, use_cache: bool = True) -> int:
+    if trace:
+        # Run the day with a collector active, then export its spans. There's
+        # nothing to trace in a cached result, so bypass the cache.
+        with collecting() as collector:
+            retcode = run_day(
+                    year, day, input_file, test, draw,
+                    profile=profile, profile_top=profile_top,
+                    profile_output=profile_output, use_cache=False)
+        if trace_format == 'json':
+            collector.write_json(trace)
+        else:
+            collector.write_trace(trace)
+        logging.info(f"Wrote {len(collector.spans)} timing spans to {trace}")
+        return retcode
+
     yeardir = f'y{year}'
     dd = f'{day:02d}'
-    m = load_module(year, day)
+    load_start = time.perf_counter()
+    with span(f"Load module y{year}.d{dd}"):
+        m = load_module(year, day)
+    load_time = time.perf_counter() - load_start
+
+    profiler = None
+    if profile == 'cprofile':
+        profiler = DeterministicProfiler()
+    elif profile == 'sample':
+        profiler = SamplingProfiler()
 
     if input_file:
         inpath = args.input_file
@@ -141,19 +190,41 @@ def run_day(
     mode = '[yellow]test[/]' if test else '[yellow]actual[/]'
     title = f"Executing {year} Day {dd} in {mode} mode"
     retcode = 0
+    infile = None
     try:
-        with timing(title):
-            infile = None
-            if inpath == '-':
-                infile = sys.stdin
-            else:
-                infile = open(inpath, 'r')
-            kwargs = {}
-            if test:
-                kwargs['test'] = True
-            if draw:
-                kwargs['draw'] = True
-            p1, p2 = m.run(infile, **kwargs)
+        # Drawing and profiling are only useful if the solver actually runs,
+        # so those always bypass the cache.
+        key = None
+        results = None
+        if use_cache and not draw and not profiler and inpath != '-':
+            key = cache.make_key(year, day, test, inpath)
+            results = cache.ResultCache().get(key)
+
+        if results is not None:
+            logging.info(
+                    ":floppy_disk: Using cached results, "
+                    "use --no-cache to run the solver again")
+            p1, p2 = results
+        else:
+            with timing(title):
+                if inpath == '-':
+                    infile = sys.stdin
+                else:
+                    infile = open(inpath, 'r')
+                kwargs = {}
+                if test:
+                    kwargs['test'] = True
+                if draw:
+                    kwargs['draw'] = True
+                # Only the solver itself is profiled, not the module import.
+                with profiler or nullcontext():
+                    run_start = time.perf_counter()
+                    p1, p2 = m.run(infile, **kwargs)
+                    run_time = time.perf_counter() - run_start
+            if key:
+                cache.ResultCache().put(
+                        key, (str(p1), str(p2)),
+                        year=year, day=day, test=test)
 
         console.print()
         table = Table(
@@ -166,6 +237,13 @@ def run_day(
         table.add_row('Part 1', str(p1))
         table.add_row('Part 2', str(p2))
         console.print(table)
+
+        if profiler:
+            console.print()
+            console.print(
+                    f'Module import took {format_seconds(load_time)}, '
+                    f'run took {format_seconds(run_time)} (profiled)')
+            print_profile(console, profiler, profile_top, profile_output)
     except FileNotFoundError:
         logging.error(f"No such file '{inpath}'")
         retcode = 1
@@ -181,6 +259,387 @@ def run_day(
         return retcode
 
 
+def print_profile(
+        console: Console, profiler, top: int = PROFILE_TOP,
+        output: str = PROFILE_OUTPUT):
+    """Report the results of profiling a run.
+
+    For a DeterministicProfiler, print a table of the `top` functions by
+    cumulative time. For a SamplingProfiler, write the collapsed stacks to the
+    file `output`, and print a table of the `top` functions by the number of
+    samples in which they were the innermost frame.
+    """
+    if isinstance(profiler, DeterministicProfiler):
+        table = Table(
+                box=box.ROUNDED,
+                title=f"Top {top} functions by cumulative time")
+        table.add_column('Function', overflow='fold')
+        table.add_column('Calls', justify='right')
+        table.add_column('Own time', justify='right', style='cyan')
+        table.add_column('Cumulative', justify='right', style='cyan')
+        for name, calls, tottime, cumtime in profiler.get_top(top):
+            table.add_row(
+                    name, f'{calls:,d}',
+                    format_seconds(tottime), format_seconds(cumtime))
+        console.print(table)
+        return
+
+    profiler.write_collapsed(output)
+    table = Table(
+            box=box.ROUNDED,
+            title=f"Top {top} functions by samples ({profiler.count:,d} total)")
+    table.add_column('Function', overflow='fold')
+    table.add_column('Samples', justify='right', style='cyan')
+    table.add_column('Share', justify='right', style='cyan')
+    for frame, count in profiler.get_leaf_counts().most_common(top):
+        share = count / profiler.count * 100
+        table.add_row(frame, f'{count:,d}', f'{share:.1f}%')
+    console.print(table)
+    console.print(f'Wrote collapsed stacks for flamegraphs to {output}')
+
+
+def get_input_path(year: int, day: int, test: bool = False) -> str:
+    subdir = 'examples' if test else 'inputs'
+    return os.path.join(f'y{year}', subdir, f'{day:02d}')
+
+
+def find_days(years: set | None = None) -> list:
+    """Return a sorted list of (year, day) for every solver module on disk.
+
+    If `years` is given, only include solvers for those years.
+    """
+    result = []
+    for path in glob.glob(os.path.join('y[0-9][0-9][0-9][0-9]', 'd[0-9][0-9].py')):
+        match = re.fullmatch(r'y(\d{4})/d(\d{2})\.py', path.replace(os.sep, '/'))
+        year, day = int(match.group(1)), int(match.group(2))
+        if years is None or year in years:
+            result.append((year, day))
+    return sorted(result)
+
+
+def parse_day_range(spec: str) -> tuple:
+    """Parse a range specification like '2018:1-2022:25'.
+
+    Either end may also be given as a bare year, in which case the range
+    starts at day 1 or stops at day 25 of that year respectively.
+
+    Return a pair of (year, day) tuples, being the inclusive bounds.
+    """
+    match = re.fullmatch(r'(\d{4})(?::(\d+))?-(\d{4})(?::(\d+))?', spec.strip())
+    if not match:
+        raise argparse.ArgumentTypeError(f"Invalid day range '{spec}'")
+    y1, d1, y2, d2 = match.groups()
+    start = (int(y1), int(d1 or 1))
+    stop = (int(y2), int(d2 or 25))
+    if start > stop:
+        raise argparse.ArgumentTypeError(f"Empty day range '{spec}'")
+    return start, stop
+
+
+def select_days(
+        every: bool = False, years: list | None = None,
+        ranges: list | None = None) -> list:
+    """Return the sorted (year, day) pairs selected for a batch run."""
+    days = find_days()
+    if every:
+        return days
+    selected = set()
+    if years:
+        selected |= {x for x in days if x[0] in years}
+    for start, stop in ranges or ():
+        selected |= {x for x in days if start <= x <= stop}
+    return sorted(selected)
+
+
+def run_batch_worker(
+        year: int, day: int, test: bool, conn, key: str | None = None):
+    """Run a single solver in a batch worker process.
+
+    The outcome is sent back to the parent over `conn` as a dict. Solver
+    logging and console output are suppressed so that they don't trample the
+    live results table in the parent. If `key` is given, successful results
+    are saved to the result cache under that key.
+    """
+    logging.getLogger().setLevel(logging.WARNING)
+    sys.stdout = open(os.devnull, 'w')
+
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    result = {'status': 'ok'}
+    try:
+        m = load_module(year, day)
+        kwargs = {'test': True} if test else {}
+        with open(get_input_path(year, day, test), 'r') as infile:
+            p1, p2 = m.run(infile, **kwargs)
+        result['results'] = (str(p1), str(p2))
+        if key:
+            cache.ResultCache().put(
+                    key, result['results'], year=year, day=day, test=test)
+    except Exception as err:
+        result['status'] = 'error'
+        result['error'] = f'{type(err).__name__}: {err}'
+    result['wall'] = time.perf_counter() - wall
+    result['cpu'] = time.process_time() - cpu
+    conn.send(result)
+    conn.close()
+
+
+def format_seconds(value: float | None) -> str:
+    if value is None:
+        return '-'
+    if value < 0.001:
+        return f'{value * 1_000_000:,.0f}µs'
+    if value < 10:
+        return f'{value * 1000:,.1f}ms'
+    return f'{value:,.2f}s'
+
+
+def make_batch_table(test: bool) -> Table:
+    mode = 'test' if test else 'actual'
+    table = Table(
+            box=box.ROUNDED,
+            padding=(0, 1),
+            title=f"Batch results ({mode} mode)")
+    table.add_column('Year')
+    table.add_column('Day')
+    table.add_column('Status')
+    table.add_column('Part 1', style='cyan', overflow='fold')
+    table.add_column('Part 2', style='cyan', overflow='fold')
+    table.add_column('Wall', justify='right')
+    table.add_column('CPU', justify='right')
+    return table
+
+
+def add_batch_row(table: Table, year: int, day: int, result: dict):
+    status = result['status']
+    p1, p2 = result.get('results', ('', ''))
+    if status not in ('ok', 'cached'):
+        p1 = result.get('error', '')
+        p2 = ''
+    table.add_row(
+            str(year), f'{day:02d}', BATCH_STATUS[status], p1, p2,
+            format_seconds(result.get('wall')),
+            format_seconds(result.get('cpu')))
+
+
+def run_batch(
+        days: list, test: bool = False, jobs: int | None = None,
+        timeout: float = BATCH_TIMEOUT, use_cache: bool = True) -> int:
+    """Run many solvers concurrently, one worker process per day.
+
+    At most `jobs` solvers run at once (default: the CPU count). Any solver
+    still running after `timeout` seconds is terminated. Results are added to
+    the table as they arrive, so rows appear in order of completion.
+
+    Unless `use_cache` is False, days with a cached result for their current
+    input and source code are reported from the cache without running.
+
+    Return a non-zero code if any solver failed or timed out.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    console = Console()
+    table = make_batch_table(test)
+    results = cache.ResultCache()
+    counts = {k: 0 for k in BATCH_STATUS}
+    pending = []
+    for year, day in days:
+        inpath = get_input_path(year, day, test)
+        if not os.path.exists(inpath):
+            counts['missing'] += 1
+            add_batch_row(table, year, day, {'status': 'missing'})
+            continue
+
+        key = None
+        if use_cache:
+            key = cache.make_key(year, day, test, inpath)
+            cached = results.get(key)
+            if cached is not None:
+                counts['cached'] += 1
+                add_batch_row(table, year, day, {
+                    'status': 'cached', 'results': cached})
+                continue
+        pending.append((year, day, key))
+    pending.reverse()
+
+    running = {}
+    cpu_total = 0.0
+    start = time.perf_counter()
+
+    with Live(table, console=console, vertical_overflow='visible'):
+        while pending or running:
+            while pending and len(running) < jobs:
+                year, day, key = pending.pop()
+                recv, send = multiprocessing.Pipe(duplex=False)
+                proc = multiprocessing.Process(
+                        target=run_batch_worker,
+                        args=(year, day, test, send, key),
+                        daemon=True)
+                proc.start()
+                send.close()
+                running[recv] = (proc, year, day, time.perf_counter())
+
+            for conn in wait(list(running), timeout=0.1):
+                proc, year, day, started = running.pop(conn)
+                try:
+                    result = conn.recv()
+                except EOFError:
+                    result = {
+                            'status': 'crashed',
+                            'error': f'exit code {proc.exitcode}',
+                            'wall': time.perf_counter() - started}
+                conn.close()
+                proc.join()
+                cpu_total += result.get('cpu', 0.0)
+                counts[result['status']] += 1
+                add_batch_row(table, year, day, result)
+
+            now = time.perf_counter()
+            for conn, (proc, year, day, started) in list(running.items()):
+                if now - started > timeout:
+                    proc.terminate()
+                    proc.join()
+                    conn.close()
+                    del running[conn]
+                    counts['timeout'] += 1
+                    add_batch_row(table, year, day, {
+                        'status': 'timeout',
+                        'error': f'exceeded {timeout:g}s',
+                        'wall': now - started})
+
+    elapsed = time.perf_counter() - start
+    summary = ', '.join(
+            f'{n} {BATCH_STATUS[k]}' for k, n in counts.items() if n)
+    console.print()
+    console.print(
+            f'{len(days)} days in {format_seconds(elapsed)} wall, '
+            f'{format_seconds(cpu_total)} CPU, {jobs} jobs: {summary}')
+    failed = counts['error'] + counts['timeout'] + counts['crashed']
+    return 1 if failed else 0
+
+
+def run_bench(
+        days: list, test: bool = False, repeat: int = 5, warmup: int = 1,
+        threshold: float = BENCH_THRESHOLD, baseline: str | None = None,
+        history_file: str = bench.HISTORY_FILENAME,
+        record: bool = True) -> int:
+    """Benchmark each of `days` and compare against the history.
+
+    Each day is run serially, so that the solutions aren't competing with
+    each other for CPU time. Any part whose median time has increased by more
+    than `threshold` percent over its baseline is flagged as a regression.
+
+    Return a non-zero code if any regressions were found.
+    """
+    console = Console()
+    history = bench.load_history(history_file)
+    commit, dirty = bench.get_commit()
+    mode = 'test' if test else 'actual'
+    label = (commit or 'unknown')[:10] + ('+' if dirty else '')
+    table = Table(
+            box=box.ROUNDED,
+            padding=(0, 1),
+            title=f"Benchmark at {label} ({mode} mode, {repeat} runs)")
+    table.add_column('Year')
+    table.add_column('Day')
+    table.add_column('Part')
+    for name in ('Min', 'Median', 'P95', 'Baseline', 'Change'):
+        table.add_column(name, justify='right')
+
+    regressions = 0
+    logging.getLogger().setLevel(logging.WARNING)
+    with Live(table, console=console, vertical_overflow='visible'):
+        for year, day in days:
+            inpath = get_input_path(year, day, test)
+            if not os.path.exists(inpath):
+                continue
+            try:
+                samples = bench.bench_day(
+                        year, day, inpath, repeat, warmup, test)
+            except Exception as err:
+                table.add_row(
+                        str(year), f'{day:02d}', '[red]Error[/]', str(err))
+                continue
+
+            records = bench.make_records(
+                    year, day, test, samples, commit, dirty)
+            for rec in records:
+                base = bench.find_baseline(history, rec, baseline)
+                change = ''
+                basetime = '-'
+                if base:
+                    basetime = format_seconds(base['median'] / 1e9)
+                    pct = bench.get_change(rec, base)
+                    change = f'{pct:+.1f}%'
+                    if pct > threshold:
+                        regressions += 1
+                        change = f'[red]{change}[/]'
+                    elif pct < -threshold:
+                        change = f'[green]{change}[/]'
+                table.add_row(
+                        str(year), f'{day:02d}', rec['part'],
+                        format_seconds(rec['min'] / 1e9),
+                        format_seconds(rec['median'] / 1e9),
+                        format_seconds(rec['p95'] / 1e9),
+                        basetime, change)
+            if record:
+                bench.append_history(records, history_file)
+
+    console.print()
+    if regressions:
+        console.print(
+                f':x: {regressions} parts regressed by more than '
+                f'{threshold:g}%')
+        return 1
+    console.print(':white_check_mark: No regressions found')
+    return 0
+
+
+def run_bench_command(argv: list) -> int:
+    parser = argparse.ArgumentParser(
+            prog='advent.py bench',
+            description="Benchmark solutions and track their timings.")
+    parser.add_argument('-t', '--test', action='store_true')
+    parser.add_argument('-v', '--verbose', action='store_true')
+    parser.add_argument(
+            '-n', '--repeat', type=int, default=5,
+            help="number of measured runs for each day")
+    parser.add_argument(
+            '-w', '--warmup', type=int, default=1,
+            help="number of unmeasured runs before measuring")
+    parser.add_argument(
+            '--threshold', type=float, default=BENCH_THRESHOLD,
+            help="percentage increase in median time to flag as a regression")
+    parser.add_argument(
+            '--baseline', metavar='COMMIT',
+            help="compare against this commit instead of the latest one")
+    parser.add_argument(
+            '--history', default=bench.HISTORY_FILENAME,
+            help="history file to read and append to")
+    parser.add_argument(
+            '--no-record', dest='record', action='store_false',
+            help="don't add the results to the history file")
+    parser.add_argument('-a', '--all', action='store_true')
+    parser.add_argument(
+            '-y', '--year', dest='batch_years', type=int, action='append',
+            metavar='YEAR')
+    parser.add_argument(
+            '-r', '--range', dest='batch_ranges', type=parse_day_range,
+            action='append', metavar='Y:D-Y:D')
+    parser.add_argument('year', type=int, nargs='?')
+    parser.add_argument('day', type=int, nargs='?')
+    args = parser.parse_args(argv)
+
+    configure_logging(args.verbose)
+    days = select_days(args.all, args.batch_years, args.batch_ranges)
+    if args.year and args.day:
+        days.append((args.year, args.day))
+    if not days:
+        parser.error("no days selected")
+    return run_bench(
+            days, args.test, args.repeat, args.warmup, args.threshold,
+            args.baseline, args.history, args.record)
+
+
 def configure_logging(verbose: bool = False):
     loglevel = 'DEBUG' if verbose else 'INFO'
     handler = RichHandler(markup=True)
@@ -423,21 +882,75 @@ def run_interactive(
             run_interactive_setup(console, year, day)
 
 
-if __name__ == '__main__':
+def make_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser()
     parser.add_argument('-t', '--test', action='store_true')
     parser.add_argument('-v', '--verbose', action='store_true')
     parser.add_argument('-d', '--draw', action='store_true')
     parser.add_argument('-i', '--input-file', required=False)
+    parser.add_argument(
+            '--trace', metavar='FILE',
+            help="write the timing spans of the run to FILE")
+    parser.add_argument(
+            '--trace-format', choices=('chrome', 'json'), default='chrome',
+            help="format for --trace: Chrome trace events, or a plain span list")
+    parser.add_argument(
+            '--profile', action='store_true',
+            help="profile the solver (see --profile-mode)")
+    parser.add_argument(
+            '--profile-mode', choices=('cprofile', 'sample'),
+            default='cprofile',
+            help="profile with cProfile, or a low-overhead stack sampler")
+    parser.add_argument(
+            '--profile-top', type=int, default=PROFILE_TOP, metavar='N',
+            help="number of rows to show in the profile report")
+    parser.add_argument(
+            '--profile-output', default=PROFILE_OUTPUT, metavar='FILE',
+            help="file to write the sampled collapsed stacks to")
+    parser.add_argument(
+            '--no-cache', dest='cache', action='store_false',
+            help="always run the solver, ignoring any cached results")
+    batch = parser.add_argument_group('batch mode')
+    batch.add_argument(
+            '-a', '--all', action='store_true',
+            help="run every solver")
+    batch.add_argument(
+            '-y', '--year', dest='batch_years', type=int, action='append',
+            metavar='YEAR', help="run every solver for YEAR")
+    batch.add_argument(
+            '-r', '--range', dest='batch_ranges', type=parse_day_range,
+            action='append', metavar='Y:D-Y:D',
+            help="run every solver within an inclusive range of days")
+    batch.add_argument(
+            '-j', '--jobs', type=int,
+            help="number of solvers to run at once (default: CPU count)")
+    batch.add_argument(
+            '--timeout', type=float, default=BATCH_TIMEOUT,
+            help="seconds allowed for each solver")
     parser.add_argument('year', type=int, nargs='?')
     parser.add_argument('day', type=int, nargs='?')
+    return parser
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['bench']:
+        sys.exit(run_bench_command(sys.argv[2:]))
+
+    parser = make_parser()
     args = parser.parse_args()
 
     configure_logging(args.verbose)
 
-    if args.year and args.day:
+    if args.all or args.batch_years or args.batch_ranges:
+        days = select_days(args.all, args.batch_years, args.batch_ranges)
+        retcode = run_batch(
+                days, args.test, args.jobs, args.timeout, args.cache)
+        sys.exit(retcode)
+    elif args.year and args.day:
         retcode = run_day(
-                args.year, args.day, args.input_file, args.test, args.draw)
+                args.year, args.day, args.input_file, args.test, args.draw,
+                args.trace, args.trace_format,
+                args.profile_mode if args.profile else '', args.profile_top, args.profile_output, args.cache)
         sys.exit(retcode)
     else:
         run_interactive(args.year, args.day, args.verbose, args.draw)
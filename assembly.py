@@ -7,7 +7,192 @@ values.
 
 The instruction callables will generally be methods on the concrete Computer
 class, so that they can modify the registers of the Computer object internally.
+
+Computers can also populate the `templates` attribute, with a mapping of
+opcodes to snippets of Python source. If they do, `run` translates the program
+into Python functions, one for each straight-line block of instructions, with
+the registers held in local variables. Each block is compiled the first time
+execution reaches it. Instructions that have no template, or whose operands
+don't fit their template, are still executed one at a time with the
+`instructions` callables. If such an instruction replaces `self.program`
+(e.g. the `tgl` instruction of 2016 day 23) all the compiled blocks are
+discarded.
+
+A template is either a string of Python statements, or a Branch. The
+placeholders in a template refer to operands by their position:
+
+- {r0} is operand 0 as a register, that the instruction reads.
+- {w0} is operand 0 as a register, that the instruction writes.
+- {i0} is operand 0 as an integer literal.
+- {v0} is operand 0 as a register if `is_register` says it is one, or else
+  an integer literal.
+
+So for example, a template for "add X Y" might be '{w0} += {v1}'.
+
+When compiling, counted loops are replaced by macro-ops that compute their
+effect in closed form. A counted loop ends with a branch back to its start
+while a counter register is not zero, and its body is straight-line code,
+possibly with inner counted loops. It can be fused if the counter moves by
+one each iteration, and every other register it changes is either
+incremented by, or set to, an affine function of registers that the loop
+doesn't change. That covers idioms like adding by repeated increments and
+multiplying by nested loops. Subclasses can recognise other idioms by
+overriding `match_idiom`. The instruction counter stays exact either way.
 """
+import ast
+from collections import namedtuple
+from string import Formatter
+
+
+# A conditional jump, taken if the source expression `condition` is true. The
+# destination is given by the operand at index `target`, relative to the
+# address of the branch instruction if `relative` is true, or else an absolute
+# address, which must be an integer literal.
+Branch = namedtuple(
+        'Branch', ['condition', 'target', 'relative'], defaults=(True,))
+
+
+# The closed form of a counted loop, as found by `Computer.fuse_loop`.
+#
+# The loop ends with the branch at address `end`, and `counter` is the local
+# variable of the register that counts iterations, changing by `step` (1 or
+# -1) each time. `deltas` maps locals to how much they increase each
+# iteration, `resets` maps locals to the value they are set to, and `steps`
+# is the number of instructions executed per iteration. `guards` lists
+# values that must be positive for the closed form to hold. These are all
+# affine expressions (see below) of registers that are loop-invariant.
+Loop = namedtuple(
+        'Loop',
+        ['end', 'counter', 'step', 'deltas', 'resets', 'steps', 'guards'])
+
+
+class Untranslatable(Exception):
+    """Raised when an instruction can't be translated into Python source."""
+
+
+# Affine expressions are represented as dicts, that map the names of local
+# variables to their integer coefficients, with the key 1 for the constant
+# term. Terms with a coefficient of zero are left out, so the empty dict is
+# zero.
+
+def add(a: dict, b: dict) -> dict:
+    result = dict(a)
+    for k, v in b.items():
+        result[k] = result.get(k, 0) + v
+        if not result[k]:
+            del result[k]
+    return result
+
+
+def multiply(a: dict, b: dict) -> dict | None:
+    """Return the product of two affine expressions.
+
+    Return None if the product isn't affine, because neither expression is
+    constant.
+    """
+    if a.keys() - {1}:
+        if b.keys() - {1}:
+            return None
+        a, b = b, a
+    factor = a.get(1, 0)
+    return {k: v * factor for k, v in b.items() if factor}
+
+
+def substitute(a: dict, state: dict) -> dict:
+    """Replace the variables in `a` with their values in `state`."""
+    result = {}
+    for k, v in a.items():
+        if k == 1:
+            result = add(result, {1: v})
+        else:
+            result = add(result, multiply({1: v}, state.get(k, {k: 1})))
+    return result
+
+
+def get_affine_source(a: dict) -> str:
+    terms = []
+    for k, v in a.items():
+        if k == 1:
+            terms.append(str(v))
+        elif v == 1:
+            terms.append(k)
+        else:
+            terms.append(f'{v} * {k}')
+    return ' + '.join(terms) or '0'
+
+
+def evaluate_symbolic(node: ast.expr, state: dict) -> dict | None:
+    """Return the affine value of an expression node, or None."""
+    match node:
+        case ast.Constant(value=int() as value) if not isinstance(value, bool):
+            return {1: value} if value else {}
+        case ast.Name(id=name):
+            return state.get(name, {name: 1})
+        case ast.UnaryOp(op=ast.USub(), operand=operand):
+            value = evaluate_symbolic(operand, state)
+            return None if value is None else multiply({1: -1}, value)
+        case ast.BinOp(left=left, op=op, right=right):
+            a = evaluate_symbolic(left, state)
+            b = evaluate_symbolic(right, state)
+            if a is None or b is None:
+                return None
+            match op:
+                case ast.Add():
+                    return add(a, b)
+                case ast.Sub():
+                    return add(a, multiply({1: -1}, b))
+                case ast.Mult():
+                    return multiply(a, b)
+    return None
+
+
+def execute_symbolic(source: str, state: dict) -> bool:
+    """Update `state` with the effect of executing `source`.
+
+    `state` maps local variables to their values, as affine expressions of
+    the values they held at some starting point.
+
+    Return False if the source does something that can't be expressed that
+    way, in which case `state` may be partly updated.
+    """
+    for stmt in ast.parse(source).body:
+        match stmt:
+            case ast.Assign(targets=[ast.Name(id=name)], value=node):
+                value = evaluate_symbolic(node, state)
+            case ast.AugAssign(target=ast.Name(id=name), op=op, value=node):
+                value = evaluate_symbolic(
+                        ast.BinOp(ast.Name(name), op, node), state)
+            case _:
+                return False
+        if value is None:
+            return False
+        state[name] = value
+    return True
+
+
+def get_counter(condition: str) -> str | None:
+    """Return the variable in a condition of the form 'X != 0', or None."""
+    match ast.parse(condition, mode='eval').body:
+        case ast.Compare(
+                left=ast.Name(id=name), ops=[ast.NotEq()],
+                comparators=[ast.Constant(value=0)]):
+            return name
+    return None
+
+
+def get_loop_macro(loop: Loop) -> tuple:
+    """Return a macro-op that executes a fused loop in closed form."""
+    count = loop.counter if loop.step < 0 else f'-{loop.counter}'
+    guards = [f'{count} > 0']
+    guards.extend(f'{get_affine_source(g)} > 0' for g in loop.guards)
+    code = [f'k = {count}']
+    for name, delta in loop.deltas.items():
+        code.append(f'{name} += k * ({get_affine_source(delta)})')
+    for name, value in loop.resets.items():
+        code.append(f'{name} = {get_affine_source(value)}')
+    code.append(f'{loop.counter} = 0')
+    code.append(f'steps += k * ({get_affine_source(loop.steps)})')
+    return ' and '.join(guards), code, loop.end + 1
 
 
 class Computer:
@@ -15,8 +200,18 @@ class Computer:
     pointer = 0
     registers = {}
     instructions = {}
+    templates = {}
+    # Extra globals for compiled blocks, e.g. helper functions used in
+    # idioms.
+    namespace = {}
+    # Whether to replace loops and idioms with macro-ops when compiling.
+    optimise = True
     program = []
     halt = False
+    # If not None, the register that is bound to the instruction pointer. The
+    # register is set to the pointer before each instruction executes, and
+    # the pointer is set to the register plus one afterwards.
+    ip_register = None
 
     def __init__(self, registers=None, instructions=None):
         if registers:
@@ -46,8 +241,13 @@ class Computer:
         """
         opcode, operands = self.program[self.pointer]
         fn = self.instructions[opcode]
+        bind = self.ip_register
+        if bind is not None:
+            self.registers[bind] = self.pointer
         result = fn(*operands)
 
+        if bind is not None:
+            self.pointer = self.registers[bind]
         if result is None:
             self.pointer += 1
         else:
@@ -65,6 +265,372 @@ class Computer:
         """
         self.pointer = 0
         self.counter = 0
+        if self.templates:
+            self.execute()
+            return
         size = len(self.program)
         while self.pointer >= 0 and self.pointer < size and not self.halt:
             self.do_instruction()
+
+    def is_register(self, operand) -> bool:
+        """Return whether `operand` refers to a register."""
+        if isinstance(self.registers, dict):
+            return operand in self.registers
+        return isinstance(operand, int) and 0 <= operand < len(self.registers)
+
+    def get_register_names(self) -> list:
+        if isinstance(self.registers, dict):
+            return list(self.registers)
+        return list(range(len(self.registers)))
+
+    def translate_block(
+            self, start: int, names: list,
+            macros: dict | None = None) -> str | None:
+        """Return the source of a function that executes the block at `start`.
+
+        The function takes the values of the registers in `names` as
+        arguments, and returns a tuple of the address of the next
+        instruction, the number of instructions executed, and the new
+        register values.
+
+        `macros` caches the results of loop analysis between calls, and must
+        be discarded if the program changes.
+
+        Return None if the instruction at `start` is untranslatable.
+        """
+        if macros is None:
+            macros = {}
+        body = self.translate_body(start, names, macros)
+        if body is None:
+            return None
+        regs = ', '.join(f'r_{name}' for name in names)
+        return (
+                f'def block({regs}):\n    steps = 0\n' +
+                ''.join(f'    {line}\n' for line in body))
+
+    def translate_body(
+            self, start: int, names: list, macros: dict,
+            fuse: bool = True) -> list | None:
+        """Return the lines of source for the block at `start`.
+
+        The block runs from `start` up to the first branch, write to the
+        instruction pointer register, or untranslatable instruction. If a
+        branch jumps back to the start of its own block, the block is
+        translated into a `while` loop.
+
+        Where a macro-op (see `get_macro`) is found, its code replaces the
+        instructions it covers, guarded by its condition. If the macro-op is
+        at the start of the block, the code for executing the block normally
+        follows as a fallback for when the guard fails, unless `fuse` is
+        false, in which case the macro-op is ignored.
+
+        Return None if the instruction at `start` is untranslatable.
+        """
+        bind = None
+        if self.ip_register is not None:
+            bind = f'r_{self.ip_register}'
+        regs = ', '.join(f'r_{name}' for name in names)
+        lines = []
+        branch = None
+        jump = False
+        pending = 0
+        addr = start
+        while addr < len(self.program):
+            macro = None
+            if fuse or addr != start:
+                macro = self.get_macro(addr, macros)
+            if macro is not None:
+                guard, code, after = macro
+                if addr == start:
+                    fallback = self.translate_body(start, names, macros, False)
+                    return (
+                            [f'if {guard}:'] +
+                            [f'    {line}' for line in code] +
+                            [f'    return {after}, steps, {regs}'] +
+                            fallback)
+                lines.append(f'if not ({guard}):')
+                lines.append(f'    return {addr}, steps + {pending}, {regs}')
+                if pending:
+                    lines.append(f'steps += {pending}')
+                    pending = 0
+                lines.extend(code)
+                if not isinstance(after, int):
+                    lines.append(f'return {after}, steps, {regs}')
+                    return lines
+                addr = after
+                continue
+
+            try:
+                source, branch, writes = self.translate(addr)
+            except Untranslatable:
+                break
+            if bind is not None:
+                lines.append(f'{bind} = {addr}')
+            lines.extend(source.splitlines())
+            pending += 1
+            addr += 1
+            jump = bind is not None and bind in writes
+            if branch is not None or jump:
+                break
+
+        if addr == start:
+            return None
+
+        if jump:
+            lines.append(f'return {bind} + 1, steps + {pending}, {regs}')
+        elif branch is None:
+            lines.append(f'return {addr}, steps + {pending}, {regs}')
+        elif branch[1] == start:
+            # A loop back to the start of this block.
+            lines = (
+                    ['while True:'] +
+                    [f'    {line}' for line in lines] +
+                    [
+                        f'    steps += {pending}',
+                        f'    if not ({branch[0]}):',
+                        '        break',
+                        f'return {addr}, steps, {regs}'])
+        else:
+            lines.append(f'if {branch[0]}:')
+            lines.append(f'    return {branch[1]}, steps + {pending}, {regs}')
+            lines.append(f'return {addr}, steps + {pending}, {regs}')
+        return lines
+
+    def get_macro(self, addr: int, macros: dict) -> tuple | None:
+        """Return a macro-op that can replace the code at `addr`, if any.
+
+        A macro-op is a tuple of a guard condition, lines of source, and the
+        address to continue from afterwards (or a source expression for it).
+        If the guard is true, the lines of source have the same effect as
+        executing the program from `addr` until it reaches that address,
+        including adding the number of instructions executed to `steps`.
+
+        Macro-ops come from `match_idiom`, or else from fusing counted loops
+        (see `fuse_loop`). No macro-ops are used if `optimise` is false.
+        """
+        if not self.optimise:
+            return None
+        key = ('macro', addr)
+        if key not in macros:
+            macro = self.match_idiom(addr)
+            if macro is None:
+                loop = self.fuse_loop(addr, macros)
+                if loop is not None:
+                    macro = get_loop_macro(loop)
+            macros[key] = macro
+        return macros[key]
+
+    def match_idiom(self, addr: int) -> tuple | None:
+        """Return a macro-op for an idiom starting at `addr`, or None.
+
+        Subclasses can override this to recognise idioms of their instruction
+        set that can't be found by `fuse_loop`.
+        """
+        return None
+
+    def fuse_loop(self, start: int, macros: dict) -> Loop | None:
+        """Analyse the counted loop starting at `start`, if there is one.
+
+        A counted loop is a run of translatable instructions, ending in a
+        branch back to `start` on the condition that some counter register
+        is not zero. The body may include inner loops that can themselves be
+        fused, but no other branches.
+
+        If every iteration adds 1 or -1 to the counter, and each other
+        register is either incremented by, or set to, a value that doesn't
+        change during the loop, then the loop can be replaced by a closed
+        form. Return a Loop describing it, or else None.
+        """
+        key = ('loop', start)
+        if key in macros:
+            return macros[key]
+        macros[key] = None
+
+        bind = None
+        if self.ip_register is not None:
+            bind = f'r_{self.ip_register}'
+        state = {}
+        steps = {}
+        guards = []
+        counter = None
+        addr = start
+        while addr < len(self.program):
+            inner = None
+            if addr != start:
+                inner = self.fuse_loop(addr, macros)
+            if inner is not None:
+                count = substitute(
+                        {inner.counter: -inner.step}, state)
+                guards.append(count)
+                guards.extend(substitute(g, state) for g in inner.guards)
+                new = dict(state)
+                for name, delta in inner.deltas.items():
+                    change = multiply(count, substitute(delta, state))
+                    if change is None:
+                        return None
+                    new[name] = add(state.get(name, {name: 1}), change)
+                for name, value in inner.resets.items():
+                    new[name] = substitute(value, state)
+                new[inner.counter] = {}
+                change = multiply(count, substitute(inner.steps, state))
+                if change is None:
+                    return None
+                steps = add(steps, change)
+                state = new
+                addr = inner.end + 1
+                continue
+
+            try:
+                source, branch, writes = self.translate(addr)
+            except Untranslatable:
+                return None
+            if bind is not None and bind in writes:
+                return None
+            if not execute_symbolic(source, state):
+                return None
+            steps = add(steps, {1: 1})
+            if branch is not None:
+                if branch[1] != start:
+                    return None
+                counter = get_counter(branch[0])
+                break
+            addr += 1
+
+        if counter is None:
+            return None
+        step = state.get(counter, {}).get(1, 0)
+        if state.get(counter) != {counter: 1, 1: step} or abs(step) != 1:
+            return None
+
+        modified = {k for k, v in state.items() if v != {k: 1}}
+
+        def is_invariant(value: dict) -> bool:
+            return not (modified & value.keys())
+
+        deltas = {}
+        resets = {}
+        for name in modified - {counter}:
+            value = state[name]
+            if value.get(name) == 1:
+                delta = add(value, {name: -1})
+                if is_invariant(delta):
+                    deltas[name] = delta
+                    continue
+            if is_invariant(value):
+                resets[name] = value
+                continue
+            return None
+        if not is_invariant(steps) or not all(map(is_invariant, guards)):
+            return None
+
+        result = Loop(addr, counter, step, deltas, resets, steps, guards)
+        macros[key] = result
+        return result
+
+    def translate(self, addr: int) -> tuple:
+        """Translate the instruction at `addr` into Python source.
+
+        Registers are referred to by local variables, named for the register
+        with an 'r_' prefix.
+
+        Return a tuple of the statement source, the branch, and the set of
+        locals written by the instruction. The branch is None, or else a tuple
+        of the condition source and the target address. The target is an int
+        if it is known in advance, or else a source expression.
+
+        Raise Untranslatable if there is no template for the instruction, or
+        its operands don't fit the template.
+        """
+        opcode, operands = self.program[addr]
+        template = self.templates.get(opcode)
+        if template is None:
+            raise Untranslatable(opcode)
+        source = template if isinstance(template, str) else template.condition
+
+        fields = {}
+        writes = set()
+        for _, field, _, _ in Formatter().parse(source):
+            if field is None:
+                continue
+            kind, index = field[0], int(field[1:])
+            fields[field] = self.translate_operand(kind, operands, index)
+            if kind == 'w':
+                writes.add(fields[field])
+        source = source.format(**fields)
+
+        if isinstance(template, str):
+            return source, None, writes
+
+        kind = 'v' if template.relative else 'i'
+        target = self.translate_operand(kind, operands, template.target)
+        if template.relative:
+            if target.lstrip('-').isdigit():
+                target = addr + int(target)
+            else:
+                target = f'{addr} + {target}'
+        else:
+            target = int(target)
+        return '', (source, target), writes
+
+    def translate_operand(self, kind: str, operands: tuple, index: int) -> str:
+        """Return the source for an operand, as used in a template field."""
+        if index >= len(operands):
+            raise Untranslatable()
+        operand = operands[index]
+        if kind in 'rw' or (kind == 'v' and self.is_register(operand)):
+            if not self.is_register(operand):
+                raise Untranslatable()
+            return f'r_{operand}'
+        try:
+            return str(int(operand))
+        except (TypeError, ValueError):
+            raise Untranslatable()
+
+    def execute(self):
+        """Execute the program with compiled blocks, until the computer halts.
+
+        Execution starts from the current instruction pointer, and updates the
+        registers and counter as it goes.
+        """
+        names = self.get_register_names()
+        registers = self.registers
+        values = [registers[name] for name in names]
+        blocks = {}
+        macros = {}
+        program = self.program
+        pc = self.pointer
+        counter = self.counter
+        while 0 <= pc < len(program) and not self.halt:
+            block = blocks.get(pc)
+            if block is None and pc not in blocks:
+                source = self.translate_block(pc, names, macros)
+                if source is not None:
+                    namespace = dict(self.namespace)
+                    exec(source, namespace)
+                    block = namespace['block']
+                blocks[pc] = block
+
+            if block is not None:
+                pc, steps, *values = block(*values)
+                counter += steps
+                continue
+
+            # Interpret this instruction.
+            for name, value in zip(names, values):
+                registers[name] = value
+            self.pointer = pc
+            self.counter = counter
+            self.do_instruction()
+            pc = self.pointer
+            counter = self.counter
+            values = [registers[name] for name in names]
+            if self.program is not program:
+                # The program was modified, so all bets are off.
+                program = self.program
+                blocks.clear()
+                macros.clear()
+
+        for name, value in zip(names, values):
+            registers[name] = value
+        self.pointer = pc
+        self.counter = counter
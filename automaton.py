@@ -0,0 +1,278 @@
+"""automaton.py
+
+Utility module for running cellular automata.
+
+Two kinds of board are available:
+
+- `DenseAutomaton` holds every cell of the board in a numpy array of any
+  number of dimensions, and updates the whole board at once. Neighbour counts
+  are found by convolving the board with the neighbourhood, as a sum of
+  shifted slices of the padded array. The board is either bounded, in which
+  case the cells beyond the edge never change, or it grows by one cell in
+  every direction on each step.
+- `SparseAutomaton` holds only the set of live cells, as coordinate tuples,
+  so it suits unbounded boards where the live cells are few and far between.
+
+The neighbourhood is given as a sequence of offsets, in the same axis order as
+the cells. `get_offsets` builds the usual square neighbourhoods in any number
+of dimensions, and `HEX_OFFSETS` is the neighbourhood of a hex grid in axial
+coordinates.
+
+A dense board is updated by a rule, which is any callable that takes the
+automaton and returns the new array of cells. The rule can ask the automaton
+for neighbour counts with `count`, or for a binary code of each cell's
+neighbourhood with `encode`. `LifeRule` implements the birth/survival rules
+of Life-like automata, and `TableRule` looks up the new state of each cell by
+its neighbourhood code. A sparse board only supports a `LifeRule`.
+
+Both kinds of board can be advanced to a distant generation with `advance`,
+which watches for a repeated state and skips ahead by whole cycles.
+"""
+from collections import Counter
+from itertools import product
+
+import numpy as np
+
+from util import fast_forward
+
+
+# Axial coordinates, where the third axis of the hex grid runs along the
+# diagonal of the first two.
+HEX_OFFSETS = ((1, 0), (0, 1), (1, 1), (-1, 0), (0, -1), (-1, -1))
+
+
+def get_offsets(dimensions: int, surround: bool = True) -> tuple:
+    """Return the neighbourhood of a cell in a square grid.
+
+    If `surround` is true, the neighbours are all the surrounding cells,
+    including diagonals. Otherwise, only the adjacent cells along each axis
+    are neighbours.
+    """
+    if surround:
+        return tuple(
+                offset for offset in product((-1, 0, 1), repeat=dimensions)
+                if any(offset))
+    result = []
+    for axis in range(dimensions):
+        for delta in (-1, 1):
+            offset = [0] * dimensions
+            offset[axis] = delta
+            result.append(tuple(offset))
+    return tuple(result)
+
+
+class LifeRule:
+    """A Life-like rule, given as the neighbour counts for birth and survival.
+
+    A dead cell comes alive if its count of live neighbours is in `birth`, and
+    a live cell stays alive if its count is in `survival`.
+    """
+    def __init__(self, birth, survival):
+        self.birth = frozenset(birth)
+        self.survival = frozenset(survival)
+
+    def __call__(self, automaton) -> np.ndarray:
+        cells = automaton.cells
+        counts = automaton.count(1)
+        born = np.isin(counts, tuple(self.birth))
+        survived = np.isin(counts, tuple(self.survival))
+        result = np.where(cells.astype(bool), survived, born)
+        return result.astype(cells.dtype)
+
+    def apply(self, alive: bool, count: int) -> bool:
+        return count in (self.survival if alive else self.birth)
+
+    def __str__(self) -> str:
+        birth = ''.join(map(str, sorted(self.birth)))
+        survival = ''.join(map(str, sorted(self.survival)))
+        return f'B{birth}/S{survival}'
+
+
+def parse_rule(text: str) -> LifeRule:
+    """Parse a rule in B/S notation, like 'B3/S23'."""
+    birth, survival = text.upper().split('/')
+    return LifeRule(map(int, birth[1:]), map(int, survival[1:]))
+
+
+LIFE = LifeRule((3,), (2, 3))
+
+
+class TableRule:
+    """A rule that looks up the new state of each cell in a table.
+
+    The index into the table is the neighbourhood code of the cell, as
+    returned by `DenseAutomaton.encode` for `offsets`.
+    """
+    def __init__(self, table, offsets):
+        self.table = np.asarray(table)
+        self.offsets = tuple(offsets)
+
+    def __call__(self, automaton) -> np.ndarray:
+        return self.table[automaton.encode(self.offsets)]
+
+
+class Automaton:
+    """Base class for cellular automata.
+
+    Subclasses implement `step` to advance the board by one generation, and
+    `get_key` to return a hashable key for the current state of the board.
+    """
+    def __init__(self):
+        self.generation = 0
+
+    def step(self):
+        raise NotImplementedError()
+
+    def get_key(self):
+        raise NotImplementedError()
+
+    def run(self, generations: int = 1):
+        for _ in range(generations):
+            self.step()
+
+    def advance(self, target: int):
+        """Advance the board to generation `target`.
+
+        If the board returns to a state it was in before, skip ahead by
+        whole cycles, so the target can be arbitrarily far away as long as
+        the board settles into a cycle.
+        """
+        def step(board):
+            board.step()
+            return board
+
+        def key(board):
+            return board.get_key()
+
+        fast_forward(self, step, target - self.generation, key)
+        self.generation = target
+
+
+class DenseAutomaton(Automaton):
+    """A cellular automaton over a numpy array of cells.
+
+    The cells beyond the edge of the array all have the `background` state.
+    If `grow` is true, the array grows by one cell in every direction on
+    each step, and the background is updated by the rule along with
+    everything else. `origin` then holds the index of the original [0, 0]
+    cell. Otherwise, the board is bounded and the background never changes.
+
+    `offsets` is the neighbourhood, which must lie within one cell of the
+    centre. By default, it is all the surrounding cells.
+    """
+    def __init__(
+            self, cells: np.ndarray, rule, offsets=None,
+            background: int = 0, grow: bool = False):
+        super().__init__()
+        self.cells = cells
+        self.rule = rule
+        if offsets is None:
+            offsets = get_offsets(cells.ndim)
+        self.offsets = tuple(offsets)
+        self.background = background
+        self.grow = grow
+        self.origin = (0,) * cells.ndim
+        self.padded = None
+
+    def get_shifted(self, array: np.ndarray, offset: tuple) -> np.ndarray:
+        """Return the view of padded `array` shifted by `offset`."""
+        return array[tuple(
+                slice(1 + d, 1 + d + size)
+                for d, size in zip(offset, self.cells.shape))]
+
+    def count(self, state: int = 1) -> np.ndarray:
+        """Return the number of neighbours of each cell in `state`."""
+        mask = self.padded == state
+        result = np.zeros(self.cells.shape, dtype=np.int64)
+        for offset in self.offsets:
+            result += self.get_shifted(mask, offset)
+        return result
+
+    def encode(self, offsets) -> np.ndarray:
+        """Return a binary code for the neighbourhood of each cell.
+
+        Each offset in `offsets` contributes one bit to the code, which is set
+        if the cell at that offset is in a non-zero state. The first offset
+        gives the most significant bit.
+        """
+        mask = self.padded != 0
+        result = np.zeros(self.cells.shape, dtype=np.int64)
+        for offset in offsets:
+            result <<= 1
+            result |= self.get_shifted(mask, offset)
+        return result
+
+    def update(self) -> np.ndarray:
+        self.padded = np.pad(self.cells, 1, constant_values=self.background)
+        return self.rule(self)
+
+    def step(self):
+        if self.grow:
+            self.cells = np.pad(
+                    self.cells, 1, constant_values=self.background)
+            self.origin = tuple(x + 1 for x in self.origin)
+            # Find the next background by updating a single cell of it.
+            blank = DenseAutomaton(
+                    np.full((1,) * self.cells.ndim, self.background,
+                            dtype=self.cells.dtype),
+                    self.rule, self.offsets, self.background)
+            background = blank.update().item()
+        else:
+            background = self.background
+        self.cells = self.update()
+        self.background = background
+        self.padded = None
+        self.generation += 1
+
+    def get_key(self):
+        return (self.cells.shape, self.background, self.cells.tobytes())
+
+    def count_state(self, state: int = 1) -> int:
+        """Return the number of cells in `state`."""
+        return int(np.count_nonzero(self.cells == state))
+
+
+class SparseAutomaton(Automaton):
+    """A cellular automaton over an unbounded set of live cells.
+
+    `cells` is a set of coordinate tuples, and `offsets` is the neighbourhood,
+    with the same number of dimensions. `rule` must be a `LifeRule`.
+    """
+    def __init__(self, cells: set, rule: LifeRule, offsets=None):
+        super().__init__()
+        self.cells = set(cells)
+        self.rule = rule
+        if offsets is None:
+            offsets = get_offsets(len(next(iter(self.cells), ())))
+        self.offsets = tuple(offsets)
+
+    def count(self) -> Counter:
+        """Return the number of live neighbours of each cell.
+
+        Cells with no live neighbours are omitted.
+        """
+        result = Counter()
+        for cell in self.cells:
+            result.update(
+                    tuple(a + b for a, b in zip(cell, offset))
+                    for offset in self.offsets)
+        return result
+
+    def step(self):
+        birth = self.rule.birth
+        survival = self.rule.survival
+        cells = self.cells
+        counts = self.count()
+        result = {
+                cell for cell, n in counts.items()
+                if n in (survival if cell in cells else birth)}
+        if 0 in survival:
+            result.update(cell for cell in cells if cell not in counts)
+        self.cells = result
+        self.generation += 1
+
+    def get_key(self):
+        return frozenset(self.cells)
+
+    def __len__(self) -> int:
+        return len(self.cells)
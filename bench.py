@@ -0,0 +1,159 @@
+"""bench.py
+
+Utility module for benchmarking puzzle solutions and tracking their timings
+over time.
+
+Each solution is run a number of times against its input, and the duration of
+each `util.timing` block ("Part 1", "Part 2" etc.) is recorded, along with the
+duration of the whole `run` call under the name "Total". The summary
+statistics for each part are appended to a JSON-lines history file, keyed by
+git commit, so that later runs can be compared against an earlier baseline.
+"""
+import importlib
+import json
+import math
+import os
+import subprocess
+import time
+from collections import defaultdict
+from statistics import median
+
+from util import collecting
+
+
+HISTORY_FILENAME = '.bench_history.jsonl'
+TOTAL = 'Total'
+
+
+def get_commit() -> tuple:
+    """Return the current git commit hash, and whether the tree is dirty.
+
+    If git is unavailable, return (None, True).
+    """
+    try:
+        commit = subprocess.run(
+                ['git', 'rev-parse', 'HEAD'],
+                capture_output=True, check=True, text=True).stdout.strip()
+        status = subprocess.run(
+                ['git', 'status', '--porcelain', '--untracked-files=no'],
+                capture_output=True, check=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None, True
+    return commit, bool(status)
+
+
+def percentile(values: list, pct: float):
+    """Return the `pct` percentile of `values`, using the nearest-rank method.
+    """
+    ordered = sorted(values)
+    rank = math.ceil(pct / 100 * len(ordered))
+    return ordered[max(rank, 1) - 1]
+
+
+def summarise(samples: list) -> dict:
+    """Return the min, median and 95th percentile of a list of samples."""
+    return {
+            'min': min(samples),
+            'median': median(samples),
+            'p95': percentile(samples, 95),
+            }
+
+
+def bench_day(
+        year: int, day: int, inpath: str,
+        repeat: int = 5, warmup: int = 1, test: bool = False) -> dict:
+    """Run the solution for a day repeatedly and collect its timings.
+
+    The first `warmup` runs are discarded, then the following `repeat` runs
+    are measured.
+
+    Return a dict mapping each part name to a list of durations in
+    nanoseconds, one per measured run. Where timing blocks or spans with the
+    same name execute more than once in a single run, their durations are
+    summed.
+    """
+    m = importlib.import_module(f'y{year}.d{day:02d}')
+    kwargs = {'test': True} if test else {}
+    result = defaultdict(list)
+    for i in range(warmup + repeat):
+        with open(inpath, 'r') as infile:
+            with collecting() as collector:
+                start = time.perf_counter_ns()
+                m.run(infile, **kwargs)
+                total = time.perf_counter_ns() - start
+        if i < warmup:
+            continue
+
+        for name, duration in collector.totals().items():
+            result[name or ''].append(duration)
+        result[TOTAL].append(total)
+    return dict(result)
+
+
+def load_history(path: str = HISTORY_FILENAME) -> list:
+    """Return all records from the history file, oldest first."""
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r') as fp:
+        return [json.loads(line) for line in fp if line.strip()]
+
+
+def append_history(records: list, path: str = HISTORY_FILENAME):
+    with open(path, 'a') as fp:
+        for record in records:
+            fp.write(json.dumps(record, sort_keys=True) + '\n')
+
+
+def make_records(
+        year: int, day: int, test: bool, samples: dict,
+        commit: str | None, dirty: bool) -> list:
+    """Build history records for the timings of a single day."""
+    result = []
+    timestamp = time.time()
+    for part, values in samples.items():
+        record = {
+                'commit': commit,
+                'dirty': dirty,
+                'timestamp': timestamp,
+                'year': year,
+                'day': day,
+                'test': test,
+                'part': part,
+                'runs': len(values),
+                }
+        record.update(summarise(values))
+        result.append(record)
+    return result
+
+
+def find_baseline(
+        history: list, record: dict, commit: str | None = None) -> dict | None:
+    """Find the baseline to compare `record` against.
+
+    The baseline is the most recent earlier record for the same year, day,
+    mode and part. If `commit` is given, the baseline must have been recorded
+    at that commit. Otherwise it must have been recorded at any other commit,
+    or at the same commit with a clean tree if `record` comes from a dirty
+    one.
+
+    Return None if there is no suitable baseline.
+    """
+    key = ('year', 'day', 'test', 'part')
+    for old in reversed(history):
+        if any(old[k] != record[k] for k in key):
+            continue
+        if commit is not None:
+            if old['commit'] and old['commit'].startswith(commit):
+                return old
+        elif old['commit'] != record['commit']:
+            return old
+        elif record['dirty'] and not old['dirty']:
+            return old
+    return None
+
+
+def get_change(record: dict, baseline: dict) -> float:
+    """Return the change in median duration from `baseline`, in percent."""
+    if not baseline['median']:
+        return 0.0
+    return (record['median'] - baseline['median']) / baseline['median'] * 100
@@ -0,0 +1,185 @@
+"""cache.py
+
+Utility module for caching the results of puzzle solutions on disk.
+
+A cached result is keyed on the year, day, test mode, a SHA-256 hash of the
+input file, and a hash of the source code of the solution module plus every
+module in this repository that it imports, directly or indirectly. If any of
+those change, the key changes, and the solution will be run again.
+
+The cache is bounded in size. When it grows beyond its limit, the least
+recently used entries are evicted.
+"""
+import ast
+import hashlib
+import json
+import os
+import tempfile
+
+
+CACHE_DIR = os.path.join('.cache', 'results')
+CACHE_MAX_BYTES = 4 * 1024 * 1024
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fp:
+        for chunk in iter(lambda: fp.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_module_path(name: str) -> str | None:
+    """Return the path to the source file for local module `name`.
+
+    Return None if `name` isn't a module in this repository, for example
+    because it is a standard library or third party module.
+    """
+    base = os.path.join(ROOT, *name.split('.'))
+    for path in (base + '.py', os.path.join(base, '__init__.py')):
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def get_imports(path: str) -> set:
+    """Return the names of all modules imported by the source file at `path`.
+
+    For `from X import Y` statements, both `X` and `X.Y` are included, since
+    `Y` might be a submodule.
+    """
+    with open(path, 'rb') as fp:
+        tree = ast.parse(fp.read(), path)
+    result = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            result.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            result.add(node.module)
+            result.update(f'{node.module}.{alias.name}' for alias in node.names)
+    return result
+
+
+def find_local_modules(name: str) -> dict:
+    """Find module `name` and all the local modules it transitively imports.
+
+    Return a dict mapping module names to source file paths.
+    """
+    result = {}
+    q = [name]
+    while q:
+        module = q.pop()
+        if module in result:
+            continue
+        path = get_module_path(module)
+        if path is None:
+            continue
+        result[module] = path
+        q.extend(get_imports(path) - set(result))
+    return result
+
+
+def hash_sources(name: str) -> str:
+    """Return a hash of the source of module `name` and its local imports."""
+    digest = hashlib.sha256()
+    for module, path in sorted(find_local_modules(name).items()):
+        digest.update(module.encode('utf8') + b'\0')
+        with open(path, 'rb') as fp:
+            digest.update(fp.read())
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def make_key(year: int, day: int, test: bool, inpath: str) -> str:
+    """Return the cache key for running a day against the file `inpath`."""
+    parts = (
+            str(year),
+            str(day),
+            'test' if test else 'actual',
+            hash_file(inpath),
+            hash_sources(f'y{year}.d{day:02d}'),
+            )
+    return hashlib.sha256('\0'.join(parts).encode('utf8')).hexdigest()
+
+
+class ResultCache:
+    """A size-bounded, least-recently-used cache of results on disk.
+
+    Each entry is a small JSON file in `directory`, named for its key. The
+    modification time of the file is refreshed on every hit, so the entries
+    with the oldest modification times are the least recently used.
+    """
+    def __init__(
+            self, directory: str = CACHE_DIR,
+            max_bytes: int = CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def get_path(self, key: str) -> str:
+        return os.path.join(self.directory, f'{key}.json')
+
+    def get(self, key: str) -> tuple | None:
+        """Return the cached results for `key`, or None on a miss."""
+        path = self.get_path(key)
+        try:
+            with open(path, 'r') as fp:
+                data = json.load(fp)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return tuple(data['results'])
+
+    def put(self, key: str, results: tuple, **info):
+        """Store `results` for `key`, along with any extra `info` fields.
+
+        The entry is written to a temporary file first and then moved into
+        place, so that concurrent readers and writers never see a partial
+        entry.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        data = dict(info, results=list(results))
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as fp:
+            json.dump(data, fp)
+        os.replace(tmp, self.get_path(key))
+        self.evict()
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits its limit.
+        """
+        evict_files(self.directory, self.max_bytes, '.json')
+
+
+def evict_files(directory: str, max_bytes: int, suffix: str = ''):
+    """Remove the least recently used files in `directory`.
+
+    Only files whose names end with `suffix` are counted, and the oldest of
+    them, by modification time, are removed until the total size of the rest
+    is at most `max_bytes`.
+    """
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return
+    entries = []
+    total = 0
+    for name in names:
+        if not name.endswith(suffix):
+            continue
+        try:
+            stat = os.stat(os.path.join(directory, name))
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, name))
+        total += stat.st_size
+
+    entries.sort()
+    for _, size, name in entries:
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(os.path.join(directory, name))
+        except OSError:
+            pass
+        total -= size
@@ -5,8 +5,13 @@ Utility module for a two-dimensional grid system.
 These grids all use a two-dimensional Cartesian (X, Y) coordinate system, with
 X values increasing to the right and Y values increasing downwards.
 """
+from collections import deque
 from operator import add
 
+import numpy as np
+
+import search
+
 
 FACING = '^>v<'
 VECTORS = ((0, -1), (1, 0), (0, 1), (-1, 0))
@@ -109,6 +114,399 @@ class Grid:
             for x in range(self.width):
                 yield (x, y)
 
+    def get_passable_mask(self, passable=None) -> np.ndarray:
+        """Return a boolean array of the passable cells, indexed [y, x].
+
+        `passable` may be a boolean array already, or a function that takes
+        a position and returns whether it is passable. If it is None, every
+        cell is passable.
+        """
+        if passable is None:
+            return np.ones((self.height, self.width), dtype=bool)
+        if callable(passable):
+            return np.array([
+                [passable((x, y)) for x in range(self.width)]
+                for y in range(self.height)], dtype=bool).reshape(
+                        self.height, self.width)
+        return np.asarray(passable, dtype=bool)
+
+    def get_neighbour_table(
+            self, passable=None, surround: bool = False) -> 'NeighbourTable':
+        """Return a table of the neighbours of every passable cell.
+
+        See `get_passable_mask` for the meaning of `passable`.
+        """
+        mask = self.get_passable_mask(passable)
+        return NeighbourTable(mask, surround)
+
+    def get_junction_graph(
+            self, passable, keep=(), neighbours=None,
+            label=None) -> 'JunctionGraph':
+        """Contract the corridors of the grid into a graph of its junctions.
+
+        `passable` is a function that takes a position and returns whether
+        it can be walked on. Every passable cell that doesn't have exactly two
+        passable adjacent cells, or is listed in `keep`, becomes a node of
+        the graph, and every corridor between two nodes becomes an edge,
+        weighted by its length in steps.
+
+        By default, the corridors can be walked in both directions. If
+        `neighbours` is given, it takes a position and returns the positions
+        that can be stepped to from there, which allows for one-way cells.
+
+        If `label` is given, it takes a position and returns a label for the
+        cell, or None. The labels of the cells along each corridor, not
+        counting the nodes at either end, are recorded against its edge.
+        """
+        if neighbours is None:
+            def neighbours(position):
+                return [x for x in self.get_adjacent(position) if passable(x)]
+
+        nodes = set(keep)
+        for position in self.iter_cells():
+            if passable(position):
+                degree = sum(map(passable, self.get_adjacent(position)))
+                if degree != 2:
+                    nodes.add(position)
+
+        graph = JunctionGraph(nodes)
+        for node in nodes:
+            for step in neighbours(node):
+                prev = node
+                position = step
+                length = 1
+                labels = set()
+                while position not in nodes:
+                    if label is not None:
+                        value = label(position)
+                        if value is not None:
+                            labels.add(value)
+                    ahead = [x for x in neighbours(position) if x != prev]
+                    if len(ahead) != 1:
+                        # The corridor can't be followed any further.
+                        break
+                    prev = position
+                    position = ahead[0]
+                    length += 1
+                else:
+                    graph.add_edge(node, position, length, labels)
+        return graph
+
+
+# Offsets to each neighbouring cell, as (dx, dy).
+ADJACENT_OFFSETS = ((0, -1), (1, 0), (0, 1), (-1, 0))
+SURROUND_OFFSETS = ADJACENT_OFFSETS + ((-1, -1), (1, -1), (1, 1), (-1, 1))
+
+
+def get_dtype(low: int, high: int) -> np.dtype:
+    """Return the smallest of uint8, int32 and int64 that holds low..high."""
+    if low >= 0 and high <= 0xff:
+        return np.dtype(np.uint8)
+    if low >= -(1 << 31) and high < (1 << 31):
+        return np.dtype(np.int32)
+    return np.dtype(np.int64)
+
+
+class NeighbourTable:
+    """Precomputed neighbours for the cells of a bounded grid.
+
+    Cells are identified by integer ids, with the cell at (x, y) having id
+    `y * width + x`. Use `to_index` and `to_position` to convert.
+
+    The neighbours are held in compressed sparse row form: the neighbours of
+    cell `i` are `indices[indptr[i]:indptr[i + 1]]`. For walking the grid in
+    Python, `neighbours[i]` holds the same thing as a tuple of ints.
+
+    Only passable cells have neighbours, and only passable cells appear as
+    neighbours. Neighbours are the adjacent cells, or if `surround` is true,
+    all the surrounding cells.
+    """
+    def __init__(self, passable: np.ndarray, surround: bool = False):
+        self.height, self.width = passable.shape
+        size = self.width * self.height
+        ids = np.arange(size).reshape(self.height, self.width)
+        sources = []
+        targets = []
+        offsets = SURROUND_OFFSETS if surround else ADJACENT_OFFSETS
+        for dx, dy in offsets:
+            # Slices of the cells that have a neighbour at this offset, and of
+            # those neighbours.
+            ys = slice(max(-dy, 0), self.height - max(dy, 0))
+            xs = slice(max(-dx, 0), self.width - max(dx, 0))
+            ny = slice(ys.start + dy, ys.stop + dy)
+            nx = slice(xs.start + dx, xs.stop + dx)
+            valid = passable[ys, xs] & passable[ny, nx]
+            source = ids[ys, xs][valid]
+            sources.append(source)
+            targets.append(source + dy * self.width + dx)
+
+        sources = np.concatenate(sources)
+        targets = np.concatenate(targets)
+        order = np.argsort(sources, kind='stable')
+        self.indices = targets[order]
+        counts = np.bincount(sources, minlength=size)
+        self.indptr = np.zeros(size + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.indptr[1:])
+
+        flat = self.indices.tolist()
+        bounds = self.indptr.tolist()
+        self.neighbours = tuple(
+                tuple(flat[bounds[i]:bounds[i + 1]]) for i in range(size))
+
+    def __len__(self) -> int:
+        return self.width * self.height
+
+    def to_index(self, position: tuple) -> int:
+        return position[1] * self.width + position[0]
+
+    def to_position(self, index: int) -> tuple:
+        y, x = divmod(index, self.width)
+        return (x, y)
+
+    def get_distances(self, start: int) -> list:
+        """Return the number of steps from `start` to every cell.
+
+        Cells that can't be reached from `start` have a distance of -1.
+        """
+        result = [-1] * len(self)
+        result[start] = 0
+        neighbours = self.neighbours
+        q = deque((start,))
+        while q:
+            i = q.popleft()
+            dist = result[i] + 1
+            for n in neighbours[i]:
+                if result[n] < 0:
+                    result[n] = dist
+                    q.append(n)
+        return result
+
+    def get_path(self, start: int, end: int) -> list | None:
+        """Return the cells on a shortest path from `start` to `end`.
+
+        The path includes both ends. Return None if there is no path.
+        """
+        trace = [-1] * len(self)
+        trace[start] = start
+        neighbours = self.neighbours
+        q = deque((start,))
+        while q:
+            i = q.popleft()
+            if i == end:
+                path = [i]
+                while i != start:
+                    i = trace[i]
+                    path.append(i)
+                path.reverse()
+                return path
+            for n in neighbours[i]:
+                if trace[n] < 0:
+                    trace[n] = i
+                    q.append(n)
+        return None
+
+
+class JunctionGraph:
+    """A weighted, directed graph of the junctions in a grid.
+
+    `nodes` is a list of the positions of the nodes, and `index` maps each of
+    those positions back to its place in the list. `edges` maps each node to
+    a dict of the nodes it leads to directly, and the cost of getting there.
+    Where more than one edge joins the same two nodes, only the cheapest is
+    kept. `labels` maps (node, other) pairs to the set of labels along that
+    edge, for edges that have any.
+    """
+    def __init__(self, nodes=()):
+        self.nodes = sorted(nodes)
+        self.index = {node: i for i, node in enumerate(self.nodes)}
+        self.edges = {node: {} for node in self.nodes}
+        self.labels = {}
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def add_edge(self, node, other, cost: int, labels=()):
+        if other in self.edges[node] and self.edges[node][other] <= cost:
+            return
+        self.edges[node][other] = cost
+        if labels:
+            self.labels[(node, other)] = frozenset(labels)
+        else:
+            self.labels.pop((node, other), None)
+
+    def get_labels(self, node, other) -> frozenset:
+        return self.labels.get((node, other), frozenset())
+
+    def get_neighbours(self, node) -> list:
+        """Return the (neighbour, cost) pairs for `node`.
+
+        This suits the weighted searches in the `search` module.
+        """
+        return list(self.edges[node].items())
+
+    def get_distance_matrix(
+            self, allow=None, floyd: bool = True) -> np.ndarray:
+        """Return the cheapest cost between every pair of nodes.
+
+        The result is an array indexed [from, to] in the order of `nodes`,
+        with infinity where there is no path.
+
+        By default it is found with the Floyd-Warshall algorithm, relaxing
+        every pair through each node in turn as a whole array operation. If
+        `floyd` is false, run a separate Dijkstra search from every node
+        instead, which is quicker for large graphs with few edges.
+
+        If `allow` is given, it takes the set of labels on an edge and
+        returns whether the edge may be used.
+        """
+        size = len(self.nodes)
+        result = np.full((size, size), np.inf)
+        np.fill_diagonal(result, 0)
+        if not floyd:
+            def get_neighbours(node):
+                return [
+                        (other, cost)
+                        for other, cost in self.edges[node].items()
+                        if allow is None or
+                        allow(self.get_labels(node, other))]
+
+            for i, node in enumerate(self.nodes):
+                dist, _, _ = search.dijkstra(node, get_neighbours)
+                for other, cost in dist.items():
+                    result[i, self.index[other]] = cost
+            return result
+
+        for node, edges in self.edges.items():
+            i = self.index[node]
+            for other, cost in edges.items():
+                if allow is None or allow(self.get_labels(node, other)):
+                    result[i, self.index[other]] = cost
+        for k in range(size):
+            np.minimum(
+                    result, result[:, k, None] + result[None, k, :],
+                    out=result)
+        return result
+
+
+class ArrayGrid(Grid):
+    """A two-dimensional, dense, bounded grid stored in a numpy array.
+
+    This has the same interface as Grid, but `cells` is a 2-D array of
+    integers, indexed as [y, x]. By default, each cell holds the character
+    code of its character in the input. Subclasses can override `parse_cell`
+    to store some other integer instead. The array's dtype is chosen to fit
+    the values found when parsing.
+
+    Wherever a cell value is accepted, a single character may be given
+    instead, and is converted to its character code.
+
+    On top of the Grid interface, there are vectorised operations which act
+    on the whole grid at once, like `get_neighbour_sums` and `find_all`.
+    """
+    def __init__(self):
+        super().__init__()
+        self.cells = np.zeros((0, 0), dtype=np.uint8)
+
+    def parse_cell(self, position: tuple, value: str) -> int:
+        return ord(value)
+
+    def parse(self, stream):
+        rows = []
+        for y, line in enumerate(stream):
+            line = line.strip()
+            rows.append([
+                self.parse_cell((x, y), ch)
+                for x, ch in enumerate(line)])
+        low = min((min(row) for row in rows if row), default=0)
+        high = max((max(row) for row in rows if row), default=0)
+        self.cells = np.array(rows, dtype=get_dtype(low, high))
+        self.height, self.width = self.cells.shape
+        return self
+
+    @staticmethod
+    def encode(value: str | int) -> int:
+        return ord(value) if isinstance(value, str) else value
+
+    def get_value(self, position):
+        return int(self.cells[position[1], position[0]])
+
+    def set_value(self, position, value: str | int):
+        self.cells[position[1], position[0]] = self.encode(value)
+
+    def get_mask(self, value: str | int) -> np.ndarray:
+        """Return a boolean array of the cells that contain `value`."""
+        return self.cells == self.encode(value)
+
+    def find(self, value: str | int) -> tuple | None:
+        """Return the position of the first cell containing `value`.
+
+        Cells are searched in row order. Return None if there are no such
+        cells.
+        """
+        found = np.argwhere(self.get_mask(value))
+        if not len(found):
+            return None
+        y, x = found[0]
+        return (int(x), int(y))
+
+    def find_all(self, value: str | int) -> list:
+        """Return the positions of all cells containing `value`, in row order.
+        """
+        return [
+                (int(x), int(y))
+                for y, x in np.argwhere(self.get_mask(value))]
+
+    def count(self, value: str | int) -> int:
+        return int(np.count_nonzero(self.get_mask(value)))
+
+    def fill(self, value: str | int, mask: np.ndarray | None = None):
+        """Set every cell selected by the boolean `mask` to `value`.
+
+        If `mask` is None, set every cell in the grid.
+        """
+        if mask is None:
+            self.cells[...] = self.encode(value)
+        else:
+            self.cells[mask] = self.encode(value)
+
+    def fill_rect(self, start: tuple, end: tuple, value: str | int):
+        """Set every cell from `start` to `end` inclusive to `value`.
+
+        The rectangle is clipped to the bounds of the grid.
+        """
+        x0, y0 = (max(v, 0) for v in start)
+        x1, y1 = end
+        self.cells[y0:y1 + 1, x0:x1 + 1] = self.encode(value)
+
+    def get_neighbour_sums(
+            self, values: np.ndarray | None = None,
+            surround: bool = True) -> np.ndarray:
+        """Return the sum of the neighbours of every cell.
+
+        Neighbours are the surrounding cells if `surround` is true, or only
+        the adjacent cells otherwise. Cells beyond the edge of the grid count
+        as zero.
+
+        `values` is the array to sum, of the same shape as the grid, for
+        example a mask from `get_mask`. By default, the cells themselves are
+        summed.
+        """
+        if values is None:
+            values = self.cells
+        padded = np.pad(values, 1).astype(np.int64, copy=False)
+        result = np.zeros((self.height, self.width), dtype=np.int64)
+        offsets = SURROUND_OFFSETS if surround else ADJACENT_OFFSETS
+        for dx, dy in offsets:
+            result += padded[
+                    1 + dy:1 + dy + self.height,
+                    1 + dx:1 + dx + self.width]
+        return result
+
+    def to_string(self) -> str:
+        return '\n'.join(
+                ''.join(chr(v) for v in row)
+                for row in self.cells.tolist())
+
 
 class SparseGrid(Grid):
     """A two-dimensional, sparse, bounded grid system.
@@ -134,6 +532,20 @@ class SparseGrid(Grid):
         self.height = y
         return self
 
+    def get_passable_mask(self, passable=None) -> np.ndarray:
+        """Return a boolean array of the passable cells, indexed [y, x].
+
+        By default, the cells in `cells` are impassable, and all others are
+        passable.
+        """
+        if passable is not None:
+            return super().get_passable_mask(passable)
+        result = np.ones((self.height, self.width), dtype=bool)
+        for x, y in self.cells:
+            if self.in_bound((x, y)):
+                result[y, x] = False
+        return result
+
 
 class InfiniteGrid(SparseGrid):
     """A two-dimensional, sparse, infinite grid system.
@@ -0,0 +1,244 @@
+"""hashing.py
+
+Utility module for brute-force searches over MD5 digests.
+
+Several puzzles hash a fixed prefix followed by an increasing integer nonce,
+and look for the digests with some property. The prefix is hashed only once,
+and each nonce is hashed from a copy of that state.
+
+The nonces are split into chunks, which are hashed by a pool of worker
+processes. The results always come back in nonce order, as a generator, so
+the caller can simply stop iterating once it has found what it needs, and
+any chunks that haven't started yet are cancelled. With a single worker, or
+inside a process that isn't allowed to start its own workers, the chunks are
+hashed in this process instead.
+
+Some puzzles also "stretch" each digest, by hashing its hex form over and
+over again. Stretched digests are expensive, so `DigestCache` keeps them on
+disk, one file per prefix. It is bounded in size, like `cache.ResultCache`.
+"""
+import hashlib
+import multiprocessing
+import os
+from _md5 import md5
+from binascii import hexlify
+from concurrent.futures import ProcessPoolExecutor
+
+from cache import evict_files
+
+
+CHUNK_SIZE = 20_000
+CACHE_DIR = os.path.join('.cache', 'md5')
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+DIGEST_SIZE = 16
+
+
+class HexPrefix:
+    """A test for digests whose hex form starts with `prefix`.
+
+    Where the prefix is all zeros, as it usually is, the test checks the
+    raw digest bytes, which avoids converting every digest to hex.
+    """
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self.zeros = None
+        if prefix.strip('0') == '':
+            self.zeros = bytes(len(prefix) // 2)
+        self.odd = len(prefix) % 2 == 1
+
+    def __call__(self, h) -> bool:
+        if self.zeros is None:
+            return h.hexdigest().startswith(self.prefix)
+        digest = h.digest()
+        n = len(self.zeros)
+        if digest[:n] != self.zeros:
+            return False
+        return not self.odd or digest[n] < 0x10
+
+
+def stretch_digest(digest: str, rounds: int) -> str:
+    """Hash the hex form of `digest` again, `rounds` times over."""
+    # Staying in bytes between rounds is cheaper than going through str.
+    data = digest.encode('ascii')
+    for _ in range(rounds):
+        data = hexlify(md5(data).digest())
+    return data.decode('ascii')
+
+
+def find_chunk(prefix: bytes, test, start: int, stop: int) -> list:
+    """Return the (nonce, hexdigest) pairs that pass `test`.
+
+    Only nonces from `start` up to (but not including) `stop` are tried.
+    `test` is called with the hash object, so it can decide whether it
+    needs the raw or the hex digest.
+    """
+    base = md5(prefix)
+    result = []
+    for nonce in range(start, stop):
+        h = base.copy()
+        h.update(str(nonce).encode('ascii'))
+        if test(h):
+            result.append((nonce, h.hexdigest()))
+    return result
+
+
+def hash_chunk(prefix: bytes, stretch: int, start: int, stop: int) -> list:
+    """Return the hex digest for each nonce from `start` up to `stop`.
+
+    Each digest is stretched by `stretch` extra rounds.
+    """
+    base = md5(prefix)
+    result = []
+    for nonce in range(start, stop):
+        h = base.copy()
+        h.update(str(nonce).encode('ascii'))
+        result.append(stretch_digest(h.hexdigest(), stretch))
+    return result
+
+
+def can_fork() -> bool:
+    """Return whether this process is allowed to start worker processes.
+
+    Daemonic processes, like the workers of `advent.run_batch`, are not.
+    """
+    return not multiprocessing.current_process().daemon
+
+
+def iter_chunks(
+        func, args: tuple, start: int = 0, stop: int | None = None,
+        chunk: int = CHUNK_SIZE, workers: int | None = None):
+    """Generate the results of `func` over consecutive chunks of nonces.
+
+    `func` is called as func(*args, start, stop) for each chunk, and must be
+    a module-level function so that it can be sent to a worker process. If
+    `stop` is None, the chunks go on forever.
+
+    Up to two chunks per worker are queued at once. When the generator is
+    closed, the queued chunks that haven't started are cancelled.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or not can_fork():
+        low = start
+        while stop is None or low < stop:
+            high = low + chunk if stop is None else min(low + chunk, stop)
+            yield func(*args, low, high)
+            low = high
+        return
+
+    executor = ProcessPoolExecutor(workers)
+    try:
+        pending = []
+        low = start
+        while True:
+            while len(pending) < 2 * workers and (stop is None or low < stop):
+                high = low + chunk if stop is None else min(low + chunk, stop)
+                pending.append(executor.submit(func, *args, low, high))
+                low = high
+            if not pending:
+                break
+            yield pending.pop(0).result()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def mine(
+        prefix: bytes, test, start: int = 0,
+        chunk: int = CHUNK_SIZE, workers: int | None = None):
+    """Generate the nonces whose digests pass `test`, in order.
+
+    `test` is given the hash object for each nonce (see `find_chunk`), and
+    must be picklable, like a `HexPrefix`. The search starts from nonce
+    `start` and never ends, so stop iterating once enough have been found.
+
+    Yield each result as a tuple of (nonce, hexdigest).
+    """
+    for found in iter_chunks(
+            find_chunk, (prefix, test), start, None, chunk, workers):
+        yield from found
+
+
+class DigestCache:
+    """A size-bounded, least-recently-used cache of digests on disk.
+
+    There is one file per prefix and number of stretch rounds, which holds
+    the raw digests for nonces 0, 1, 2, ... in order. As with
+    `cache.ResultCache`, the modification time of a file is refreshed
+    whenever it is used, and the oldest files are evicted first.
+    """
+    def __init__(
+            self, directory: str = CACHE_DIR,
+            max_bytes: int = CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def get_path(self, prefix: bytes, stretch: int) -> str:
+        key = hashlib.sha256(prefix + b'\0' + str(stretch).encode('ascii'))
+        return os.path.join(self.directory, f'{key.hexdigest()}.bin')
+
+    def load(self, prefix: bytes, stretch: int) -> list:
+        """Return the list of cached hex digests for `prefix`."""
+        path = self.get_path(prefix, stretch)
+        try:
+            with open(path, 'rb') as fp:
+                data = fp.read()
+            os.utime(path)
+        except OSError:
+            return []
+        count = len(data) // DIGEST_SIZE
+        return [
+                data[i * DIGEST_SIZE:(i + 1) * DIGEST_SIZE].hex()
+                for i in range(count)]
+
+    def extend(self, prefix: bytes, stretch: int, start: int, digests: list):
+        """Add the hex `digests` for nonces from `start` onwards.
+
+        If the file ends with part of a digest, for example after an
+        interrupted write, that part is cut off first. If the file then
+        doesn't hold exactly `start` digests, for example because another
+        process has extended it in the meantime, the new digests are not
+        added.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.get_path(prefix, stretch)
+        with open(path, 'ab') as fp:
+            size = fp.seek(0, os.SEEK_END)
+            if size % DIGEST_SIZE:
+                size -= size % DIGEST_SIZE
+                fp.truncate(size)
+            if size != start * DIGEST_SIZE:
+                return
+            fp.write(b''.join(bytes.fromhex(x) for x in digests))
+        self.evict()
+
+    def evict(self):
+        """Remove least recently used files until the cache fits its limit.
+        """
+        evict_files(self.directory, self.max_bytes, '.bin')
+
+
+def iter_digests(
+        prefix: bytes, stretch: int = 0, cache: DigestCache | None = None,
+        chunk: int | None = None, workers: int | None = None):
+    """Generate the hex digest of `prefix` plus each nonce from zero.
+
+    Each digest is stretched by `stretch` extra rounds. If `cache` is given,
+    the digests it already holds are yielded first, and each new chunk is
+    added to it as soon as it has been hashed.
+
+    By default, the chunk size is CHUNK_SIZE divided by the number of hashes
+    per digest, so that a chunk takes about as long to hash however far the
+    digests are stretched, and little of it is wasted when the caller stops.
+    """
+    if chunk is None:
+        chunk = max(CHUNK_SIZE // (stretch + 1), 1)
+    start = 0
+    if cache is not None:
+        cached = cache.load(prefix, stretch)
+        yield from cached
+        start = len(cached)
+    for digests in iter_chunks(
+            hash_chunk, (prefix, stretch), start, None, chunk, workers):
+        if cache is not None:
+            cache.extend(prefix, stretch, start, digests)
+        yield from digests
+        start += len(digests)
@@ -1,5 +1,28 @@
+"""linkedlist.py
+
+Utility module for linked lists.
+
+`List` and `DoubleList` are made of node objects, which are handed back to
+the caller so that it can later insert or remove at that point in the list.
+`ArrayList` offers the same operations, but keeps the links in flat integer
+arrays and identifies each node by an integer handle. It uses far less memory
+for long lists, and can move runs of nodes around in one step.
+
+`Ring` is for circular lists of distinct small integers, where each value is
+its own handle. The whole ring is a single array of successors, which the
+`ring_*` functions can update from inside numba-compiled loops.
+"""
+from array import array
+
+import numpy as np
+
+from util import jit
+
+
 class Node:
     """A node of a singly-linked list."""
+    __slots__ = ('value', 'tail')
+
     def __init__(self, value=None, tail=None):
         self.value = value
         self.tail = tail
@@ -77,6 +100,8 @@ class List:
 
 class DoubleNode(Node):
     """A node of a doubly-linked list."""
+    __slots__ = ('head',)
+
     def __init__(self, value=None, head=None, tail=None):
         self.value = value
         self.head = head
@@ -209,3 +234,375 @@ class DoubleList(List):
 
         self.length -= 1
         return node.value
+
+
+NIL = -1
+
+
+class ArrayList:
+    """A doubly-linked list stored in parallel arrays.
+
+    Each node is identified by an integer handle, which indexes into
+    `values`, and into the `heads` and `tails` arrays of links to the
+    previous and next nodes. The handles of removed nodes are reused by later
+    insertions, so the arrays only grow as far as the largest size the list
+    has ever reached.
+
+    Internally, the links always form a ring, with the end of the list linked
+    back to the start. `step` makes use of this to move around the list as
+    though it were circular, while `get_head` and `get_tail` return NIL at
+    either end of the list.
+
+    By default, the values can be any objects. If all of the values are
+    integers, pass an array `typecode` like 'l' to store them in an array as
+    well, which saves a great deal more memory.
+
+    The handles returned by `append` and `insert` work like the nodes of a
+    DoubleList. The same caution applies: it is the caller's responsibility
+    to pass only handles of nodes that are currently in this list.
+    """
+    def __init__(
+            self, values: tuple | list | None = None,
+            typecode: str | None = None):
+        self.values = [] if typecode is None else array(typecode)
+        self.heads = array('l')
+        self.tails = array('l')
+        self.free = []
+        self.start = NIL
+        self.length = 0
+        if values:
+            self.extend(values)
+
+    def __len__(self):
+        return self.length
+
+    def __str__(self):
+        return ','.join(str(x) for x in self)
+
+    def __iter__(self):
+        for handle in self.iter_handles():
+            yield self.values[handle]
+
+    @property
+    def end(self) -> int:
+        return NIL if self.start == NIL else self.heads[self.start]
+
+    def iter_handles(self):
+        """Generate the handle of each node, from the start of the list."""
+        handle = self.start
+        tails = self.tails
+        for _ in range(self.length):
+            yield handle
+            handle = tails[handle]
+
+    def new_node(self, value) -> int:
+        """Return the handle of a new, unlinked node holding `value`."""
+        if self.free:
+            handle = self.free.pop()
+            self.values[handle] = value
+            return handle
+        self.values.append(value)
+        self.heads.append(NIL)
+        self.tails.append(NIL)
+        return len(self.values) - 1
+
+    def link_after(self, handle: int, after: int):
+        """Link the unlinked node `handle` into the ring after `after`.
+
+        If the list is empty, `after` is ignored and `handle` becomes the only
+        node in the list.
+        """
+        if self.start == NIL:
+            self.heads[handle] = handle
+            self.tails[handle] = handle
+            self.start = handle
+        else:
+            tail = self.tails[after]
+            self.heads[handle] = after
+            self.tails[handle] = tail
+            self.tails[after] = handle
+            self.heads[tail] = handle
+        self.length += 1
+
+    def get_value(self, handle: int):
+        return self.values[handle]
+
+    def get_head(self, handle: int) -> int:
+        """Return the node before `handle`, or NIL at the start of the list."""
+        return NIL if handle == self.start else self.heads[handle]
+
+    def get_tail(self, handle: int) -> int:
+        """Return the node after `handle`, or NIL at the end of the list."""
+        tail = self.tails[handle]
+        return NIL if tail == self.start else tail
+
+    def step(self, handle: int, count: int) -> int:
+        """Return the node `count` steps after `handle`.
+
+        A negative `count` steps backwards. The list is treated as circular,
+        so stepping off either end wraps around to the other, and the steps
+        are taken in whichever direction reaches the node sooner.
+        """
+        count %= self.length
+        if count > self.length // 2:
+            count -= self.length
+        links = self.tails if count > 0 else self.heads
+        for _ in range(abs(count)):
+            handle = links[handle]
+        return handle
+
+    def append(self, value) -> int:
+        """Add an item to the end of the list, and return its handle."""
+        handle = self.new_node(value)
+        self.link_after(handle, self.end)
+        return handle
+
+    def extend(self, values):
+        """Add items to the end of this list from `values`."""
+        for value in values:
+            self.append(value)
+
+    def insert(self, value, handle: int = NIL) -> int:
+        """Insert a new node into this list, and return its handle.
+
+        If `handle` is provided, insert the new node immediately before that
+        node. Otherwise, insert it at the front of the list.
+        """
+        if handle == NIL:
+            handle = self.start
+        result = self.new_node(value)
+        if handle == NIL:
+            self.link_after(result, NIL)
+        else:
+            self.link_after(result, self.heads[handle])
+            if handle == self.start:
+                self.start = result
+        return result
+
+    def insert_after(self, value, handle: int) -> int:
+        """Insert a new node immediately after `handle`, and return its handle.
+        """
+        result = self.new_node(value)
+        self.link_after(result, handle)
+        return result
+
+    def remove(self, handle: int):
+        """Remove node `handle` from this list, and return its value.
+
+        The handle may be reused by a later insertion.
+        """
+        head = self.heads[handle]
+        tail = self.tails[handle]
+        self.tails[head] = tail
+        self.heads[tail] = head
+        if handle == self.start:
+            self.start = NIL if tail == handle else tail
+        self.length -= 1
+        value = self.values[handle]
+        if isinstance(self.values, list):
+            # Don't hold on to the value
+            self.values[handle] = None
+        self.free.append(handle)
+        return value
+
+    def pop(self):
+        """Remove and return the value from the end of the list.
+
+        Raises IndexError if the list is empty.
+        """
+        if self.start == NIL:
+            raise IndexError("Cannot pop() from an empty ArrayList")
+        return self.remove(self.end)
+
+    def popleft(self):
+        """Remove and return the value from the front of the list.
+
+        Raises IndexError if the list is empty.
+        """
+        if self.start == NIL:
+            raise IndexError("Cannot popleft() from an empty ArrayList")
+        return self.remove(self.start)
+
+    def move(self, first: int, count: int, after: int):
+        """Move a run of `count` nodes, starting at `first`, to after `after`.
+
+        This is a splice that takes constant time, apart from finding the last
+        node of the run. `after` must not be one of the nodes in the run. If
+        the run includes the start of the list, the node that follows the run
+        becomes the new start.
+        """
+        heads = self.heads
+        tails = self.tails
+        last = first
+        moves_start = first == self.start
+        for _ in range(count - 1):
+            last = tails[last]
+            moves_start = moves_start or last == self.start
+        if moves_start:
+            self.start = tails[last]
+
+        # Cut the run out of the ring
+        head = heads[first]
+        tail = tails[last]
+        tails[head] = tail
+        heads[tail] = head
+
+        # Splice it back in after `after`
+        tail = tails[after]
+        heads[first] = after
+        tails[last] = tail
+        tails[after] = first
+        heads[tail] = last
+
+
+@jit
+def ring_insert_after(succ, prev, value, new):
+    """Insert `new` into the ring after `value`.
+
+    `prev` is the array of predecessors, or an empty array if the ring
+    doesn't keep one.
+    """
+    after = succ[value]
+    succ[new] = after
+    succ[value] = new
+    if len(prev):
+        prev[new] = value
+        prev[after] = new
+
+
+@jit
+def ring_remove_after(succ, prev, value):
+    """Remove the value that follows `value` from the ring, and return it."""
+    result = succ[value]
+    after = succ[result]
+    succ[value] = after
+    succ[result] = NIL
+    if len(prev):
+        prev[after] = value
+        prev[result] = NIL
+    return result
+
+
+@jit
+def ring_move_after(succ, prev, value, count, target):
+    """Cut the `count` values after `value`, and splice them in after `target`.
+
+    `target` must not be one of the values being moved.
+    """
+    first = succ[value]
+    last = first
+    for _ in range(count - 1):
+        last = succ[last]
+    rest = succ[last]
+    succ[value] = rest
+    after = succ[target]
+    succ[target] = first
+    succ[last] = after
+    if len(prev):
+        prev[rest] = value
+        prev[first] = target
+        prev[after] = last
+
+
+class Ring:
+    """A circular list of distinct integers, stored as an array of successors.
+
+    The value that follows `x` in the ring is `succ[x]`, and values that are
+    not in the ring have a successor of NIL. The values must lie in the range
+    0 to `size - 1`, and `size` defaults to one more than the largest of the
+    initial `values`, so the ring can only grow if a larger `size` is given.
+
+    If `backward` is true, the ring also keeps an array of predecessors in
+    `prev`, so that it can step backwards and remove any value. Otherwise,
+    `prev` is an empty array, and only the value after a given value can be
+    removed.
+
+    Both arrays are numpy arrays of 32-bit integers where they fit, so they
+    can be passed to numba-compiled loops along with the `ring_*` functions.
+    Those functions don't know about `length`, so a loop that changes the
+    number of values in the ring should update it afterwards.
+    """
+    def __init__(
+            self, values, size: int | None = None, backward: bool = False):
+        values = np.asarray(values)
+        if size is None:
+            size = int(values.max()) + 1 if len(values) else 0
+        dtype = np.int32 if size < 2 ** 31 else np.int64
+        self.succ = np.full(size, NIL, dtype=dtype)
+        self.succ[values] = np.roll(values, -1)
+        if backward:
+            self.prev = np.full(size, NIL, dtype=dtype)
+            self.prev[values] = np.roll(values, 1)
+        else:
+            self.prev = np.empty(0, dtype=dtype)
+        self.length = len(values)
+
+    def __len__(self):
+        return self.length
+
+    def __contains__(self, value: int) -> bool:
+        return 0 <= value < len(self.succ) and self.succ[value] != NIL
+
+    def get_next(self, value: int) -> int:
+        return int(self.succ[value])
+
+    def get_prev(self, value: int) -> int:
+        if not len(self.prev):
+            raise ValueError("This Ring does not keep its predecessors")
+        return int(self.prev[value])
+
+    def step(self, value: int, count: int) -> int:
+        """Return the value `count` steps after `value`.
+
+        A negative `count` steps backwards, which needs the predecessors.
+        """
+        if count < 0:
+            if not len(self.prev):
+                raise ValueError("This Ring does not keep its predecessors")
+            links = self.prev
+            count = -count
+        else:
+            links = self.succ
+        for _ in range(count):
+            value = links[value]
+        return int(value)
+
+    def iter_values(self, start: int):
+        """Generate each value in the ring, once around from `start`."""
+        value = start
+        succ = self.succ
+        while True:
+            yield int(value)
+            value = succ[value]
+            if value == start:
+                break
+
+    def get_values(self, start: int, count: int) -> list:
+        """Return the `count` values that follow `start`."""
+        result = []
+        value = start
+        for _ in range(count):
+            value = self.succ[value]
+            result.append(int(value))
+        return result
+
+    def insert_after(self, value: int, new: int):
+        """Insert `new` into the ring after `value`."""
+        ring_insert_after(self.succ, self.prev, value, new)
+        self.length += 1
+
+    def remove_after(self, value: int) -> int:
+        """Remove the value that follows `value`, and return it."""
+        self.length -= 1
+        return int(ring_remove_after(self.succ, self.prev, value))
+
+    def remove(self, value: int) -> int:
+        """Remove `value` from the ring, and return it.
+
+        This needs the predecessors.
+        """
+        return self.remove_after(self.get_prev(value))
+
+    def move_after(self, value: int, count: int, target: int):
+        """Move the `count` values after `value` to after `target`."""
+        ring_move_after(self.succ, self.prev, value, count, target)
@@ -1,9 +1,20 @@
 """matrix.py
 
 Utility module for matrix operations
+
+`row_reduce` and `solve_gaussian` work on rows of Fractions. The exact
+solvers work on augmented matrices of integers: `bareiss` and `row_reduce_integer`
+reduce them without ever leaving the integers, `solve_multimodular` solves
+them modulo a series of primes and reconstructs the fractions, and
+`solve_batch` solves many small square systems at once. For integer
+programming problems, `iter_integer_solutions` and `minimise_integer` search
+the free variables of a system within given bounds.
 """
 from fractions import Fraction
-from operator import add, sub
+from math import gcd, isqrt
+from operator import add, mul, sub
+
+import numpy as np
 
 
 def num_leading_zeros(row: list) -> int:
@@ -146,3 +157,354 @@ def solve_gaussian(matrix: list) -> list:
     """
     row_reduce(matrix)
     return solve_reduced(matrix)
+
+
+# Mersenne primes, for solving systems in modular arithmetic. Together, they
+# give a modulus of well over a thousand bits.
+PRIMES = (2 ** 61 - 1, 2 ** 89 - 1, 2 ** 107 - 1, 2 ** 127 - 1, 2 ** 521 - 1)
+
+
+def bareiss(matrix) -> tuple:
+    """Reduce a matrix of integers to row echelon form, without fractions.
+
+    This is Bareiss's fraction-free elimination. Each step cross-multiplies
+    the rows below the pivot, and then divides them by the previous pivot,
+    which always divides exactly. The values stay integers, and grow no
+    larger than the determinants of the minors of the matrix.
+
+    The input matrix is not modified.
+
+    Return a tuple of (rows, pivots), where `rows` is the new matrix as a
+    list of lists, and `pivots` is the list of the pivot column of each
+    non-zero row.
+    """
+    rows = [list(row) for row in matrix]
+    height = len(rows)
+    width = len(rows[0]) if rows else 0
+    pivots = []
+    prev = 1
+    r = 0
+    for c in range(width):
+        if r == height:
+            break
+        p = next((i for i in range(r, height) if rows[i][c]), None)
+        if p is None:
+            continue
+        if p != r:
+            rows[r], rows[p] = rows[p], rows[r]
+        upper = rows[r]
+        lead = upper[c]
+        for i in range(r + 1, height):
+            row = rows[i]
+            f = row[c]
+            rows[i] = [
+                    (lead * x - f * y) // prev
+                    for x, y in zip(row, upper)]
+        prev = lead
+        pivots.append(c)
+        r += 1
+    return rows, pivots
+
+
+def normalise_row(row: list) -> list:
+    """Divide a row of integers by their greatest common divisor.
+
+    The sign is chosen so that the first non-zero value is positive.
+    """
+    d = gcd(*row)
+    if d == 0:
+        return row
+    if next(x for x in row if x) < 0:
+        d = -d
+    return [x // d for x in row]
+
+
+def row_reduce_integer(matrix) -> tuple:
+    """Reduce a matrix of integers to reduced row echelon form.
+
+    The result stays in integers. Rather than scaling each pivot to 1, the
+    pivot columns are cleared by cross-multiplying rows, and then every row
+    is divided by its greatest common divisor. The rows of zeros are dropped.
+
+    The input matrix is not modified.
+
+    Return a tuple of (rows, pivots) as for `bareiss`.
+    """
+    rows, pivots = bareiss(matrix)
+    rows = [normalise_row(row) for row in rows[:len(pivots)]]
+    for r in range(len(pivots) - 1, 0, -1):
+        c = pivots[r]
+        lower = rows[r]
+        lead = lower[c]
+        for i in range(r):
+            row = rows[i]
+            f = row[c]
+            if f:
+                rows[i] = normalise_row([
+                        lead * x - f * y for x, y in zip(row, lower)])
+    return rows, pivots
+
+
+def solve_exact(matrix) -> list | None:
+    """Solve the system of equations of an augmented matrix of integers.
+
+    This uses `row_reduce_integer`, so it only divides once per variable,
+    at the very end.
+
+    Return the list of values in the solution as Fractions, or None if the
+    system does not have exactly one solution.
+    """
+    rows, pivots = row_reduce_integer(matrix)
+    width = len(matrix[0]) - 1
+    if len(pivots) != width or (pivots and pivots[-1] == width):
+        return None
+    return [Fraction(row[-1], row[c]) for row, c in zip(rows, pivots)]
+
+
+def solve_modular(matrix, prime: int) -> list | None:
+    """Solve an augmented matrix of integers, modulo `prime`.
+
+    Return the list of values in the solution as integers modulo `prime`, or
+    None if the system does not have exactly one solution modulo `prime`.
+    """
+    rows = [[x % prime for x in row] for row in matrix]
+    height = len(rows)
+    width = len(rows[0]) - 1
+    r = 0
+    for c in range(width):
+        p = next((i for i in range(r, height) if rows[i][c]), None)
+        if p is None:
+            return None
+        if p != r:
+            rows[r], rows[p] = rows[p], rows[r]
+        inverse = pow(rows[r][c], -1, prime)
+        upper = [x * inverse % prime for x in rows[r]]
+        rows[r] = upper
+        for i in range(height):
+            f = rows[i][c]
+            if i != r and f:
+                rows[i] = [(x - f * y) % prime for x, y in zip(rows[i], upper)]
+        r += 1
+    if any(row[-1] for row in rows[r:]):
+        return None
+    return [row[-1] for row in rows[:width]]
+
+
+def rational_reconstruct(value: int, modulus: int) -> Fraction | None:
+    """Find the fraction that is congruent to `value` modulo `modulus`.
+
+    The result n/d has |n| and d both no greater than sqrt(modulus / 2),
+    which makes it unique if it exists. Return None if there is no such
+    fraction.
+    """
+    bound = isqrt(modulus // 2)
+    r0, r1 = modulus, value % modulus
+    s0, s1 = 0, 1
+    while r1 > bound:
+        q = r0 // r1
+        r0, r1 = r1, r0 - q * r1
+        s0, s1 = s1, s0 - q * s1
+    if s1 == 0 or abs(s1) > bound or gcd(r1, s1) != 1:
+        return None
+    return Fraction(r1, s1)
+
+
+def check_solution(matrix, solution) -> bool:
+    """Return whether `solution` satisfies every row of an augmented matrix.
+    """
+    return all(
+            sum(map(mul, row, solution)) == row[-1]
+            for row in matrix)
+
+
+def solve_multimodular(matrix, primes=PRIMES) -> list | None:
+    """Solve an augmented matrix of integers, using modular arithmetic.
+
+    The system is solved modulo each of `primes` in turn, and the results are
+    combined by the Chinese remainder theorem. After each prime, the values
+    are reconstructed as fractions, and returned as soon as they solve the
+    original system. Until then, all of the arithmetic stays on integers
+    no larger than the modulus.
+
+    Return the list of values in the solution as Fractions, or None if no
+    solution was found with the given primes.
+    """
+    residues = None
+    modulus = 1
+    for prime in primes:
+        values = solve_modular(matrix, prime)
+        if values is None:
+            continue
+        if residues is None:
+            residues = values
+        else:
+            # Combine x = a (mod modulus) and x = b (mod prime).
+            inverse = pow(modulus, -1, prime)
+            residues = [
+                    a + modulus * ((b - a) * inverse % prime)
+                    for a, b in zip(residues, values)]
+        modulus *= prime
+        solution = [rational_reconstruct(x, modulus) for x in residues]
+        if None not in solution and check_solution(matrix, solution):
+            return solution
+    return None
+
+
+def solve_batch(systems) -> list:
+    """Solve many square systems of the same size at once.
+
+    `systems` is a sequence of augmented matrices of integers, each with n
+    rows and n + 1 columns. They are stacked into a single numpy array of
+    Python integers, and reduced together by Bareiss elimination, so that
+    each step is one array operation across every system. The solutions are
+    found by fraction-free back-substitution: the values multiplied by the
+    determinant are always integers.
+
+    Return a list with the solution of each system, as a list of Fractions,
+    or None where a system does not have exactly one solution.
+    """
+    a = np.array(systems, dtype=object)
+    count, n, _ = a.shape
+    singular = np.zeros(count, dtype=bool)
+    prev = np.ones(count, dtype=object)
+    for i in range(n):
+        nonzero = a[:, i:, i] != 0
+        found = nonzero.any(axis=1)
+        singular |= ~found
+        p = i + nonzero.argmax(axis=1)
+        swap = np.flatnonzero(p != i)
+        if len(swap):
+            upper = a[swap, i].copy()
+            a[swap, i] = a[swap, p[swap]]
+            a[swap, p[swap]] = upper
+        # Use a pivot of 1 for the singular systems, to keep the division
+        # safe. Their results are discarded anyway.
+        lead = np.where(found, a[:, i, i], 1)
+        factor = a[:, i + 1:, i:i + 1]
+        a[:, i + 1:] = (
+                lead[:, None, None] * a[:, i + 1:]
+                - factor * a[:, None, i]) // prev[:, None, None]
+        prev = lead
+
+    # Back-substitute for y = det * x, which is always a vector of integers.
+    det = prev
+    y = np.zeros((count, n), dtype=object)
+    for i in range(n - 1, -1, -1):
+        total = det * a[:, i, n] - (a[:, i, i + 1:n] * y[:, i + 1:]).sum(
+                axis=1)
+        y[:, i] = total // np.where(singular, 1, a[:, i, i])
+
+    result = []
+    for k in range(count):
+        if singular[k]:
+            result.append(None)
+        else:
+            result.append([Fraction(x, det[k]) for x in y[k]])
+    return result
+
+
+def get_value_range(terms, bounds) -> tuple:
+    """Return the lowest and highest possible values of a linear sum.
+
+    `terms` is a sequence of (coefficient, variable) pairs, and `bounds` maps
+    each variable to a (low, high) pair.
+    """
+    low = high = 0
+    for coefficient, variable in terms:
+        a, b = bounds[variable]
+        if coefficient >= 0:
+            low += coefficient * a
+            high += coefficient * b
+        else:
+            low += coefficient * b
+            high += coefficient * a
+    return low, high
+
+
+def iter_integer_solutions(matrix, bounds):
+    """Generate every integer solution of an augmented matrix of integers.
+
+    `bounds` gives an inclusive (low, high) range for each variable. The
+    system is reduced with `row_reduce_integer`, so that every pivot variable
+    is a linear function of the free variables. The free variables are then
+    assigned in turn, and a branch is cut off as soon as some pivot variable
+    can no longer land within its range, whatever the remaining free
+    variables are set to.
+
+    Yield each solution as a tuple of integers.
+    """
+    rows, pivots = row_reduce_integer(matrix)
+    width = len(matrix[0]) - 1
+    if pivots and pivots[-1] == width:
+        return
+    free = [c for c in range(width) if c not in set(pivots)]
+    bounds = dict(enumerate(bounds))
+    # Each pivot row reads: lead * x[c] = rhs - sum(terms * x[free])
+    constraints = [
+            (c, row[c], row[-1], [(row[f], f) for f in free if row[f]])
+            for row, c in zip(rows, pivots)]
+
+    def feasible(assigned: dict) -> bool:
+        for c, lead, rhs, terms in constraints:
+            fixed = rhs - sum(
+                    x * assigned[f] for x, f in terms if f in assigned)
+            low, high = get_value_range(
+                    [(x, f) for x, f in terms if f not in assigned], bounds)
+            # lead * x[c] lies somewhere in [fixed - high, fixed - low]
+            a, b = bounds[c]
+            if lead > 0:
+                a, b = lead * a, lead * b
+            else:
+                a, b = lead * b, lead * a
+            if fixed - low < a or fixed - high > b:
+                return False
+        return True
+
+    def solve(assigned: dict) -> tuple | None:
+        result = [0] * width
+        for f, x in assigned.items():
+            result[f] = x
+        for c, lead, rhs, terms in constraints:
+            value, remainder = divmod(
+                    rhs - sum(x * assigned[f] for x, f in terms), lead)
+            low, high = bounds[c]
+            if remainder or not low <= value <= high:
+                return None
+            result[c] = value
+        return tuple(result)
+
+    def search(index: int, assigned: dict):
+        if not feasible(assigned):
+            return
+        if index == len(free):
+            solution = solve(assigned)
+            if solution is not None:
+                yield solution
+            return
+        f = free[index]
+        low, high = bounds[f]
+        for x in range(low, high + 1):
+            assigned[f] = x
+            yield from search(index + 1, assigned)
+        del assigned[f]
+
+    yield from search(0, {})
+
+
+def minimise_integer(matrix, bounds, weights=None) -> tuple | None:
+    """Find the integer solution of a matrix with the lowest weighted sum.
+
+    `bounds` is as for `iter_integer_solutions`, and `weights` gives the
+    weight of each variable in the sum, which defaults to 1 for all of them.
+
+    Return a tuple of (total, solution), or None if there is no solution
+    within the bounds.
+    """
+    if weights is None:
+        weights = [1] * (len(matrix[0]) - 1)
+    best = None
+    for solution in iter_integer_solutions(matrix, bounds):
+        total = sum(map(mul, weights, solution))
+        if best is None or total < best[0]:
+            best = (total, solution)
+    return best
@@ -0,0 +1,133 @@
+"""profiler.py
+
+Utility module for profiling puzzle solutions.
+
+Two profilers are available, both used as context managers around the code to
+be profiled:
+
+- `DeterministicProfiler` wraps `cProfile`, and reports the functions with the
+  highest cumulative or internal time.
+- `SamplingProfiler` periodically captures the stack of the profiled thread
+  from a background thread. It has much lower overhead, and produces
+  collapsed-stack output ("frame;frame;frame count" lines) which can be fed
+  straight into flamegraph tools like flamegraph.pl, inferno or speedscope.
+"""
+import cProfile
+import os
+import pstats
+import sys
+import threading
+from collections import Counter
+
+
+SAMPLE_INTERVAL = 0.001  # seconds
+
+
+class DeterministicProfiler:
+    """A profiler that traces every function call, using `cProfile`."""
+    def __init__(self):
+        self.profile = cProfile.Profile()
+        self.stats = None
+
+    def __enter__(self):
+        self.profile.enable()
+        return self
+
+    def __exit__(self, *args):
+        self.profile.disable()
+        self.stats = pstats.Stats(self.profile)
+
+    def get_top(self, count: int = 20, sort: str = 'cumulative') -> list:
+        """Return the top `count` functions, ordered by `sort`.
+
+        `sort` may be 'cumulative' (time spent in the function and everything
+        it calls) or 'tottime' (time spent in the function itself).
+
+        Each result is a tuple of (location, calls, tottime, cumtime), with
+        times in seconds.
+        """
+        index = 3 if sort == 'cumulative' else 2
+        rows = []
+        for func, (_, calls, tottime, cumtime, _) in self.stats.stats.items():
+            rows.append((format_function(*func), calls, tottime, cumtime))
+        rows.sort(key=lambda x: x[index], reverse=True)
+        return rows[:count]
+
+    @property
+    def total(self) -> float:
+        return self.stats.total_tt
+
+
+class SamplingProfiler:
+    """A statistical profiler that samples the stack of a single thread.
+
+    The thread which enters the profiler context is the one that gets sampled,
+    once every `interval` seconds.
+    """
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        self.interval = interval
+        self.samples = Counter()
+        self.count = 0
+        self.thread = None
+        self.target = None
+        self.stopping = threading.Event()
+
+    def __enter__(self):
+        self.target = threading.get_ident()
+        self.stopping.clear()
+        self.thread = threading.Thread(target=self.sample_loop, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stopping.set()
+        self.thread.join()
+
+    def sample_loop(self):
+        while not self.stopping.wait(self.interval):
+            frame = sys._current_frames().get(self.target)
+            if frame is None:
+                break
+            stack = []
+            while frame is not None:
+                stack.append(format_frame(frame))
+                frame = frame.f_back
+            stack.reverse()
+            self.samples[';'.join(stack)] += 1
+            self.count += 1
+
+    def get_collapsed(self) -> list:
+        """Return the samples as collapsed-stack lines, most frequent first."""
+        return [
+                f'{stack} {count}'
+                for stack, count in self.samples.most_common()]
+
+    def get_leaf_counts(self) -> Counter:
+        """Return the number of samples in which each frame was innermost.
+
+        This approximates the time spent in each function itself, excluding
+        the functions it calls.
+        """
+        result = Counter()
+        for stack, count in self.samples.items():
+            result[stack.rsplit(';', 1)[-1]] += count
+        return result
+
+    def write_collapsed(self, filename: str):
+        with open(filename, 'w') as fp:
+            for line in self.get_collapsed():
+                fp.write(line + '\n')
+
+
+def format_function(filename: str, line: int, name: str) -> str:
+    if filename == '~':
+        # Built-in functions have no source location.
+        return name
+    return f'{os.path.relpath(filename)}:{line}({name})'
+
+
+def format_frame(frame) -> str:
+    code = frame.f_code
+    return (
+            f'{code.co_name} '
+            f'({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
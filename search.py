@@ -0,0 +1,341 @@
+"""search.py
+
+Utility module for finding shortest paths through graphs.
+
+The graph is never given up front. Instead, each search takes a
+`neighbours` function, which is called with a node and returns the nodes
+reachable from it in a single step. For the weighted searches, it returns
+(neighbour, cost) pairs instead. Nodes can be anything hashable.
+
+For a bounded grid, a `grid.NeighbourTable` turns positions into integer ids
+ahead of time, and its `neighbours[id]` tuples can be searched directly by
+passing `table.neighbours.__getitem__` to the unweighted searches. Other
+graphs in compressed sparse row form can be searched via `get_csr_neighbours`.
+
+Every search accepts an optional `SearchStats`, which counts the work done,
+so that the cost of a search can be measured and compared.
+"""
+from collections import deque
+
+from util import PriorityQueue
+
+
+class SearchStats:
+    """Counters for the work done by a search.
+
+    `expanded` is the number of nodes whose neighbours were examined,
+    `pushed` is the number of times a node was added to the frontier or had
+    its priority changed, and `max_frontier` is the largest size reached by
+    the frontier.
+    """
+    def __init__(self):
+        self.expanded = 0
+        self.pushed = 0
+        self.max_frontier = 0
+
+    def update(self, frontier: int):
+        self.expanded += 1
+        if frontier > self.max_frontier:
+            self.max_frontier = frontier
+
+    def __str__(self) -> str:
+        return (
+                f'expanded {self.expanded:,} nodes, '
+                f'pushed {self.pushed:,}, '
+                f'max frontier {self.max_frontier:,}')
+
+
+def get_csr_neighbours(indptr, indices, weights=None):
+    """Return a neighbours function for a graph in compressed sparse row form.
+
+    The neighbours of node `i` are `indices[indptr[i]:indptr[i + 1]]`. If
+    `weights` is given, it holds the cost of each edge in the same layout,
+    and the function returns (neighbour, cost) pairs for the weighted
+    searches.
+    """
+    indptr = list(indptr)
+    indices = list(indices)
+    if weights is None:
+        rows = [
+                tuple(indices[indptr[i]:indptr[i + 1]])
+                for i in range(len(indptr) - 1)]
+    else:
+        weights = list(weights)
+        rows = [
+                tuple(zip(
+                    indices[indptr[i]:indptr[i + 1]],
+                    weights[indptr[i]:indptr[i + 1]]))
+                for i in range(len(indptr) - 1)]
+    return rows.__getitem__
+
+
+def get_goal_test(goal):
+    """Return a function that tests whether a node is `goal`.
+
+    `goal` may be a single node, or a function that takes a node and returns
+    whether it is a goal.
+    """
+    if callable(goal):
+        return goal
+    return goal.__eq__
+
+
+def trace_path(trace: dict, node) -> list:
+    """Follow `trace` back from `node` and return the path that leads to it.
+
+    `trace` maps each node to the node it was reached from.
+    """
+    path = [node]
+    while node in trace:
+        node = trace[node]
+        path.append(node)
+    path.reverse()
+    return path
+
+
+def bfs(
+        start, neighbours, goal=None,
+        stats: SearchStats | None = None) -> dict:
+    """Find the number of steps from `start` to every reachable node.
+
+    If `goal` is given (see `get_goal_test`), stop as soon as a goal is
+    reached.
+
+    Return a dict mapping nodes to their distance from `start`.
+    """
+    dist = {start: 0}
+    if goal is not None:
+        is_goal = get_goal_test(goal)
+        if is_goal(start):
+            return dist
+    q = deque((start,))
+    while q:
+        node = q.popleft()
+        if stats is not None:
+            stats.update(len(q) + 1)
+        d = dist[node] + 1
+        for n in neighbours(node):
+            if n in dist:
+                continue
+            dist[n] = d
+            if stats is not None:
+                stats.pushed += 1
+            if goal is not None and is_goal(n):
+                return dist
+            q.append(n)
+    return dist
+
+
+def bidirectional_bfs(
+        start, goal, neighbours, reverse=None,
+        stats: SearchStats | None = None) -> int | None:
+    """Return the fewest steps from `start` to `goal`, searching from both.
+
+    The search expands whichever of the two frontiers is smaller, one whole
+    layer at a time, until they meet. `reverse` gives the nodes that can
+    reach a node in one step, and defaults to `neighbours`, which is right
+    for undirected graphs.
+
+    Return None if `goal` can't be reached.
+    """
+    if start == goal:
+        return 0
+    if reverse is None:
+        reverse = neighbours
+    forward = {start: 0}
+    backward = {goal: 0}
+    front = [start]
+    back = [goal]
+    while front and back:
+        if len(front) > len(back):
+            front, back = back, front
+            forward, backward = backward, forward
+            neighbours, reverse = reverse, neighbours
+        layer = []
+        best = None
+        for node in front:
+            if stats is not None:
+                stats.update(len(front) + len(back))
+            d = forward[node] + 1
+            for n in neighbours(node):
+                if n in backward:
+                    # The frontiers have met, but finish the layer in case it
+                    # meets the other side somewhere closer.
+                    total = d + backward[n]
+                    if best is None or total < best:
+                        best = total
+                elif n not in forward:
+                    forward[n] = d
+                    layer.append(n)
+                    if stats is not None:
+                        stats.pushed += 1
+        if best is not None:
+            return best
+        front = layer
+    return None
+
+
+def zero_one_bfs(
+        start, neighbours, goal=None,
+        stats: SearchStats | None = None) -> dict:
+    """Find the cheapest cost from `start` to every reachable node.
+
+    Every edge must cost either 0 or 1, which allows a deque to stand in for
+    a priority queue: zero-cost steps go on the front, and unit-cost steps on
+    the back. `neighbours` returns (neighbour, cost) pairs. If `goal` is
+    given, stop as soon as a goal is settled.
+
+    Return a dict mapping nodes to their cost from `start`.
+    """
+    dist = {start: 0}
+    is_goal = None if goal is None else get_goal_test(goal)
+    done = set()
+    q = deque((start,))
+    while q:
+        node = q.popleft()
+        if node in done:
+            continue
+        done.add(node)
+        if is_goal is not None and is_goal(node):
+            break
+        if stats is not None:
+            stats.update(len(q) + 1)
+        d = dist[node]
+        for n, cost in neighbours(node):
+            score = d + cost
+            if score < dist.get(n, score + 1):
+                dist[n] = score
+                if cost:
+                    q.append(n)
+                else:
+                    q.appendleft(n)
+                if stats is not None:
+                    stats.pushed += 1
+    return dist
+
+
+def dijkstra(
+        start, neighbours, goal=None, heuristic=None,
+        stats: SearchStats | None = None,
+        queue=PriorityQueue) -> tuple:
+    """Find the cheapest paths from `start`, using Dijkstra's algorithm.
+
+    `neighbours` returns (neighbour, cost) pairs, where costs are not
+    negative. If `goal` is given (see `get_goal_test`), stop as soon as a
+    goal is reached.
+
+    If `heuristic` is given, this becomes an A* search. It takes a node and
+    returns an estimate of the remaining cost to the goal, which must never
+    overestimate it. `queue` is the class of priority queue to use, which
+    can be `util.BucketQueue` for small integer costs as long as the
+    heuristic is also consistent.
+
+    Return a tuple of (dist, trace, end). `dist` maps each node reached to
+    its cost from `start`, `trace` maps each node to the node it was reached
+    from, and `end` is the goal that was reached, or None.
+    """
+    dist = {start: 0}
+    trace = {}
+    is_goal = None if goal is None else get_goal_test(goal)
+    q = queue()
+    q.push(start, heuristic(start) if heuristic else 0)
+    while q:
+        _, node = q.pop()
+        if is_goal is not None and is_goal(node):
+            return dist, trace, node
+        if stats is not None:
+            stats.update(len(q) + 1)
+        d = dist[node]
+        for n, cost in neighbours(node):
+            score = d + cost
+            if score >= dist.get(n, score + 1):
+                continue
+            dist[n] = score
+            trace[n] = node
+            q.set_priority(n, score + heuristic(n) if heuristic else score)
+            if stats is not None:
+                stats.pushed += 1
+    return dist, trace, None
+
+
+def find_path(
+        start, goal, neighbours, heuristic=None,
+        stats: SearchStats | None = None,
+        queue=PriorityQueue) -> tuple | None:
+    """Find the cheapest path from `start` to `goal`.
+
+    This is a `dijkstra` search (or A*, if a `heuristic` is given) that
+    stops at the goal.
+
+    Return a tuple of (cost, path), where `path` is a list of nodes from
+    `start` to the goal that was reached, or None if no goal is reachable.
+    """
+    dist, trace, end = dijkstra(
+            start, neighbours, goal, heuristic, stats, queue)
+    if end is None:
+        return None
+    return dist[end], trace_path(trace, end)
+
+
+def find_all_paths(
+        start, goal, neighbours, heuristic=None,
+        stats: SearchStats | None = None) -> tuple | None:
+    """Find every cheapest path from `start` to `goal`.
+
+    Like `find_path`, but keeps every optimal predecessor of each node, and
+    carries on until all the goals with the cheapest cost are found.
+
+    Return a tuple of (cost, ends, predecessors), where `ends` is the set
+    of cheapest goals reached, and `predecessors` maps each node to the set
+    of nodes it can be reached from on a cheapest path. Use `get_path_nodes`
+    to find every node on those paths. Return None if no goal is reachable.
+    """
+    dist = {start: 0}
+    predecessors = {start: set()}
+    is_goal = get_goal_test(goal)
+    ends = set()
+    best = None
+    q = PriorityQueue()
+    q.push(start, heuristic(start) if heuristic else 0)
+    while q:
+        priority, node = q.pop()
+        if best is not None and priority > best:
+            break
+        d = dist[node]
+        if is_goal(node):
+            ends.add(node)
+            best = d
+            continue
+        if stats is not None:
+            stats.update(len(q) + 1)
+        for n, cost in neighbours(node):
+            score = d + cost
+            old = dist.get(n)
+            if old is None or score < old:
+                dist[n] = score
+                predecessors[n] = {node}
+                q.set_priority(n, score + heuristic(n) if heuristic else score)
+                if stats is not None:
+                    stats.pushed += 1
+            elif score == old:
+                predecessors[n].add(node)
+    if best is None:
+        return None
+    return best, ends, predecessors
+
+
+def get_path_nodes(predecessors: dict, ends) -> set:
+    """Return every node on a path back from any of `ends`.
+
+    `predecessors` maps each node to the set of nodes it can be reached from,
+    as returned by `find_all_paths`.
+    """
+    result = set(ends)
+    q = list(ends)
+    while q:
+        node = q.pop()
+        for n in predecessors.get(node, ()):
+            if n not in result:
+                result.add(n)
+                q.append(n)
+    return result
@@ -1,3 +1,15 @@
+"""spans.py
+
+Utility module for working with spans of integers.
+
+A span is a (low, high) tuple, which encloses all the integers from low to high
+inclusive. A box is a tuple of spans, one for each axis, which encloses all the
+integer points whose coordinates fall within the spans on every axis.
+"""
+import math
+from bisect import bisect_left, bisect_right
+
+
 def simplify_spans(spans: set) -> set:
     """Merge adjacent or overlapping spans together.
 
@@ -75,56 +87,189 @@ def span_contains(span: tuple, other: tuple) -> bool:
 
 
 class SpanSet:
+    """A set of integers, stored as the spans that enclose them.
+
+    The spans are held in two parallel sorted lists of their low and high
+    ends, and are always kept disjoint and non-adjacent, so that any value
+    or span can be located by bisection. Adding or removing a span costs
+    O(log n + k), where k is the number of existing spans it touches, and
+    the set operations between two SpanSets are a single merging sweep.
+    """
     def __init__(self, spans: tuple = None):
-        self.spans = set()
+        self.lows = []
+        self.highs = []
         if spans:
-            for span in spans:
-                assert len(span) == 2
-                a, b = sorted(span)
-                self.spans.add((a, b))
-        self.simplify()
+            # Sort all the spans once, then merge them in a single sweep.
+            for low, high in sorted(tuple(sorted(span)) for span in spans):
+                if self.highs and low <= self.highs[-1] + 1:
+                    if high > self.highs[-1]:
+                        self.highs[-1] = high
+                else:
+                    self.lows.append(low)
+                    self.highs.append(high)
+
+    @classmethod
+    def from_sorted(cls, lows: list, highs: list) -> 'SpanSet':
+        """Make a SpanSet from spans that are already sorted and simplified.
+        """
+        result = cls()
+        result.lows = lows
+        result.highs = highs
+        return result
+
+    @property
+    def spans(self) -> list:
+        """Return the spans in order, as a list of (low, high) tuples."""
+        return list(zip(self.lows, self.highs))
 
     @property
     def total(self):
         """Return the number of distinct values enclosed by the spans."""
-        return sum(high - low + 1 for low, high in self.spans)
+        return sum(self.highs) - sum(self.lows) + len(self.lows)
 
     @property
     def values(self):
         """Return the set of distinct values enclosed by these spans."""
         result = set()
-        for low, high in self.spans:
-            result |= {x for x in range(low, high + 1)}
+        for low, high in zip(self.lows, self.highs):
+            result.update(range(low, high + 1))
         return result
 
-    def simplify(self):
-        self.spans = simplify_spans(self.spans)
-
     def add_span(self, span: tuple):
         if not span:
             return
-        self.spans.add(tuple(sorted(span)))
-        self.simplify()
+        low, high = sorted(span)
+        # Find the existing spans that overlap or adjoin the new one, and
+        # replace them all with a single span.
+        i = bisect_left(self.highs, low - 1)
+        j = bisect_right(self.lows, high + 1)
+        if i < j:
+            low = min(low, self.lows[i])
+            high = max(high, self.highs[j - 1])
+        self.lows[i:j] = [low]
+        self.highs[i:j] = [high]
+
+    def remove_span(self, span: tuple):
+        if not span:
+            return
+        low, high = sorted(span)
+        # Find the existing spans that overlap the removed one, and replace
+        # them with whatever sticks out at either end.
+        i = bisect_left(self.highs, low)
+        j = bisect_right(self.lows, high)
+        if i >= j:
+            return
+        lows = []
+        highs = []
+        if self.lows[i] < low:
+            lows.append(self.lows[i])
+            highs.append(low - 1)
+        if self.highs[j - 1] > high:
+            lows.append(high + 1)
+            highs.append(self.highs[j - 1])
+        self.lows[i:j] = lows
+        self.highs[i:j] = highs
+
+    def contains(self, value: int) -> bool:
+        i = bisect_right(self.lows, value) - 1
+        return i >= 0 and self.highs[i] >= value
+
+    def __contains__(self, value: int) -> bool:
+        return self.contains(value)
+
+    def contains_span(self, span: tuple) -> bool:
+        """Return whether every value in `span` is in this set."""
+        low, high = span
+        i = bisect_right(self.lows, low) - 1
+        return i >= 0 and self.highs[i] >= high
+
+    def union(self, other: 'SpanSet') -> 'SpanSet':
+        """Return a new SpanSet of the values in either set."""
+        lows = []
+        highs = []
+        i = j = 0
+        while i < len(self.lows) or j < len(other.lows):
+            if j >= len(other.lows) or (
+                    i < len(self.lows) and self.lows[i] <= other.lows[j]):
+                low, high = self.lows[i], self.highs[i]
+                i += 1
+            else:
+                low, high = other.lows[j], other.highs[j]
+                j += 1
+            if highs and low <= highs[-1] + 1:
+                if high > highs[-1]:
+                    highs[-1] = high
+            else:
+                lows.append(low)
+                highs.append(high)
+        return SpanSet.from_sorted(lows, highs)
+
+    def intersect(self, other: 'SpanSet') -> 'SpanSet':
+        """Return a new SpanSet of the values in both sets."""
+        lows = []
+        highs = []
+        i = j = 0
+        while i < len(self.lows) and j < len(other.lows):
+            low = max(self.lows[i], other.lows[j])
+            high = min(self.highs[i], other.highs[j])
+            if low <= high:
+                lows.append(low)
+                highs.append(high)
+            # Move on from whichever span finishes first.
+            if self.highs[i] < other.highs[j]:
+                i += 1
+            else:
+                j += 1
+        return SpanSet.from_sorted(lows, highs)
+
+    def complement(self, low: int, high: int) -> 'SpanSet':
+        """Return a new SpanSet of the values from `low` to `high` that are
+        not in this set.
+        """
+        lows = []
+        highs = []
+        i = bisect_left(self.highs, low)
+        j = bisect_right(self.lows, high)
+        start = low
+        for k in range(i, j):
+            if self.lows[k] > start:
+                lows.append(start)
+                highs.append(self.lows[k] - 1)
+            start = self.highs[k] + 1
+        if start <= high:
+            lows.append(start)
+            highs.append(high)
+        return SpanSet.from_sorted(lows, highs)
 
     def subtract(self, other: 'SpanSet') -> 'SpanSet':
-        result = set()
-        for span in self.spans:
-            remain = subtract_spans(span, other)
-            result |= remain
-        return SpanSet(result)
+        """Return a new SpanSet of the values in this set but not `other`."""
+        if not self.lows:
+            return SpanSet()
+        return self.intersect(other.complement(self.lows[0], self.highs[-1]))
 
     def __sub__(self, other):
         return self.subtract(other)
 
-    def contains(self, value: int) -> bool:
-        for low, high in self.spans:
-            if low <= value and high >= value:
-                return True
-        return False
+    def __or__(self, other):
+        return self.union(other)
+
+    def __and__(self, other):
+        return self.intersect(other)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, SpanSet):
+            return NotImplemented
+        return self.lows == other.lows and self.highs == other.highs
+
+    def __iter__(self):
+        return zip(self.lows, self.highs)
+
+    def __len__(self) -> int:
+        return len(self.lows)
 
     def __str__(self) -> str:
         result = []
-        for low, high in sorted(self.spans):
+        for low, high in zip(self.lows, self.highs):
             if low == high:
                 result.append(str(low))
             else:
@@ -132,4 +277,140 @@ class SpanSet:
         return ', '.join(result)
 
     def __bool__(self) -> bool:
-        return bool(self.spans)
+        return bool(self.lows)
+
+
+def get_box_volume(box: tuple) -> int:
+    """Return the number of integer points enclosed by `box`."""
+    return math.prod(high - low + 1 for low, high in box)
+
+
+def intersect_boxes(a: tuple, b: tuple) -> tuple | None:
+    """Return the box of points in both `a` and `b`, or None if there are none.
+    """
+    result = []
+    for (alow, ahigh), (blow, bhigh) in zip(a, b):
+        low = max(alow, blow)
+        high = min(ahigh, bhigh)
+        if low > high:
+            return None
+        result.append((low, high))
+    return tuple(result)
+
+
+def boxes_overlap(a: tuple, b: tuple) -> bool:
+    for (alow, ahigh), (blow, bhigh) in zip(a, b):
+        if ahigh < blow or bhigh < alow:
+            return False
+    return True
+
+
+def subtract_box(a: tuple, b: tuple) -> list:
+    """Subtract box `b` from box `a`.
+
+    Return a list of disjoint boxes that enclose all the points in `a` but not
+    in `b`. There are at most two boxes for each axis: one on each side of `b`
+    along that axis, with the axes before it already trimmed to `b`.
+    """
+    if not boxes_overlap(a, b):
+        return [a]
+    result = []
+    box = list(a)
+    for axis, ((low, high), (blow, bhigh)) in enumerate(zip(a, b)):
+        if low < blow:
+            box[axis] = (low, blow - 1)
+            result.append(tuple(box))
+        if high > bhigh:
+            box[axis] = (bhigh + 1, high)
+            result.append(tuple(box))
+        box[axis] = (max(low, blow), min(high, bhigh))
+    return result
+
+
+class BoxSet:
+    """A set of integer points in any number of dimensions, stored as boxes.
+
+    The boxes are always kept disjoint, so the number of points is just the
+    sum of their volumes, and never requires visiting the points
+    themselves. Removing a box splits each box it overlaps into the pieces
+    that remain, and adding a box first removes it, then adds it whole.
+    Either way, only the boxes that overlap are split.
+    """
+    def __init__(self, boxes=None):
+        self.boxes = []
+        if boxes:
+            for box in boxes:
+                self.add_box(box)
+
+    @property
+    def volume(self) -> int:
+        """Return the number of distinct points enclosed by the boxes."""
+        return sum(map(get_box_volume, self.boxes))
+
+    def add_box(self, box: tuple):
+        # Cut the new box out of any boxes it overlaps, then add it whole.
+        box = tuple(tuple(sorted(span)) for span in box)
+        self.remove_box(box)
+        self.boxes.append(box)
+
+    def remove_box(self, box: tuple):
+        box = tuple(tuple(sorted(span)) for span in box)
+        result = []
+        for other in self.boxes:
+            if boxes_overlap(box, other):
+                result.extend(subtract_box(other, box))
+            else:
+                result.append(other)
+        self.boxes = result
+
+    def contains(self, point: tuple) -> bool:
+        return any(
+                all(low <= v <= high for v, (low, high) in zip(point, box))
+                for box in self.boxes)
+
+    def __contains__(self, point: tuple) -> bool:
+        return self.contains(point)
+
+    def union(self, other: 'BoxSet') -> 'BoxSet':
+        """Return a new BoxSet of the points in either set."""
+        result = BoxSet()
+        result.boxes = list(self.boxes)
+        for box in other.boxes:
+            result.add_box(box)
+        return result
+
+    def intersect(self, other: 'BoxSet') -> 'BoxSet':
+        """Return a new BoxSet of the points in both sets."""
+        result = BoxSet()
+        for a in self.boxes:
+            for b in other.boxes:
+                box = intersect_boxes(a, b)
+                if box is not None:
+                    result.boxes.append(box)
+        return result
+
+    def subtract(self, other: 'BoxSet') -> 'BoxSet':
+        """Return a new BoxSet of the points in this set but not `other`."""
+        result = BoxSet()
+        result.boxes = list(self.boxes)
+        for box in other.boxes:
+            result.remove_box(box)
+        return result
+
+    def __sub__(self, other):
+        return self.subtract(other)
+
+    def __or__(self, other):
+        return self.union(other)
+
+    def __and__(self, other):
+        return self.intersect(other)
+
+    def __iter__(self):
+        return iter(self.boxes)
+
+    def __len__(self) -> int:
+        return len(self.boxes)
+
+    def __bool__(self) -> bool:
+        return bool(self.boxes)
@@ -213,8 +213,40 @@ def test_y2018d18():
 
 
 def test_y2018d19():
+    from y2018.elfcode import Computer
     assert get_day_result(YEAR, 19) == (6, 6)
 
+    # The divisor sum idiom gives the same result as running the loops.
+    program = StringIO("""#ip 4
+        seti 12 0 5
+        seti 1 5 1
+        seti 1 2 2
+        mulr 2 1 3
+        eqrr 5 3 3
+        addr 4 3 4
+        addi 4 1 4
+        addr 1 0 0
+        addi 2 1 2
+        gtrr 2 5 3
+        addr 4 3 4
+        seti 2 3 4
+        addi 1 1 1
+        gtrr 1 5 3
+        addr 3 4 4
+        seti 1 6 4
+        """)
+    comp = Computer()
+    comp.parse(program)
+    assert comp.match_idiom(1) is not None
+    comp.run()
+    fused = (comp.registers, comp.counter, comp.pointer)
+    assert comp.registers[0] == 28
+
+    comp.reset()
+    comp.optimise = False
+    comp.run()
+    assert (comp.registers, comp.counter, comp.pointer) == fused
+
 
 def test_y2018d20():
     from y2018.d20 import Exp, Graph
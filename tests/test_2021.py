@@ -130,18 +130,16 @@ def test_y2021d21():
 
 
 def test_y2021d22():
-    from y2021.d22 import (
-            disjoint, contains, divide,
-            get_total_volume, get_volume, Grid)
+    from spans import BoxSet, get_box_volume, subtract_box
+    from y2021.d22 import disjoint, to_box, Grid
     grid = Grid()
     a = (10, 12, 10, 12, 10, 12)
     b = (11, 13, 11, 13, 11, 13)
-    assert get_volume(a) == 27
+    assert get_box_volume(to_box(a)) == 27
     assert disjoint(a, b) is False
-    assert contains(a, b) is False
-    assert contains(b, a) is False
-    div = divide(a, b)
-    assert get_total_volume(div) == 27
+    div = subtract_box(to_box(a), to_box(b))
+    assert sum(get_box_volume(box) for box in div) == 27 - 8
+    assert (BoxSet([to_box(a)]) & BoxSet([to_box(b)])).volume == 8
     grid.activate(a)
     assert grid.total_active == 27
     grid.activate(b)
@@ -0,0 +1,16 @@
+import advent
+
+
+def test_profile_arguments():
+    args = advent.make_parser().parse_args(['--profile', '2015', '1', '-t'])
+    assert args.profile
+    assert args.profile_mode == 'cprofile'
+    assert (args.year, args.day, args.test) == (2015, 1, True)
+
+    args = advent.make_parser().parse_args(
+            ['2015', '1', '--profile', '--profile-mode', 'sample'])
+    assert args.profile
+    assert args.profile_mode == 'sample'
+
+    args = advent.make_parser().parse_args(['2015', '1'])
+    assert not args.profile
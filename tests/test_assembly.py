@@ -66,3 +66,130 @@ def test_modify_register():
     assert comp.pointer == 1
     assert comp.counter == 1
     assert comp.registers == {'x': 1}
+
+
+class Counter(assembly.Computer):
+    """A tiny instruction set, with templates for everything except 'dbl'."""
+    templates = {
+            'set': '{w0} = {v1}',
+            'add': '{w0} += {v1}',
+            'jnz': assembly.Branch('{v0} != 0', 1),
+            'jmp': assembly.Branch('True', 0, False),
+            }
+
+    def __init__(self):
+        super().__init__({'x': 0, 'y': 0}, {
+                'dbl': self.do_double,
+                'set': self.do_set,
+                })
+
+    def do_double(self, register):
+        self.registers[register] *= 2
+
+    def do_set(self, register, value):
+        self.registers[register] = int(value)
+
+
+def test_compiled_loop():
+    comp = Counter()
+    comp.load_program((
+            ('set', ('x', '5')),
+            ('add', ('y', '3')),
+            ('add', ('x', '-1')),
+            ('jnz', ('x', '-2')),
+            ))
+    source = comp.translate_block(1, ['x', 'y'])
+    assert 'while True:' in source
+    comp.run()
+    assert comp.registers == {'x': 0, 'y': 15}
+    assert comp.counter == 16
+    assert comp.pointer == 4
+
+
+def test_compiled_fallback():
+    comp = Counter()
+    comp.load_program((
+            ('set', ('x', '3')),
+            ('dbl', ('x',)),
+            ('jmp', (5,)),
+            ('set', ('x', '0')),
+            ('set', ('x', '0')),
+            ('add', ('y', 'x')),
+            ))
+    assert comp.translate_block(1, ['x', 'y']) is None
+    comp.run()
+    assert comp.registers == {'x': 6, 'y': 6}
+    assert comp.counter == 4
+
+
+def test_fused_loops():
+    program = (
+            ('set', ('x', '6')),
+            ('set', ('y', '7')),
+            ('set', ('z', 'x')),
+            # z += x * y, with a loop nested in a loop.
+            ('set', ('w', 'x')),
+            ('add', ('z', '1')),
+            ('add', ('w', '-1')),
+            ('jnz', ('w', '-2')),
+            ('add', ('y', '-1')),
+            ('jnz', ('y', '-5')),
+            )
+
+    class Computer(Counter):
+        def __init__(self):
+            super().__init__()
+            self.registers = {'w': 0, 'x': 0, 'y': 0, 'z': 0}
+
+    comp = Computer()
+    comp.load_program(program)
+    macro = comp.get_macro(3, {})
+    assert macro is not None
+    assert macro[2] == 9
+    comp.run()
+    fused = (dict(comp.registers), comp.counter)
+    assert comp.registers == {'w': 0, 'x': 6, 'y': 0, 'z': 48}
+
+    comp = Computer()
+    comp.optimise = False
+    comp.load_program(program)
+    comp.run()
+    assert (comp.registers, comp.counter) == fused
+
+
+def test_unfused_loop():
+    comp = Counter()
+    comp.load_program((
+            ('set', ('x', '6')),
+            # Counting down by 2 isn't handled.
+            ('add', ('y', 'x')),
+            ('add', ('x', '-2')),
+            ('jnz', ('x', '-2')),
+            ))
+    assert comp.get_macro(1, {}) is None
+    comp.run()
+    assert comp.registers == {'x': 0, 'y': 12}
+    assert comp.counter == 10
+
+
+def test_compiled_ip_register():
+    class Computer(assembly.Computer):
+        templates = {
+                'seti': '{w1} = {i0}',
+                'addi': '{w2} = {r0} + {i1}',
+                }
+
+    comp = Computer([0, 0])
+    comp.ip_register = 0
+    comp.load_program((
+            ('addi', (1, 1, 1)),
+            # Writing to register 0 jumps over the next instruction.
+            ('addi', (0, 1, 0)),
+            ('addi', (1, 100, 1)),
+            ('addi', (1, 1, 1)),
+            ('seti', (9, 0)),
+            ))
+    comp.run()
+    assert comp.registers == [9, 2]
+    assert comp.pointer == 10
+    assert comp.counter == 4
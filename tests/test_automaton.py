@@ -0,0 +1,88 @@
+import numpy as np
+
+import automaton
+
+
+BLINKER = np.array([
+        [0, 0, 0],
+        [1, 1, 1],
+        [0, 0, 0]], dtype=np.uint8)
+
+
+def test_offsets():
+    assert len(automaton.get_offsets(2)) == 8
+    assert len(automaton.get_offsets(3)) == 26
+    assert len(automaton.get_offsets(4)) == 80
+    assert set(automaton.get_offsets(2, surround=False)) == {
+            (-1, 0), (1, 0), (0, -1), (0, 1)}
+
+
+def test_parse_rule():
+    rule = automaton.parse_rule('B36/S23')
+    assert rule.birth == {3, 6}
+    assert rule.survival == {2, 3}
+    assert str(rule) == 'B36/S23'
+    assert rule.apply(True, 2)
+    assert not rule.apply(False, 2)
+
+
+def test_dense_life():
+    board = automaton.DenseAutomaton(BLINKER.copy(), automaton.LIFE)
+    board.step()
+    assert board.cells.tolist() == [[0, 1, 0], [0, 1, 0], [0, 1, 0]]
+    board.step()
+    assert board.cells.tolist() == BLINKER.tolist()
+    assert board.generation == 2
+
+    board.advance(1_000_000_001)
+    assert board.generation == 1_000_000_001
+    assert board.cells.tolist() == [[0, 1, 0], [0, 1, 0], [0, 1, 0]]
+
+
+def test_dense_grow():
+    board = automaton.DenseAutomaton(
+            np.array([[1, 1, 1]], dtype=np.uint8), automaton.LIFE, grow=True)
+    board.step()
+    assert board.origin == (1, 1)
+    assert board.cells.shape == (3, 5)
+    assert board.cells[:, 2].tolist() == [1, 1, 1]
+    assert board.count_state(1) == 3
+
+
+def test_sparse_matches_dense():
+    glider = np.zeros((8, 8), dtype=np.uint8)
+    for y, x in ((0, 1), (1, 2), (2, 0), (2, 1), (2, 2)):
+        glider[y, x] = 1
+    dense = automaton.DenseAutomaton(glider, automaton.LIFE)
+    sparse = automaton.SparseAutomaton(
+            set(zip(*np.nonzero(glider))), automaton.LIFE)
+    dense.run(8)
+    sparse.run(8)
+    assert {tuple(map(int, p)) for p in zip(*np.nonzero(dense.cells))} == (
+            sparse.cells)
+    assert len(sparse) == 5
+
+
+def test_sparse_hex():
+    rule = automaton.LifeRule((2,), (1, 2))
+    board = automaton.SparseAutomaton(
+            {(0, 0), (1, 0)}, rule, automaton.HEX_OFFSETS)
+    board.step()
+    # The two cells that neighbour both live cells are born.
+    assert board.cells == {(0, 0), (1, 0), (0, -1), (1, 1)}
+
+
+def test_table_rule():
+    # Every cell flips state, including the infinite background.
+    offsets = ((0, 0),)
+    rule = automaton.TableRule([1, 0], offsets)
+    board = automaton.DenseAutomaton(
+            np.array([[1, 0]], dtype=np.uint8), rule, grow=True)
+    board.step()
+    assert board.background == 1
+    assert board.cells.tolist() == [
+            [1, 1, 1, 1],
+            [1, 0, 1, 1],
+            [1, 1, 1, 1]]
+    board.step()
+    assert board.background == 0
@@ -0,0 +1,44 @@
+import bench
+
+
+def test_percentile():
+    assert bench.percentile([5], 95) == 5
+    assert bench.percentile([3, 1, 2], 50) == 2
+    assert bench.percentile(list(range(1, 101)), 95) == 95
+    assert bench.percentile(list(range(1, 101)), 100) == 100
+
+
+def test_summarise():
+    assert bench.summarise([4, 1, 3, 2]) == {'min': 1, 'median': 2.5, 'p95': 4}
+
+
+def make_record(commit, median, dirty=False, part='Part 1'):
+    return {
+            'commit': commit, 'dirty': dirty, 'year': 2019, 'day': 1,
+            'test': False, 'part': part, 'median': median}
+
+
+def test_find_baseline():
+    history = [
+            make_record('aaa', 100),
+            make_record('aaa', 200, part='Part 2'),
+            make_record('bbb', 110),
+            ]
+    # Latest record from a different commit
+    rec = make_record('ccc', 120)
+    assert bench.find_baseline(history, rec) is history[2]
+    # Never compare against the same commit ...
+    rec = make_record('bbb', 120)
+    assert bench.find_baseline(history, rec) is history[0]
+    # ... unless we're on a dirty tree.
+    rec = make_record('bbb', 120, dirty=True)
+    assert bench.find_baseline(history, rec) is history[2]
+    # Explicit baseline commit, by prefix
+    rec = make_record('ccc', 120)
+    assert bench.find_baseline(history, rec, 'a') is history[0]
+    assert bench.find_baseline(history, rec, 'x') is None
+
+
+def test_get_change():
+    assert bench.get_change(make_record('b', 110), make_record('a', 100)) == 10
+    assert bench.get_change(make_record('b', 50), make_record('a', 100)) == -50
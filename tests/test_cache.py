@@ -0,0 +1,46 @@
+import os
+
+import cache
+
+
+def test_find_local_modules():
+    modules = cache.find_local_modules('y2019.d07')
+    assert set(modules) == {'y2019.d07', 'y2019.intcode', 'util'}
+    assert modules['util'] == os.path.join(cache.ROOT, 'util.py')
+
+
+def test_make_key(tmp_path):
+    path = tmp_path / 'input'
+    path.write_text('1,2,3\n')
+    key = cache.make_key(2019, 7, False, path)
+    assert key == cache.make_key(2019, 7, False, path)
+    assert key != cache.make_key(2019, 7, True, path)
+    assert key != cache.make_key(2019, 9, False, path)
+    path.write_text('1,2,4\n')
+    assert key != cache.make_key(2019, 7, False, path)
+
+
+def test_result_cache(tmp_path):
+    results = cache.ResultCache(tmp_path)
+    assert results.get('a') is None
+    results.put('a', ('1', '2'), year=2019, day=1)
+    assert results.get('a') == ('1', '2')
+
+
+def test_result_cache_eviction(tmp_path):
+    results = cache.ResultCache(tmp_path)
+    results.put('a', ('1', '2'))
+    size = os.path.getsize(results.get_path('a'))
+    results.max_bytes = size * 2
+
+    results.put('b', ('3', '4'))
+    # Make 'a' the oldest entry, then touch it by reading it again so that 'b'
+    # becomes the least recently used.
+    os.utime(results.get_path('a'), (0, 0))
+    os.utime(results.get_path('b'), (1, 1))
+    assert results.get('a') == ('1', '2')
+
+    results.put('c', ('5', '6'))
+    assert results.get('b') is None
+    assert results.get('a') == ('1', '2')
+    assert results.get('c') == ('5', '6')
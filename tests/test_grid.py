@@ -1,3 +1,5 @@
+import numpy as np
+
 import grid
 
 
@@ -85,3 +87,126 @@ def test_sparse_parse():
     assert g.cells == {(1, 0), (2, 1)}
     assert g.width == 3
     assert g.height == 3
+
+
+def test_array_parse():
+    g = grid.ArrayGrid().parse(['#.#', '..#'])
+    assert g.width == 3
+    assert g.height == 2
+    assert g.cells.dtype == np.uint8
+    assert g.get_value((2, 1)) == ord('#')
+    assert g.get_adjacent((0, 0)) == {(1, 0), (0, 1)}
+    assert g.to_string() == '#.#\n..#'
+
+    class Numbers(grid.ArrayGrid):
+        def parse_cell(self, position, value):
+            return int(value) * 1000
+
+    g = Numbers().parse(['12', '90'])
+    assert g.cells.dtype == np.int32
+    assert g.get_value((0, 1)) == 9000
+
+
+def test_array_find():
+    g = grid.ArrayGrid().parse(['#.#', '..#'])
+    assert g.find('#') == (0, 0)
+    assert g.find('S') is None
+    assert g.find_all('#') == [(0, 0), (2, 0), (2, 1)]
+    assert g.count('.') == 3
+    assert g.get_mask('#').tolist() == [
+            [True, False, True],
+            [False, False, True]]
+
+
+def test_array_fill():
+    g = grid.ArrayGrid().parse(['...', '...', '...'])
+    g.fill_rect((1, -1), (5, 1), '#')
+    assert g.to_string() == '.##\n.##\n...'
+    g.fill('O', g.get_mask('.'))
+    assert g.to_string() == 'O##\nO##\nOOO'
+    g.set_value((0, 0), '.')
+    g.fill('.')
+    assert g.count('.') == 9
+
+
+def test_array_neighbour_sums():
+    g = grid.ArrayGrid().parse(['#.#', '..#', '#..'])
+    mask = g.get_mask('#')
+    assert g.get_neighbour_sums(mask).tolist() == [
+            [0, 3, 1],
+            [2, 4, 1],
+            [0, 2, 1]]
+    assert g.get_neighbour_sums(mask, surround=False).tolist() == [
+            [0, 2, 1],
+            [2, 1, 1],
+            [0, 1, 1]]
+
+
+def test_neighbour_table():
+    g = grid.SparseGrid().parse(['..#', '.#.', '...'])
+    table = g.get_neighbour_table()
+    assert table.to_index((2, 1)) == 5
+    assert table.to_position(5) == (2, 1)
+    assert table.indptr.tolist() == [0, 2, 3, 3, 5, 5, 6, 8, 10, 12]
+    assert sorted(table.neighbours[0]) == [1, 3]
+    assert table.neighbours[2] == ()
+    assert sorted(table.neighbours[7]) == [6, 8]
+    assert table.indices[table.indptr[8]:table.indptr[9]].tolist() == list(
+            table.neighbours[8])
+
+    surround = g.get_neighbour_table(surround=True)
+    assert sorted(surround.neighbours[3]) == [0, 1, 6, 7]
+
+    assert table.get_distances(0) == [0, 1, -1, 1, -1, 5, 2, 3, 4]
+    assert table.get_path(0, 5) == [0, 3, 6, 7, 8, 5]
+    assert table.get_path(0, 2) is None
+
+
+def test_neighbour_table_callable():
+    g = grid.Grid()
+    g.width = 3
+    g.height = 2
+    table = g.get_neighbour_table(lambda p: p != (1, 0))
+    assert table.neighbours[0] == (3,)
+    assert sorted(table.neighbours[4]) == [3, 5]
+    assert table.neighbours[1] == ()
+
+
+def test_junction_graph():
+    g = grid.Grid().parse([
+            '#.#####',
+            '#.....#',
+            '#.#D#.#',
+            '#.....#',
+            '#####.#',
+            ])
+
+    def passable(p):
+        return g.in_bound(p) and g.get_value(p) != '#'
+
+    def label(p):
+        return 'D' if g.get_value(p) == 'D' else None
+
+    start = (1, 0)
+    end = (5, 4)
+    graph = g.get_junction_graph(passable, label=label)
+    assert set(graph.nodes) == {start, end, (1, 1), (3, 1), (3, 3), (5, 3)}
+    assert graph.edges[start] == {(1, 1): 1}
+    assert graph.edges[(1, 1)] == {start: 1, (3, 1): 2, (3, 3): 4}
+    assert graph.get_labels((3, 1), (3, 3)) == {'D'}
+    assert graph.get_labels((1, 1), (3, 1)) == frozenset()
+
+    dist = graph.get_distance_matrix()
+    i = graph.index[start]
+    j = graph.index[end]
+    assert dist[i, j] == 8
+    assert (graph.get_distance_matrix(floyd=False) == dist).all()
+
+    # Without passing the door, (3, 1) has to go the long way round.
+    dist = graph.get_distance_matrix(lambda labels: 'D' not in labels)
+    assert dist[graph.index[(3, 1)], graph.index[(3, 3)]] == 6
+    assert dist[i, j] == 8
+
+    # Keeping the door as a node splits the middle corridor around it.
+    graph = g.get_junction_graph(passable, keep={(3, 2)}, label=label)
+    assert graph.edges[(3, 2)] == {(3, 1): 1, (3, 3): 1}
@@ -0,0 +1,66 @@
+import os
+from _md5 import md5
+from itertools import islice
+
+import hashing
+
+
+def test_hex_prefix():
+    h = md5(b'abcdef609043')
+    assert hashing.HexPrefix('00000')(h)
+    assert not hashing.HexPrefix('000000')(h)
+    assert hashing.HexPrefix('000001dbbf')(h)
+    assert not hashing.HexPrefix('1')(h)
+
+
+def test_mine():
+    test = hashing.HexPrefix('00')
+    serial = list(islice(hashing.mine(b'abc', test, workers=1), 20))
+    assert all(d.startswith('00') for _, d in serial)
+    nonces = [n for n, _ in serial]
+    assert nonces == sorted(nonces)
+    expected = [
+            n for n in range(nonces[-1] + 1)
+            if md5(f'abc{n}'.encode()).hexdigest().startswith('00')]
+    assert nonces == expected
+
+    parallel = hashing.mine(b'abc', test, chunk=500, workers=2)
+    assert list(islice(parallel, 20)) == serial
+    parallel.close()
+
+
+def test_iter_digests(tmp_path):
+    cache = hashing.DigestCache(str(tmp_path))
+    expected = [hashing.stretch_digest(
+            md5(f'abc{n}'.encode()).hexdigest(), 3) for n in range(25)]
+
+    digests = hashing.iter_digests(b'abc', 3, cache, chunk=10, workers=1)
+    assert list(islice(digests, 15)) == expected[:15]
+    digests.close()
+    assert cache.load(b'abc', 3) == expected[:20]
+    assert cache.load(b'abc', 2) == []
+
+    digests = hashing.iter_digests(b'abc', 3, cache, chunk=10, workers=1)
+    assert list(islice(digests, 25)) == expected
+    digests.close()
+    assert len(cache.load(b'abc', 3)) == 30
+
+
+def test_digest_cache_evict(tmp_path):
+    cache = hashing.DigestCache(str(tmp_path), max_bytes=40)
+    cache.extend(b'a', 0, 0, ['00' * 16] * 2)
+    os.utime(cache.get_path(b'a', 0), (0, 0))
+    cache.extend(b'b', 0, 0, ['11' * 16] * 2)
+    assert cache.load(b'a', 0) == []
+    assert cache.load(b'b', 0) == ['11' * 16] * 2
+
+
+def test_digest_cache_partial_write(tmp_path):
+    cache = hashing.DigestCache(str(tmp_path))
+    cache.extend(b'a', 0, 0, ['00' * 16] * 2)
+    # Simulate an interrupted write, which left part of a third digest.
+    with open(cache.get_path(b'a', 0), 'ab') as fp:
+        fp.write(b'\x11' * 5)
+    assert cache.load(b'a', 0) == ['00' * 16] * 2
+    cache.extend(b'a', 0, 2, ['22' * 16])
+    assert cache.load(b'a', 0) == ['00' * 16] * 2 + ['22' * 16]
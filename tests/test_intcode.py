@@ -0,0 +1,243 @@
+import pytest
+
+from y2019.intcode import Computer, FastComputer, InputRequired, Network
+
+
+COMPUTERS = (Computer, FastComputer)
+
+
+@pytest.mark.parametrize('cls', COMPUTERS)
+def test_run(cls):
+    prog = "109,1,204,-1,1001,100,1,100,1008,100,16,101,1006,101,0,99"
+    comp = cls(prog)
+    assert comp.run() == comp.program
+    assert cls("1102,34915192,34915192,7,4,7,99,0").run() == (1219070632396864,)
+    assert cls("104,1125899906842624,99").run() == (1125899906842624,)
+
+
+@pytest.mark.parametrize('cls', COMPUTERS)
+def test_inputs(cls):
+    comp = cls("3,9,8,9,10,9,4,9,99,-1,8")
+    assert comp.run([8]) == (1,)
+    comp.reset()
+    assert comp.run([7]) == (0,)
+
+    with pytest.raises(InputRequired):
+        cls("3,0,99").run()
+
+    # The input instruction can be retried once an input is available.
+    comp = cls("3,5,4,5,99,0")
+    with pytest.raises(InputRequired):
+        comp.execute()
+    assert comp.pointer == 0
+    comp.add_input(3)
+    assert comp.run() == (3,)
+
+
+@pytest.mark.parametrize('cls', COMPUTERS)
+def test_execute_budget(cls):
+    comp = cls("1101,1,2,9,1101,3,4,10,99,0,0")
+    comp.execute(budget=1)
+    assert comp.pointer == 4
+    assert comp.memory[10] == 0
+    comp.execute(budget=5)
+    assert comp.halt
+    assert comp.memory[10] == 7
+
+
+@pytest.mark.parametrize('cls', COMPUTERS)
+def test_memory(cls):
+    comp = cls("1,0,0,0,99")
+    comp.memory[1] = 4
+    comp.run()
+    assert comp.memory[0] == 100
+    assert comp.memory[1000] == 0
+
+    # Relative mode reads and writes far beyond the end of the program.
+    comp = cls("109,5000,21101,7,8,10,204,10,99")
+    assert comp.run() == (15,)
+
+
+def test_relative_addresses():
+    # Only the relative mode parameter decides how far memory has to grow.
+    prog = "109,100,22101,1000000000000,0,1,204,1,99"
+    assert Computer(prog).run() == FastComputer(prog).run() == (
+            1000000000000,)
+
+    # Negative relative addresses are rejected, not read from the end.
+    for cls in COMPUTERS:
+        with pytest.raises(ValueError, match='Invalid address -5'):
+            cls("109,-5,204,0,99").run()
+
+
+@pytest.mark.parametrize('cls', COMPUTERS)
+def test_self_modifying(cls):
+    # The first instruction outputs the value at address 20, then the second
+    # instruction changes its parameter to 21 and loops back to it.
+    prog = "4,20,1101,0,21,1,1001,40,1,40,1007,40,2,41,1005,41,0,99,0,0,7,8"
+    assert cls(prog).run() == (7, 8)
+
+
+@pytest.mark.parametrize('cls', COMPUTERS)
+def test_generate(cls):
+    comp = cls("104,1,104,2,104,3,99")
+    assert list(comp.generate()) == [1, 2, 3]
+
+
+@pytest.mark.parametrize('cls', COMPUTERS)
+def test_hooks(cls):
+    comp = cls("3,9,1001,9,1,9,4,9,99,0")
+    comp.set_input_hook(lambda: 41)
+    received = []
+    comp.set_output_hook(lambda outputs: received.append(outputs.pop()))
+    comp.run()
+    assert received == [42]
+
+
+def test_fast_decode_cache():
+    comp = FastComputer("1101,1,2,5,99,0")
+    comp.run()
+    assert comp.memory[5] == 3
+    assert comp.code[0] is not None
+    # Overwriting a parameter of a decoded instruction discards it.
+    comp.memory[2] = 5
+    assert comp.code[0] is None
+
+
+# Reads an input, adds it to a running total at address 30, outputs the total,
+# and loops. Address 300 is also written each loop, to touch a second page.
+ACCUMULATOR = (
+        "3,31,1,30,31,30,4,30,1001,300,1,300,1105,1,0,"
+        + ','.join(['0'] * 16))
+
+
+@pytest.mark.parametrize('cls', COMPUTERS)
+def test_snapshot_restore(cls):
+    comp = cls(ACCUMULATOR)
+    comp.add_inputs((1, 2))
+    gen = comp.generate()
+    assert next(gen) == 1
+    snap = comp.snapshot()
+    assert next(gen) == 3
+
+    comp.restore(snap)
+    assert comp.inputs == [2]
+    assert comp.memory[30] == 1
+    assert comp.memory[300] == 0
+    comp.add_input(10)
+    gen = comp.generate()
+    assert next(gen) == 3
+    assert next(gen) == 13
+    assert comp.memory[300] == 2
+
+    # Restoring the same snapshot again is also fine.
+    comp.restore(snap)
+    assert comp.inputs == [2]
+    assert next(comp.generate()) == 3
+
+
+@pytest.mark.parametrize('cls', COMPUTERS)
+def test_fork(cls):
+    comp = cls(ACCUMULATOR)
+    comp.add_input(1)
+    assert next(comp.generate()) == 1
+
+    child = comp.fork()
+    child.add_input(100)
+    comp.add_input(5)
+    assert next(child.generate()) == 101
+    assert next(comp.generate()) == 6
+    assert child.memory[30] == 101
+    assert comp.memory[30] == 6
+
+
+def test_fast_snapshot_pages():
+    comp = FastComputer(ACCUMULATOR)
+    comp.add_input(1)
+    next(comp.generate())
+    first = comp.snapshot()
+    assert len(first.memory) == 1
+
+    # Only the pages written since the last snapshot are copied. This time
+    # around, memory grows to include address 300 on a new page.
+    comp.add_input(1)
+    next(comp.generate())
+    assert comp.dirty == {0, 1}
+    second = comp.snapshot()
+    assert comp.dirty == set()
+    third = comp.snapshot()
+    assert third.memory is second.memory
+
+    comp.memory[0] = 1105
+    fourth = comp.snapshot()
+    assert fourth.memory[0] is not second.memory[0]
+    assert fourth.memory[1] is second.memory[1]
+
+    # A fork shares the parent's snapshot pages, with nothing dirty.
+    child = comp.fork()
+    assert child.pages is comp.pages is fourth.memory
+    assert child.dirty == comp.dirty == set()
+    assert child.snapshot().memory is fourth.memory
+
+    # Restoring rolls the decoded instruction back too.
+    comp.restore(second)
+    assert comp.memory[0] == 3
+    comp.add_input(4)
+    assert next(comp.generate()) == 6
+
+
+class Recorder(Network):
+    """A network that records every packet, and wakes up once when idle."""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.packets = []
+        self.idle = 0
+
+    def route(self, source, packet):
+        self.packets.append((source, packet))
+        return None
+
+    async def on_idle(self):
+        self.idle += 1
+        if self.idle == 1:
+            await self.send(0, (7,))
+
+
+@pytest.mark.parametrize('cls', COMPUTERS)
+def test_network_ring(cls):
+    # Each computer adds one to its input, and passes it on.
+    prog = "3,9,1001,9,1,9,4,9,99,0"
+    comps = [cls(prog) for _ in range(4)]
+    comps[0].add_input(0)
+    net = Network(comps, budget=2)
+    net.run()
+    assert all(comp.halt for comp in comps)
+    # The last output went back to the first computer, which had halted.
+    assert comps[-1].memory[9] == 4
+
+
+def test_network_idle():
+    # Echo two inputs, then halt.
+    comp = FastComputer("3,9,4,9,3,9,4,9,99,0")
+    net = Recorder([comp], default=-1)
+    net.run()
+    # No input was waiting, so the first read got the default value. The
+    # second read waited, the network went idle, and the idle hook sent 7.
+    assert net.packets == [(0, (-1,)), (0, (7,))]
+    assert net.idle == 1
+    assert comp.halt
+
+    # With nothing to send on the second idle, the network stops.
+    comp = FastComputer("3,9,4,9,3,9,4,9,3,9,99,0")
+    net = Recorder([comp, FastComputer("3,0,99")])
+    comp.add_input(1)
+    net.run()
+    assert net.packets == [(0, (1,)), (0, (7,))]
+    assert net.idle == 2
+    assert not comp.halt
+
+
+def test_network_crash():
+    net = Network([FastComputer("3,0,99"), FastComputer("42")])
+    with pytest.raises(ValueError):
+        net.run()
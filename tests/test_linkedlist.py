@@ -180,3 +180,120 @@ def test_dlist_remove():
     assert a.remove(a.end) == 'c'
     assert tuple(x for x in a) == tuple()
     assert len(a) == 0
+
+
+def test_alist_append():
+    a = linkedlist.ArrayList()
+    assert tuple(a) == ()
+    assert a.start == linkedlist.NIL and a.end == linkedlist.NIL
+
+    handle = a.append('a')
+    assert a.get_value(handle) == 'a'
+    assert tuple(a) == ('a',)
+    a.extend(('b', 'c'))
+    assert tuple(a) == ('a', 'b', 'c')
+    assert len(a) == 3
+    assert a.get_tail(a.end) == linkedlist.NIL
+    assert a.get_head(a.start) == linkedlist.NIL
+
+
+def test_alist_insert():
+    a = linkedlist.ArrayList()
+    node = a.insert('a')
+    assert tuple(a) == ('a',)
+
+    node2 = a.insert('b')
+    assert tuple(a) == ('b', 'a')
+
+    a.insert('c', node)
+    assert tuple(a) == ('b', 'c', 'a')
+
+    a.insert('d', node2)
+    assert tuple(a) == ('d', 'b', 'c', 'a')
+
+    a.insert_after('e', node)
+    assert tuple(a) == ('d', 'b', 'c', 'a', 'e')
+    assert len(a) == 5
+
+
+def test_alist_remove():
+    a = linkedlist.ArrayList(['a', 'b', 'c'])
+    node = a.get_tail(a.start)
+    assert a.remove(node) == 'b'
+    assert tuple(a) == ('a', 'c')
+
+    # The handle of the removed node is reused
+    assert a.append('d') == node
+    assert tuple(a) == ('a', 'c', 'd')
+
+    assert a.popleft() == 'a'
+    assert a.pop() == 'd'
+    assert a.pop() == 'c'
+    assert tuple(a) == ()
+    assert len(a) == 0
+    with pytest.raises(IndexError):
+        a.pop()
+    with pytest.raises(IndexError):
+        a.popleft()
+
+
+def test_alist_step():
+    a = linkedlist.ArrayList(range(5))
+    assert a.get_value(a.step(a.start, 2)) == 2
+    assert a.get_value(a.step(a.start, 7)) == 2
+    assert a.get_value(a.step(a.start, -1)) == 4
+
+
+def test_alist_move():
+    a = linkedlist.ArrayList(range(6))
+    handles = tuple(a.iter_handles())
+    a.move(handles[1], 2, handles[4])
+    assert tuple(a) == (0, 3, 4, 1, 2, 5)
+
+    # Moving the start of the list
+    a.move(handles[0], 1, handles[5])
+    assert tuple(a) == (3, 4, 1, 2, 5, 0)
+
+    a.move(handles[2], 3, handles[4])
+    assert tuple(a) == (3, 4, 2, 5, 0, 1)
+
+
+def test_alist_typecode():
+    a = linkedlist.ArrayList(range(3), 'l')
+    handle = a.insert(7, a.end)
+    assert tuple(a) == (0, 1, 7, 2)
+    assert a.remove(handle) == 7
+    assert tuple(a) == (0, 1, 2)
+
+
+def test_ring():
+    ring = linkedlist.Ring([3, 8, 9, 1, 2, 5, 4, 6, 7])
+    assert len(ring) == 9
+    assert 3 in ring and 0 not in ring
+    assert ring.get_next(7) == 3
+    assert ring.step(3, 4) == 2
+    assert ring.get_values(3, 3) == [8, 9, 1]
+
+    ring.move_after(3, 3, 2)
+    assert tuple(ring.iter_values(3)) == (3, 2, 8, 9, 1, 5, 4, 6, 7)
+    assert ring.remove_after(9) == 1
+    assert 1 not in ring
+    ring.insert_after(7, 1)
+    assert tuple(ring.iter_values(3)) == (3, 2, 8, 9, 5, 4, 6, 7, 1)
+    assert len(ring) == 9
+    with pytest.raises(ValueError):
+        ring.step(3, -1)
+
+
+def test_ring_backward():
+    ring = linkedlist.Ring([0, 4, 2], size=6, backward=True)
+    assert ring.get_prev(0) == 2
+    assert ring.step(0, -2) == 4
+    ring.insert_after(4, 5)
+    assert ring.get_prev(2) == 5
+    assert ring.remove(4) == 4
+    assert tuple(ring.iter_values(0)) == (0, 5, 2)
+    ring.move_after(0, 1, 2)
+    assert tuple(ring.iter_values(0)) == (0, 2, 5)
+    assert ring.get_prev(5) == 2
+    assert ring.get_prev(0) == 5
@@ -0,0 +1,67 @@
+from fractions import Fraction
+
+import matrix
+
+
+SYSTEM = [
+        [2, 1, -1, 8],
+        [-3, -1, 2, -11],
+        [-2, 1, 2, -3],
+        ]
+SOLUTION = [Fraction(2), Fraction(3), Fraction(-1)]
+
+
+def test_bareiss():
+    rows, pivots = matrix.bareiss(SYSTEM)
+    assert pivots == [0, 1, 2]
+    assert all(rows[i][j] == 0 for i in range(3) for j in range(i))
+    # The last pivot is the determinant, up to sign.
+    assert abs(rows[2][2]) == 1
+    assert SYSTEM[0] == [2, 1, -1, 8]
+
+
+def test_solve_exact():
+    assert matrix.solve_exact(SYSTEM) == SOLUTION
+    assert matrix.solve_exact([[2, 3]]) == [Fraction(3, 2)]
+    # Inconsistent, and underdetermined
+    assert matrix.solve_exact([[1, 1, 1], [2, 2, 3]]) is None
+    assert matrix.solve_exact([[1, 1, 1], [2, 2, 2]]) is None
+
+
+def test_solve_modular():
+    values = matrix.solve_modular(SYSTEM, 7)
+    assert values == [2, 3, 6]
+    assert matrix.solve_multimodular(SYSTEM) == SOLUTION
+    system = [[3, 5, 1], [7, -2, 4]]
+    assert matrix.solve_multimodular(system) == matrix.solve_exact(system)
+
+
+def test_rational_reconstruct():
+    modulus = 2 ** 61 - 1
+    value = 5 * pow(-7, -1, modulus) % modulus
+    assert matrix.rational_reconstruct(value, modulus) == Fraction(-5, 7)
+
+
+def test_solve_batch():
+    systems = [
+            [[1, 2, 5], [3, 4, 6]],
+            [[1, 2, 3], [2, 4, 6]],
+            [[0, 1, 2], [1, 0, 3]],
+            ]
+    assert matrix.solve_batch(systems) == [
+            [Fraction(-4), Fraction(9, 2)],
+            None,
+            [Fraction(3), Fraction(2)],
+            ]
+
+
+def test_iter_integer_solutions():
+    # x + y = 4, y + z = 3
+    system = [[1, 1, 0, 4], [0, 1, 1, 3]]
+    bounds = [(0, 10)] * 3
+    result = sorted(matrix.iter_integer_solutions(system, bounds))
+    assert result == [(1, 3, 0), (2, 2, 1), (3, 1, 2), (4, 0, 3)]
+    assert matrix.minimise_integer(system, bounds) == (4, (1, 3, 0))
+    assert matrix.minimise_integer(system, bounds, (1, 3, 1)) == (
+            7, (4, 0, 3))
+    assert matrix.minimise_integer(system, [(0, 1)] * 3) is None
@@ -0,0 +1,29 @@
+import time
+
+import profiler
+
+
+def busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_deterministic():
+    with profiler.DeterministicProfiler() as prof:
+        busy(0.01)
+    top = prof.get_top(5)
+    assert any('busy' in name for name, *_ in top)
+    assert all(len(row) == 4 for row in top)
+
+
+def test_sampling():
+    with profiler.SamplingProfiler(0.001) as prof:
+        busy(0.1)
+    assert prof.count > 0
+    assert sum(prof.samples.values()) == prof.count
+    lines = prof.get_collapsed()
+    assert any('busy (test_profiler.py' in line for line in lines)
+    stack, count = lines[0].rsplit(' ', 1)
+    assert int(count) > 0
+    assert stack.split(';')[-1].startswith('busy')
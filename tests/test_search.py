@@ -0,0 +1,113 @@
+import grid
+import search
+from util import BucketQueue
+
+
+# A small weighted graph, where the direct route from A to D is not the
+# cheapest.
+GRAPH = {
+        'A': (('B', 1), ('C', 4), ('D', 10)),
+        'B': (('C', 2), ('D', 6)),
+        'C': (('D', 2),),
+        'D': (),
+        }
+
+
+def get_line_neighbours(node: int) -> tuple:
+    return (node - 1, node + 1)
+
+
+def test_bfs():
+    dist = search.bfs(0, get_line_neighbours, goal=5)
+    assert dist[5] == 5
+    assert 6 not in dist
+    dist = search.bfs(0, get_line_neighbours, goal=lambda n: n < -2)
+    assert dist[-3] == 3
+
+
+def test_bidirectional_bfs():
+    stats = search.SearchStats()
+    assert search.bidirectional_bfs(
+            0, 40, get_line_neighbours, stats=stats) == 40
+    assert stats.expanded > 0
+    assert search.bidirectional_bfs(3, 3, get_line_neighbours) == 0
+
+    # In a directed graph, the backward search needs the reverse edges.
+    def forward(n):
+        return (n + 1,) if n < 10 else ()
+
+    def reverse(n):
+        return (n - 1,) if n > 0 else ()
+
+    assert search.bidirectional_bfs(0, 10, forward, reverse) == 10
+    assert search.bidirectional_bfs(10, 0, forward, reverse) is None
+
+
+def test_zero_one_bfs():
+    # Moving right is free, moving left costs one.
+    def get_neighbours(n):
+        return ((n + 1, 0), (n - 1, 1)) if -5 <= n <= 5 else ()
+
+    dist = search.zero_one_bfs(0, get_neighbours)
+    assert dist[5] == 0
+    assert dist[-5] == 5
+
+
+def test_find_path():
+    stats = search.SearchStats()
+    cost, path = search.find_path('A', 'D', GRAPH.get, stats=stats)
+    assert cost == 5
+    assert path == ['A', 'B', 'C', 'D']
+    assert stats.expanded == 3
+    assert stats.max_frontier >= 1
+    assert search.find_path('D', 'A', GRAPH.get) is None
+
+    dist, trace, end = search.dijkstra('A', GRAPH.get)
+    assert end is None
+    assert dist == {'A': 0, 'B': 1, 'C': 3, 'D': 5}
+
+
+def test_find_path_grid():
+    g = grid.SparseGrid().parse(['....', '.##.', '....', '.#..'])
+    table = g.get_neighbour_table()
+    start = table.to_index((0, 3))
+    end = table.to_index((3, 3))
+
+    def get_neighbours(n):
+        return [(x, 1) for x in table.neighbours[n]]
+
+    def heuristic(n):
+        return grid.get_distance(table.to_position(n), (3, 3))
+
+    cost, path = search.find_path(
+            start, end, get_neighbours, heuristic, queue=BucketQueue)
+    assert cost == 5
+    assert table.to_position(path[1]) == (0, 2)
+
+    dist = search.bfs(start, table.neighbours.__getitem__)
+    assert dist[end] == 5
+
+
+def test_csr_neighbours():
+    neighbours = search.get_csr_neighbours(
+            [0, 2, 3, 3], [1, 2, 2], [5, 1, 1])
+    assert neighbours(0) == ((1, 5), (2, 1))
+    assert search.find_path(0, 2, neighbours)[0] == 1
+    neighbours = search.get_csr_neighbours([0, 2, 3, 3], [1, 2, 2])
+    assert neighbours(1) == (2,)
+
+
+def test_find_all_paths():
+    # Two equally cheap routes from A to D, and a dearer one.
+    graph = {
+            'A': (('B', 1), ('C', 1), ('E', 1)),
+            'B': (('D', 1),),
+            'C': (('D', 1),),
+            'E': (('D', 5),),
+            'D': (),
+            }
+    cost, ends, predecessors = search.find_all_paths('A', 'D', graph.get)
+    assert cost == 2
+    assert ends == {'D'}
+    assert predecessors['D'] == {'B', 'C'}
+    assert search.get_path_nodes(predecessors, ends) == {'A', 'B', 'C', 'D'}
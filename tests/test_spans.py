@@ -19,3 +19,69 @@ def test_subtract_span():
 
 def test_subtract_spans():
     assert spans.subtract_spans((1, 7), {(1, 1), (3, 5)}) == {(2, 2), (6, 7)}
+
+
+def test_spanset_add_remove():
+    s = spans.SpanSet([(10, 12), (1, 3), (2, 5)])
+    assert s.spans == [(1, 5), (10, 12)]
+    s.add_span((7, 7))
+    assert s.spans == [(1, 5), (7, 7), (10, 12)]
+    s.add_span((6, 9))
+    assert s.spans == [(1, 12)]
+    s.add_span((20, 13))
+    assert s.spans == [(1, 20)]
+    s.remove_span((5, 8))
+    assert s.spans == [(1, 4), (9, 20)]
+    s.remove_span((0, 1))
+    s.remove_span((20, 30))
+    assert s.spans == [(2, 4), (9, 19)]
+    assert s.total == 14
+    assert 2 in s
+    assert not s.contains(5)
+    assert not s.contains(1)
+    assert s.contains_span((10, 19))
+    assert not s.contains_span((4, 9))
+    assert str(s) == '2-4, 9-19'
+
+
+def test_spanset_operations():
+    a = spans.SpanSet([(1, 5), (10, 15), (20, 20)])
+    b = spans.SpanSet([(4, 11), (14, 30)])
+    assert (a | b).spans == [(1, 30)]
+    assert (a & b).spans == [(4, 5), (10, 11), (14, 15), (20, 20)]
+    assert (a - b).spans == [(1, 3), (12, 13)]
+    assert (b - a).spans == [(6, 9), (16, 19), (21, 30)]
+    assert a.complement(0, 12).spans == [(0, 0), (6, 9)]
+    assert (a - spans.SpanSet()) == a
+    assert not spans.SpanSet() - a
+    assert (a & b).values == {4, 5, 10, 11, 14, 15, 20}
+
+
+def test_subtract_box():
+    a = ((1, 3), (1, 3))
+    assert spans.subtract_box(a, ((5, 6), (5, 6))) == [a]
+    assert spans.subtract_box(a, ((0, 4), (0, 4))) == []
+    pieces = spans.subtract_box(a, ((2, 2), (2, 2)))
+    assert len(pieces) == 4
+    assert sum(map(spans.get_box_volume, pieces)) == 8
+    assert spans.intersect_boxes(a, ((3, 9), (0, 1))) == ((3, 3), (1, 1))
+    assert spans.intersect_boxes(a, ((4, 9), (0, 1))) is None
+
+
+def test_boxset():
+    a = spans.BoxSet([((10, 12), (10, 12), (10, 12))])
+    assert a.volume == 27
+    a.add_box(((11, 13), (11, 13), (11, 13)))
+    assert a.volume == 27 + 19
+    a.remove_box(((9, 11), (9, 11), (9, 11)))
+    assert a.volume == 27 + 19 - 8
+    assert (10, 10, 10) not in a
+    assert (13, 13, 13) in a
+
+    # Huge extents don't cost any more than small ones.
+    big = spans.BoxSet([((0, 10 ** 9), (0, 10 ** 9), (5, 5), (5, 5))])
+    hole = spans.BoxSet([((1, 10 ** 9 - 1), (1, 10 ** 9 - 1), (5, 5), (5, 5))])
+    assert (big - hole).volume == 4 * 10 ** 9
+    assert (big & hole).volume == (10 ** 9 - 1) ** 2
+    assert (hole | big).volume == (10 ** 9 + 1) ** 2
+    assert not (hole - big)
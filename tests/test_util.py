@@ -26,3 +26,121 @@ def test_get_digits():
     assert util.get_digits(1) == (1,)
     assert util.get_digits(10) == (1, 0)
     assert util.get_digits(3548915) == (3, 5, 4, 8, 9, 1, 5)
+
+
+def test_timing_collector():
+    with util.collecting() as collector:
+        with util.timing("Part 1"):
+            with util.span("parse"):
+                pass
+            with util.span("solve"):
+                pass
+        with util.timing("Part 2"):
+            pass
+    assert util.get_collector() is None
+    assert [x[0] for x in collector.spans] == [
+            'Part 1', 'parse', 'solve', 'Part 2']
+    assert [x[3] for x in collector.spans] == [None, 0, 0, None]
+    assert [x[4] for x in collector.spans] == [0, 1, 1, 0]
+    assert set(collector.totals()) == {'Part 1', 'parse', 'solve', 'Part 2'}
+
+    spans = collector.to_json()
+    assert spans[1]['parent'] == 0
+    assert spans[1]['start'] >= spans[0]['start']
+    assert spans[0]['duration'] >= spans[1]['duration'] + spans[2]['duration']
+
+    events = collector.to_trace_events()['traceEvents']
+    assert [x['name'] for x in events] == ['Part 1', 'parse', 'solve', 'Part 2']
+    assert all(x['ph'] == 'X' for x in events)
+
+
+def test_span_disabled():
+    assert util.get_collector() is None
+    with util.span("anything") as result:
+        assert result is None
+
+
+def test_find_cycle():
+    # 3, 9, 27, 81, 43, 29, 87, 61, 83, 49, 47, 41, 23, 69, 7, 21, 63, 89...
+    def step(x):
+        return x * 3 % 100
+
+    assert util.find_cycle(3, step) == (0, 20)
+    assert util.find_cycle(3, step, limit=10) is None
+
+    # A tail of three states leading into a cycle of length four.
+    def step(x):
+        return x + 1 if x < 6 else 3
+
+    assert util.find_cycle(0, step) == (3, 4)
+
+
+def test_fast_forward():
+    def step(x):
+        return x + 1 if x < 6 else 3
+
+    for brent in (False, True):
+        assert util.fast_forward(0, step, 2, brent=brent) == 2
+        assert util.fast_forward(0, step, 10 ** 12, brent=brent) == 4
+        assert util.fast_forward(0, step, 10 ** 12 + 3, brent=brent) == 3
+
+    # The state may be modified in place, and compared by a compact key.
+    def step(state):
+        state[0] = (state[0] + 1) % 5
+        return state
+
+    assert util.fast_forward([0], step, 10 ** 9 + 3, key=tuple) == [3]
+
+
+def test_extrapolate():
+    # The position cycles with period 3, while the total keeps growing.
+    def step(state):
+        position, total = state
+        return ((position + 1) % 3, total + position)
+
+    def measure(state):
+        return state[1]
+
+    def key(state):
+        return state[0]
+
+    target = 10 ** 9 + 1
+    assert util.extrapolate((0, 0), step, target, measure, key) == 10 ** 9
+
+
+def test_priority_queue():
+    Node = util.Point
+    for q in (util.PriorityQueue(), util.BucketQueue()):
+        q.push(Node(0, 0), 5)
+        q.push(Node(1, 2), 3)
+        q.push(Node(2, 1), 7)
+        assert len(q) == 3
+        assert Node(1, 2) in q
+        assert q.has_position((2, 1))
+        assert not q.has_position((3, 3))
+
+        q.set_priority(Node(2, 1), 1)
+        q.set_priority(Node(1, 2), 6)
+        assert len(q) == 3
+        assert q.get_priority(Node(1, 2)) == 6
+        assert q.pop() == (1, Node(2, 1))
+        assert not q.has_position((2, 1))
+        assert q.pop() == (5, Node(0, 0))
+        q.push(Node(3, 3), 2)
+        assert q.pop() == (2, Node(3, 3))
+        assert q.pop() == (6, Node(1, 2))
+        assert not q
+        try:
+            q.pop()
+            assert False, "Expected KeyError"
+        except KeyError:
+            pass
+
+
+def test_priority_queue_ties():
+    # Nodes with equal priority are never compared to each other.
+    q = util.PriorityQueue()
+    q.push(2j, 1)
+    q.push(1j, 1)
+    assert q.pop() == (1, 2j)
+    assert q.pop() == (1, 1j)
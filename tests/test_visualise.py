@@ -0,0 +1,124 @@
+from PIL import Image, ImageFont, ImageSequence
+
+import visualise
+
+
+def make_animation() -> visualise.Animation:
+    anim = visualise.Animation((20, 10), 10, '#102030')
+    image = Image.new('RGBA', (4, 4), '#ff0000')
+    sprite = visualise.Sprite(image, (0, 0), stop=12)
+    sprite.add_movement(2, 4, (0, 0), (10, 3))
+    anim.add_element(sprite)
+    return anim
+
+
+def make_busy_animation() -> visualise.Animation:
+    anim = visualise.Animation((40, 30), 10, '#000000')
+    solid = Image.new('RGB', (6, 6), '#00ff00')
+    clear = Image.new('RGBA', (5, 5), (0, 0, 255, 128))
+    for i in range(8):
+        sprite = visualise.Sprite(
+                solid if i % 2 else clear, (i * 5 - 3, i * 3),
+                start=i * 3, stop=i * 3 + 20, fade_in=4, fade_out=3)
+        if i % 3 == 0:
+            sprite.final_status = visualise.Status.PERMANENT
+        sprite.add_movement(i * 3 + 2, 6, (i * 5 - 3, i * 3), (12, -4))
+        anim.add_element(sprite)
+    return anim
+
+
+def get_ticks(anim: visualise.Animation) -> list:
+    result = []
+    t = 0
+    while anim.elements:
+        result.append(anim.render_frame(t).convert('RGB').tobytes())
+        t += 1
+    return result
+
+
+def read_ticks(filename: str) -> list:
+    result = []
+    with Image.open(filename) as im:
+        for frame in ImageSequence.Iterator(im):
+            ticks = round(frame.info['duration'] / 100)
+            result.extend([frame.convert('RGB').tobytes()] * ticks)
+    return result
+
+
+class ListWriter(visualise.FrameWriter):
+    def __init__(self):
+        super().__init__('', 10)
+        self.encoded = []
+
+    def encode(self, frame, ticks):
+        self.encoded.append((frame.getpixel((0, 0)), ticks))
+
+
+def test_frame_hold():
+    writer = ListWriter()
+    red = Image.new('RGB', (2, 2), '#ff0000')
+    blue = Image.new('RGB', (2, 2), '#0000ff')
+    with writer:
+        for frame in (red, red, red, blue, red, red):
+            writer.write(frame)
+        assert writer.encoded == [((255, 0, 0), 3), ((0, 0, 255), 1)]
+    assert writer.encoded[-1] == ((255, 0, 0), 2)
+    assert writer.frames == 3
+
+
+def test_render_gif(tmp_path):
+    expected = get_ticks(make_animation())
+    filename = str(tmp_path / 'anim.gif')
+    first = make_animation().render(filename)
+    assert first.size == (20, 10)
+    assert read_ticks(filename) == expected
+    with Image.open(filename) as im:
+        assert im.n_frames == 6
+
+
+def test_render_apng(tmp_path):
+    expected = get_ticks(make_animation())
+    filename = str(tmp_path / 'anim.png')
+    make_animation().render(filename)
+    assert read_ticks(filename) == expected
+
+
+def test_incremental_frames():
+    anim = make_busy_animation()
+    full = make_busy_animation()
+    full.incremental = False
+    assert get_ticks(anim) == get_ticks(full)
+
+
+def test_render_parallel(monkeypatch):
+    monkeypatch.setattr(visualise, 'CHUNK_SECONDS', 1)
+    serial = ListWriter()
+    first = make_busy_animation().render('', writer=serial)
+    anim = make_busy_animation()
+    parallel = ListWriter()
+    assert anim.render('', writer=parallel, workers=2) == first
+    assert parallel.encoded == serial.encoded
+    assert parallel.frames == serial.frames
+    assert not anim.elements
+
+
+def test_variant_cache():
+    image = Image.new('RGBA', (4, 4), (255, 0, 0, 200))
+    sprite = visualise.Sprite(image, (0, 0), start=0, stop=10, fade_in=4)
+    canvas = Image.new('RGBA', (8, 8))
+    _, (first, _) = sprite.get_layer(canvas, 1)
+    _, (again, _) = sprite.get_layer(canvas, 1)
+    _, (solid, _) = sprite.get_layer(canvas, 6)
+    assert first is again
+    assert solid is not first
+    assert first.getpixel((0, 0))[3] < solid.getpixel((0, 0))[3] == 200
+    assert image.getpixel((0, 0)) == (255, 0, 0, 200)
+
+
+def test_text_raster_cache():
+    text = visualise.Text(
+            ImageFont.load_default(), (30, 12), 'abc', position=(0, 0))
+    raster = text.get_raster()
+    assert text.get_raster() is raster
+    text.text = 'xyz'
+    assert text.get_raster() is not raster
@@ -1,12 +1,16 @@
 import heapq
+import json
 import logging
 import math
+import os
+import threading
 import time
-from collections import namedtuple
+from collections import Counter, namedtuple
 from contextlib import contextmanager
 from enum import Enum, auto
 from fractions import Fraction
 from functools import total_ordering
+from itertools import count
 
 try:
     import numba
@@ -19,9 +23,169 @@ except ImportError:
         return dec
 
 
+class TimingCollector:
+    """A collector of nested timing spans.
+
+    Each span is stored as a list of [name, start, end, parent, depth,
+    thread], where `start` and `end` are `time.perf_counter_ns` values, and
+    `parent` is the index of the enclosing span in the same thread (or None).
+
+    Spans are opened by `timing` and `span` blocks while this collector is the
+    active one (see `collecting`).
+    """
+    def __init__(self):
+        self.spans = []
+        self.stacks = {}
+        self.origin = time.perf_counter_ns()
+
+    def begin(self, name: str, start: int | None = None) -> int:
+        if start is None:
+            start = time.perf_counter_ns()
+        thread = threading.get_ident()
+        stack = self.stacks.setdefault(thread, [])
+        parent = stack[-1] if stack else None
+        index = len(self.spans)
+        self.spans.append([name, start, None, parent, len(stack), thread])
+        stack.append(index)
+        return index
+
+    def end(self, index: int, end: int | None = None):
+        if end is None:
+            end = time.perf_counter_ns()
+        span = self.spans[index]
+        span[2] = end
+        stack = self.stacks[span[5]]
+        # Tolerate spans being closed out of order by unwinding to this one.
+        while stack and stack.pop() != index:
+            pass
+
+    def clear(self):
+        self.spans.clear()
+        self.stacks.clear()
+        self.origin = time.perf_counter_ns()
+
+    def totals(self) -> dict:
+        """Return the total nanoseconds spent in finished spans, by name."""
+        result = {}
+        for name, start, end, *_ in self.spans:
+            if end is not None:
+                result[name] = result.get(name, 0) + end - start
+        return result
+
+    def to_json(self) -> list:
+        """Return the finished spans as a list of JSON-compatible dicts.
+
+        Times are in nanoseconds, relative to the creation of the collector.
+        """
+        return [
+                {
+                    'name': name,
+                    'start': start - self.origin,
+                    'duration': end - start,
+                    'parent': parent,
+                    'depth': depth,
+                    'thread': thread,
+                    }
+                for name, start, end, parent, depth, thread in self.spans
+                if end is not None]
+
+    def to_trace_events(self) -> dict:
+        """Return the finished spans in Chrome trace-event format.
+
+        The result can be saved as JSON and loaded into a trace viewer such
+        as Perfetto or chrome://tracing to display it as a flame chart.
+        """
+        pid = os.getpid()
+        events = [
+                {
+                    'name': name or '',
+                    'cat': 'timing',
+                    'ph': 'X',
+                    'ts': (start - self.origin) / 1000,
+                    'dur': (end - start) / 1000,
+                    'pid': pid,
+                    'tid': thread,
+                    }
+                for name, start, end, _, _, thread in self.spans
+                if end is not None]
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def write_json(self, filename: str):
+        with open(filename, 'w') as fp:
+            json.dump(self.to_json(), fp, indent=1)
+
+    def write_trace(self, filename: str):
+        with open(filename, 'w') as fp:
+            json.dump(self.to_trace_events(), fp)
+
+
+class _Span:
+    __slots__ = ('collector', 'name', 'index')
+
+    def __init__(self, collector: TimingCollector, name: str):
+        self.collector = collector
+        self.name = name
+
+    def __enter__(self):
+        self.index = self.collector.begin(self.name)
+
+    def __exit__(self, *args):
+        self.collector.end(self.index)
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *args):
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+_collector = None
+
+
+def get_collector() -> TimingCollector | None:
+    """Return the active process-wide TimingCollector, if there is one."""
+    return _collector
+
+
+@contextmanager
+def collecting(collector: TimingCollector | None = None) -> TimingCollector:
+    """Collect the spans from every `timing` and `span` block in this context.
+
+    Make `collector` (or a new TimingCollector) the process-wide active
+    collector, and yield it. The previously active collector, if any, is
+    restored afterwards.
+    """
+    global _collector
+    previous = _collector
+    _collector = collector if collector is not None else TimingCollector()
+    try:
+        yield _collector
+    finally:
+        _collector = previous
+
+
+def span(name: str):
+    """Return a context manager that records a silent timing span.
+
+    Unlike `timing`, this doesn't log anything. When no collector is active
+    it does nothing at all, so it is cheap enough to wrap around hot code.
+    """
+    if _collector is None:
+        return _NULL_SPAN
+    return _Span(_collector, name)
+
+
 @contextmanager
 def timing(message: str = None) -> int:
     start = time.perf_counter_ns()
+    collector = _collector
+    if collector is not None:
+        index = collector.begin(message, start)
     if message:
         logging.info(f"[.........] :play_button: [green]START[/] {message}")
     try:
@@ -29,6 +193,8 @@ def timing(message: str = None) -> int:
     finally:
         end = time.perf_counter_ns()
         dur = end - start
+        if collector is not None:
+            collector.end(index, end)
         micros = dur // 1000
         if micros < 10_000_000:
             t = f'{micros:,d}'
@@ -107,41 +273,140 @@ def get_euclidean_distance(a: tuple[int], b: tuple[int]) -> float:
     return math.sqrt(sum((a[i] - b[i]) ** 2 for i in range(len(a))))
 
 
+# Marks a priority queue entry that has been superseded.
+_REMOVED = object()
+
+
 class PriorityQueue:
+    """A min-priority queue of nodes, where the priority of a node can change.
+
+    This is a binary heap of [priority, counter, node] entries, with an index
+    from each node to its current entry. Changing the priority of a node
+    marks its old entry as removed and pushes a new one, so `set_priority`
+    and `pop` are both O(log n). The removed entries are discarded when they
+    reach the top of the heap.
+
+    Nodes with equal priority come out in the order their priority was last
+    set, so the nodes themselves never need to be comparable.
+    """
     def __init__(self):
         self.queue = []
         self.finder = {}
-        self.deleted = set()
+        self.counter = count()
+        # Index of (y, x) node positions for `has_position`, built on demand.
+        self.positions = None
 
     def __len__(self):
-        return len(self.queue)
+        return len(self.finder)
 
     def __bool__(self):
         return bool(self.finder)
 
+    def __contains__(self, node):
+        return node in self.finder
+
     def push(self, node, priority):
-        entry = (priority, node)
-        heapq.heappush(self.queue, entry)
-        self.finder[node] = entry
+        self.set_priority(node, priority)
 
     def has_node(self, node):
         return node in self.finder
 
     def has_position(self, position):
-        return position in {(n.y, n.x) for n in self.finder.keys()}
+        if self.positions is None:
+            self.positions = Counter((n.y, n.x) for n in self.finder)
+        return self.positions.get(position, 0) > 0
+
+    def get_priority(self, node):
+        return self.finder[node][0]
 
     def set_priority(self, node, priority):
-        if node in self.finder:
-            self.deleted.add(id(self.finder[node]))
-        self.push(node, priority)
+        entry = [priority, next(self.counter), node]
+        old = self.finder.get(node)
+        if old is None:
+            if self.positions is not None:
+                self.positions[(node.y, node.x)] += 1
+        else:
+            old[2] = _REMOVED
+        self.finder[node] = entry
+        heapq.heappush(self.queue, entry)
 
     def pop(self):
-        while self.queue:
-            entry = heapq.heappop(self.queue)
-            if id(entry) not in self.deleted:
-                del self.finder[entry[1]]
-                return entry
-            self.deleted.discard(id(entry))
+        queue = self.queue
+        while queue:
+            priority, _, node = heapq.heappop(queue)
+            if node is not _REMOVED:
+                del self.finder[node]
+                if self.positions is not None:
+                    self.positions[(node.y, node.x)] -= 1
+                return (priority, node)
+        raise KeyError('Cannot pop from empty priority queue')
+
+
+class BucketQueue:
+    """A priority queue for nodes with small, non-negative integer priorities.
+
+    This has the same interface as `PriorityQueue`, but keeps a bucket of
+    nodes for each priority, and pops from the lowest non-empty bucket. That
+    makes every operation O(1) apart from skipping over empty buckets, which
+    costs O(C) in total where C is the highest priority. It suits Dijkstra's
+    algorithm and A* on grids, where the step costs are small integers.
+
+    Changing the priority of a node leaves a stale copy in its old bucket,
+    which is skipped when it is reached.
+    """
+    def __init__(self):
+        self.buckets = []
+        self.priorities = {}
+        self.current = 0
+        self.positions = None
+
+    def __len__(self):
+        return len(self.priorities)
+
+    def __bool__(self):
+        return bool(self.priorities)
+
+    def __contains__(self, node):
+        return node in self.priorities
+
+    def push(self, node, priority: int):
+        self.set_priority(node, priority)
+
+    def has_node(self, node):
+        return node in self.priorities
+
+    def has_position(self, position):
+        if self.positions is None:
+            self.positions = Counter((n.y, n.x) for n in self.priorities)
+        return self.positions.get(position, 0) > 0
+
+    def get_priority(self, node) -> int:
+        return self.priorities[node]
+
+    def set_priority(self, node, priority: int):
+        buckets = self.buckets
+        if priority >= len(buckets):
+            buckets.extend([] for _ in range(priority + 1 - len(buckets)))
+        buckets[priority].append(node)
+        if priority < self.current:
+            self.current = priority
+        if node not in self.priorities and self.positions is not None:
+            self.positions[(node.y, node.x)] += 1
+        self.priorities[node] = priority
+
+    def pop(self):
+        buckets = self.buckets
+        priorities = self.priorities
+        while self.current < len(buckets):
+            bucket = buckets[self.current]
+            while bucket:
+                node = bucket.pop()
+                if priorities.get(node) == self.current:
+                    del priorities[node]
+                    if self.positions is not None:
+                        self.positions[(node.y, node.x)] -= 1
+                    return (self.current, node)
+            self.current += 1
         raise KeyError('Cannot pop from empty priority queue')
 
 
@@ -183,3 +448,108 @@ def is_integer(value) -> bool:
         # order to support 3.10 and 3.11, we'll just check the denominator
         # instead.
         return value.denominator == 1
+
+
+Cycle = namedtuple('cycle', ['start', 'period'])
+
+
+def identity(value):
+    return value
+
+
+def find_cycle(
+        initial, step, key=identity, limit: int | None = None) -> Cycle | None:
+    """Find the cycle in the states reached by repeatedly applying `step`.
+
+    Uses Brent's algorithm, which holds only a couple of states and keys at a
+    time, however long it takes to find the cycle. Each state is compared by
+    its `key`, which should be something compact and cheap to compare, like
+    bytes or an int. Since the states are generated twice over, `step` must
+    return a new state rather than modify its argument.
+
+    Return a Cycle giving the number of steps before the first state in the
+    cycle, and the length of the cycle. If `limit` is given and no cycle is
+    found within that many steps, return None.
+    """
+    power = period = 1
+    tortoise = key(initial)
+    hare = step(initial)
+    steps = 1
+    while (hare_key := key(hare)) != tortoise:
+        if limit is not None and steps >= limit:
+            return None
+        if power == period:
+            tortoise = hare_key
+            power *= 2
+            period = 0
+        hare = step(hare)
+        period += 1
+        steps += 1
+
+    # Start a tortoise and a hare one period apart, and see where they meet.
+    tortoise = hare = initial
+    for _ in range(period):
+        hare = step(hare)
+    start = 0
+    while key(tortoise) != key(hare):
+        tortoise = step(tortoise)
+        hare = step(hare)
+        start += 1
+    return Cycle(start, period)
+
+
+def fast_forward(initial, step, target: int, key=identity, brent=False):
+    """Return the state after applying `step` to `initial` `target` times.
+
+    Once a state repeats, the remaining whole cycles are skipped. By default,
+    the key of every state seen is kept in a dict until a repeat is found,
+    but never the states themselves, so `step` may modify the state in place
+    and return it. If `brent` is true, use `find_cycle` instead, which holds
+    no history at all, but requires a `step` that returns new states.
+    """
+    if brent:
+        cycle = find_cycle(initial, step, key, target)
+        if cycle is not None and target > cycle.start:
+            target = cycle.start + (target - cycle.start) % cycle.period
+        state = initial
+        for _ in range(target):
+            state = step(state)
+        return state
+
+    seen = {}
+    state = initial
+    for i in range(target):
+        k = key(state)
+        if k in seen:
+            for _ in range((target - i) % (i - seen[k])):
+                state = step(state)
+            return state
+        seen[k] = i
+        state = step(state)
+    return state
+
+
+def extrapolate(initial, step, target: int, measure, key=identity):
+    """Return `measure` of the state after `target` applications of `step`.
+
+    Like `fast_forward`, but for when part of the state keeps changing even
+    though the rest of it cycles, like a tower that grows by the same amount
+    every cycle. The `key` should leave that part out, and `measure` returns
+    it. It is assumed to change by the same amount on every cycle, so the
+    answer is the measure at the equivalent point in the first cycle, plus
+    that change for each cycle skipped.
+    """
+    seen = {}
+    state = initial
+    for i in range(target):
+        k = key(state)
+        value = measure(state)
+        if k in seen:
+            first, first_value = seen[k]
+            cycles, remain = divmod(target - i, i - first)
+            for _ in range(remain):
+                state = step(state)
+            return measure(state) + cycles * (value - first_value)
+        seen[k] = (i, value)
+        state = step(state)
+    return measure(state)
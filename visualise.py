@@ -1,18 +1,61 @@
 """visualise.py
 
 Utility module for building animated visualisations.
+
+An `Animation` is a collection of `Element`s, each of which knows how to draw
+itself on a canvas at a given time. Rendering the animation draws one frame
+per tick, and hands each frame to a `FrameWriter` as soon as it is drawn, so
+that only the latest frame is held in memory, no matter how long the
+animation runs. The writer is chosen by the extension of the output file:
+
+- '.gif' files are written by `GifWriter`,
+- '.png' and '.apng' files by `ApngWriter`,
+- video files like '.mp4' by `FFmpegWriter`, which pipes raw frames into
+  ffmpeg, if it is installed.
+
+Each writer holds on to the latest frame until a different one arrives, and
+then writes it once, shown for as long as all of its identical frames.
+
+Elements describe each frame as a layer, an image and the position to draw it
+at. Faded and cropped variants of an element's image are cached, and so is
+the text drawn by a `Text` element, so an element that isn't changing gives
+back the same layer. Each frame is drawn over the previous one, and only the
+boxes where some layer has changed are drawn again.
+
+Long animations can be rendered by several worker processes at once, each
+drawing its own chunk of frames from a copy of the animation, which are then
+written in order.
 """
 import bisect
+import io
 import logging  # noqa: F401
+import multiprocessing
+import os
+import pickle
+import shutil
+import struct
+import subprocess
+import zlib
 from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from enum import Enum
 from operator import add, sub
 
-from PIL import Image, ImageDraw, ImageFont
+from PIL import GifImagePlugin, Image, ImageChops, ImageDraw, ImageFont
 
 from util import INF
 
 
+# Element alpha values are quantised to this many levels
+ALPHA_LEVELS = 255
+ALPHA_TABLES = [
+        [round(level * x / ALPHA_LEVELS) for x in range(256)]
+        for level in range(ALPHA_LEVELS + 1)]
+VARIANT_CACHE_SIZE = 64
+# Seconds of animation in each chunk rendered by a worker process
+CHUNK_SECONDS = 2
+
+
 def ease_cubic_out(time: float) -> float:
     return 1 - ((1 - time) ** 3)
 
@@ -64,6 +107,8 @@ class Element:
         self.crops = OrderedDict()
         self.fade_in = fade_in
         self.fade_out = fade_out
+        self.variants = OrderedDict()
+        self.variant_source = None
 
     def add_fade(self, start, duration, initial, final, easing=None):
         transition = (start, duration, initial, final, easing)
@@ -84,6 +129,14 @@ class Element:
         self.crops[start] = transition
         return transition
 
+    def __getstate__(self):
+        # The cached variants are rebuilt on demand, so leave them out of
+        # copies sent to worker processes.
+        state = self.__dict__.copy()
+        state['variants'] = OrderedDict()
+        state['variant_source'] = None
+        return state
+
     def get_coordinates(self, position):
         """Translate a position into image pixel coordinates.
 
@@ -180,9 +233,88 @@ class Element:
         result = tuple(map(round, coords))
         return result
 
-    def render(self, canvas, time):
+    def get_layer(self, canvas, time) -> tuple:
+        """Return what this element looks like at `time`.
+
+        The result is a tuple of (status, layer), where `layer` is either
+        None, if nothing is drawn, or a tuple of (image, position) to be
+        alpha composited on to the canvas. The image must not be modified
+        afterwards, so that `Animation` can tell whether the element has
+        changed since the last frame just by checking whether it got the
+        same image object, at the same position.
+
+        Inheriting classes can either implement this method, or override
+        `render` instead, but then every frame has to be drawn from scratch.
+        """
         raise NotImplementedError()
 
+    def render(self, canvas, time) -> Status:
+        status, layer = self.get_layer(canvas, time)
+        if layer is not None:
+            image, position = layer
+            composite(canvas, image, position)
+        return status
+
+    def get_variant(self, image, crop, alpha):
+        """Return `image`, cropped to `crop` and faded by `alpha`.
+
+        The alpha is quantised to one of ALPHA_LEVELS levels, and the
+        variants are cached by crop box and alpha level, so that a still or
+        steadily fading element doesn't rebuild its image on every frame. The
+        cache is cleared if it is asked for the variants of a different
+        image.
+        """
+        if self.variant_source is not image:
+            self.variants.clear()
+            self.variant_source = image
+        if alpha is None:
+            level = ALPHA_LEVELS
+        else:
+            level = min(max(round(alpha * ALPHA_LEVELS), 0), ALPHA_LEVELS)
+        key = (crop, level)
+        result = self.variants.get(key)
+        if result is not None:
+            self.variants.move_to_end(key)
+            return result
+
+        result = image if image.mode == 'RGBA' else image.convert('RGBA')
+        if crop is not None:
+            result = result.crop(crop)
+        if level < ALPHA_LEVELS:
+            result = result.copy()  # Avoid modifying the original image
+            mask = result.getchannel('A')
+            result.putalpha(mask.point(ALPHA_TABLES[level]))
+        elif result is image:
+            result = result.copy()
+        self.variants[key] = result
+        if len(self.variants) > VARIANT_CACHE_SIZE:
+            self.variants.popitem(last=False)
+        return result
+
+    def get_status(self, time) -> Status | None:
+        """Return the status of this element at `time`.
+
+        Return None if the element shouldn't be drawn at `time`.
+        """
+        if self.start is not None and time < self.start:
+            # Not ready to be displayed yet
+            return None
+
+        if self.stop is not None and time > self.stop:
+            # Finished displaying
+            return self.final_status
+        return Status.ACTIVE
+
+    def get_end(self, start: int = 0) -> float:
+        """Return the time of the last frame that this element is part of.
+
+        The element is removed from the animation after the first frame
+        past its `stop` time, or never, if it has no `stop` time.
+        """
+        if self.stop is None:
+            return INF
+        return max(start, self.stop + 1)
+
 
 class Sprite(Element):
     def __init__(self, image, *args, **kwargs):
@@ -192,52 +324,21 @@ class Sprite(Element):
         else:
             self.image = Image.open(image)
 
-    def render(self, canvas, time) -> Status:
-        status = Status.ACTIVE
-        if self.start is not None and time < self.start:
-            # Not ready to be displayed yet
-            return status
-
-        if self.stop is not None and time > self.stop:
-            # Finished displaying
-            status = self.final_status
-            if status == Status.EXTINCT:
-                return status
+    def get_layer(self, canvas, time) -> tuple:
+        status = self.get_status(time)
+        if status is None:
+            return Status.ACTIVE, None
+        if status == Status.EXTINCT:
+            return status, None
 
         position = self.get_position(canvas, time)
-        image = self.image.copy()  # Avoid modifying the original sprite
         crop = self.get_crop(time)
         if crop is not None:
-            image = image.crop(crop)
             left, top = crop[:2]
             x, y = position
             position = (x + left, y + top)
-
-        alpha = self.get_alpha(time)
-        if alpha is None and not image.has_transparency_data:
-            canvas.paste(image, position)
-            return status
-
-        if alpha is None:
-            alpha = 1.0
-        if not image.has_transparency_data:
-            # Just apply the transparency as a static value to the entire image
-            image.putalpha(round(255 * alpha))
-            canvas.alpha_composite(image, position)
-            return status
-
-        # If we've arrived here, then the sprite has its own transparency
-        # channel, which we need to scale according to the alpha value to get
-        # the new alpha channel.  This will only work with images that have a
-        # channel named 'A', so pretty much only 'RGBA' or 'LA' image modes.
-        mask = image.getchannel('A')
-        data = list(mask.getdata())
-        data = [round(alpha * x) for x in data]
-
-        mask.putdata(data)
-        image.putalpha(mask)
-        canvas.alpha_composite(image, position)
-        return status
+        image = self.get_variant(self.image, crop, self.get_alpha(time))
+        return status, (image, position)
 
 
 class Text(Element):
@@ -255,54 +356,117 @@ class Text(Element):
         self.colour = colour
         self.align = align
         self.spacing = spacing
+        self.raster = None
+        self.raster_key = None
 
-    def render(self, canvas, time) -> Status:
-        status = Status.ACTIVE
-        if self.start is not None and time < self.start:
-            # Not ready to be displayed yet
-            return status
+    def __getstate__(self):
+        state = super().__getstate__()
+        state['raster'] = None
+        state['raster_key'] = None
+        return state
 
-        if self.stop is not None and time > self.stop:
-            # Finished displaying
-            status = self.final_status
-            if status == Status.EXTINCT:
-                return status
-
-        image = Image.new('RGBA', self.size)
-        draw = ImageDraw.Draw(image)
-        draw.text(
-                xy=(0, 0),
-                text=self.text,
-                fill=self.colour,
-                font=self.font,
-                align=self.align,
-                spacing=self.spacing)
+    def get_raster(self) -> Image.Image:
+        """Return the text drawn on a transparent image.
 
-        crop = self.get_crop(time)
-        if crop is not None:
-            image = image.crop(crop)
+        The image is only drawn again when the text or its style changes.
+        """
+        key = (
+                self.text, self.colour, self.align, self.spacing,
+                tuple(self.size), id(self.font))
+        if key != self.raster_key:
+            image = Image.new('RGBA', self.size)
+            draw = ImageDraw.Draw(image)
+            draw.text(
+                    xy=(0, 0),
+                    text=self.text,
+                    fill=self.colour,
+                    font=self.font,
+                    align=self.align,
+                    spacing=self.spacing)
+            self.raster = image
+            self.raster_key = key
+        return self.raster
+
+    def get_layer(self, canvas, time) -> tuple:
+        status = self.get_status(time)
+        if status is None:
+            return Status.ACTIVE, None
+        if status == Status.EXTINCT:
+            return status, None
 
+        crop = self.get_crop(time)
         position = self.get_position(canvas, time)
-        alpha = self.get_alpha(time)
+        image = self.get_variant(self.get_raster(), crop, self.get_alpha(time))
+        return status, (image, position)
 
-        if alpha is None:
-            alpha = 1.0
 
-        mask = image.getchannel('A')
-        data = list(mask.getdata())
-        data = [round(alpha * x) for x in data]
+def composite(canvas, image, position, origin=(0, 0)):
+    """Alpha composite `image` on to `canvas` at `position`.
 
-        mask.putdata(data)
-        image.putalpha(mask)
-        canvas.alpha_composite(image, position)
-        return status
+    The position is relative to `origin`, which is where the top-left corner
+    of the canvas sits in the frame. Any part of the image that falls outside
+    of the canvas is clipped.
+    """
+    x = position[0] - origin[0]
+    y = position[1] - origin[1]
+    left = max(0, -x)
+    top = max(0, -y)
+    right = min(image.width, canvas.width - x)
+    bottom = min(image.height, canvas.height - y)
+    if right <= left or bottom <= top:
+        return
+    canvas.alpha_composite(
+            image, (x + left, y + top), (left, top, right, bottom))
+
+
+def get_layer_box(layer, size) -> tuple | None:
+    """Return the box of the frame covered by `layer`, or None if none is."""
+    image, (x, y) = layer
+    width, height = size
+    box = (
+            max(x, 0), max(y, 0),
+            min(x + image.width, width), min(y + image.height, height))
+    if box[2] <= box[0] or box[3] <= box[1]:
+        return None
+    return box
+
+
+def merge_boxes(boxes) -> list:
+    """Merge overlapping boxes, until none of the results overlap."""
+    result = []
+    for box in boxes:
+        while True:
+            for i, other in enumerate(result):
+                if (
+                        box[0] < other[2] and other[0] < box[2] and
+                        box[1] < other[3] and other[1] < box[3]):
+                    box = (
+                            min(box[0], other[0]), min(box[1], other[1]),
+                            max(box[2], other[2]), max(box[3], other[3]))
+                    del result[i]
+                    break
+            else:
+                break
+        result.append(box)
+    return result
 
 
 class Animation:
+    """A collection of animated elements, which can be rendered to a file.
+
+    Each frame is drawn by compositing the elements, in order, over the
+    background. Unless `incremental` is set to False, only the parts of the
+    frame where some element has changed since the last frame are drawn
+    again. An element has changed if it gives a different image or position
+    for its layer (see `Element.get_layer`), or has been added or removed.
+    """
     def __init__(self, size, rate, background):
         self.width, self.height = size
         self.rate = rate
         self.elements = []
+        self.incremental = True
+        self.previous = None
+        self.layers = {}
 
         if isinstance(background, Image.Image):
             self.background = background
@@ -317,7 +481,8 @@ class Animation:
         for arg in args:
             self.elements.append(arg)
 
-    def render_frame(self, time):
+    def render_frame_full(self, time):
+        """Draw a frame from scratch, by rendering every element."""
         im = self.background.copy()
         delete = set()
         for i, element in enumerate(self.elements):
@@ -332,18 +497,444 @@ class Animation:
             self.elements = [
                     x for i, x in enumerate(self.elements)
                     if i not in delete]
+        self.previous = None
+        self.layers = {}
+        return im
+
+    def get_dirty_boxes(self, layers: dict) -> list:
+        """Return the boxes of the frame that have changed since the last.
+
+        `layers` maps the id of each element to a tuple of (element, image,
+        position, box) for the new frame. The previous frame's layers hold
+        references to their elements and images, so that their ids can't be
+        reused while they are being compared.
+        """
+        boxes = []
+        for key in self.layers.keys() | layers.keys():
+            old = self.layers.get(key)
+            new = layers.get(key)
+            if (
+                    old is not None and new is not None and
+                    old[1] is new[1] and old[2] == new[2]):
+                continue
+            for layer in (old, new):
+                if layer is not None and layer[3] is not None:
+                    boxes.append(layer[3])
+        return merge_boxes(boxes)
+
+    def render_frame(self, time):
+        """Draw the frame at `time`, and return it.
+
+        The frame is drawn over a copy of the previous one, redrawing only
+        the dirty boxes, unless they cover more than half of the frame. The
+        returned image is kept as the previous frame, so don't modify it.
+        Elements that override `render` instead of implementing `get_layer`
+        are always drawn from scratch.
+        """
+        if not self.incremental or any(
+                type(x).render is not Element.render for x in self.elements):
+            return self.render_frame_full(time)
+        try:
+            results = [
+                    (element, *element.get_layer(self.background, time))
+                    for element in self.elements]
+        except NotImplementedError:
+            return self.render_frame_full(time)
+
+        size = (self.width, self.height)
+        layers = {}
+        for element, _, layer in results:
+            if layer is not None:
+                layers[id(element)] = (
+                        element, *layer, get_layer_box(layer, size))
+
+        boxes = None
+        if self.previous is not None:
+            boxes = self.get_dirty_boxes(layers)
+            area = sum((b[2] - b[0]) * (b[3] - b[1]) for b in boxes)
+            if area * 2 > self.width * self.height:
+                boxes = None
+
+        if boxes is None:
+            im = self.background.copy()
+            for element, image, position, box in layers.values():
+                composite(im, image, position)
+        else:
+            im = self.previous.copy()
+            for box in boxes:
+                region = self.background.crop(box)
+                for element, image, position, other in layers.values():
+                    if (
+                            other is not None and
+                            box[0] < other[2] and other[0] < box[2] and
+                            box[1] < other[3] and other[1] < box[3]):
+                        composite(region, image, position, box[:2])
+                im.paste(region, box[:2])
+
+        keep = []
+        for element, status, layer in results:
+            if status == Status.ACTIVE:
+                keep.append(element)
+            elif status == Status.PERMANENT and layer is not None:
+                composite(self.background, *layer)
+        self.elements = keep
+        self.previous = im
+        self.layers = layers
         return im
 
-    def render(self, filename: str, start: int = 0, stop: int = INF):
-        frames = []
-        t = start
-        while self.elements and t <= stop:
-            frame = self.render_frame(t)
-            frames.append(frame)
-            t += 1
-        initial = frames[0]
-        duration = 1000 / self.rate  # milliseconds
-        initial.save(
-                filename, save_all=True, append_images=frames[1:],
-                duration=duration)
+    def get_end(self, start: int = 0, stop: int = INF) -> float:
+        """Return the time of the last frame to render, from `start`.
+
+        Rendering stops after `stop`, or once there are no elements left.
+        """
+        end = max((x.get_end(start) for x in self.elements), default=-1)
+        return min(end, stop)
+
+    def seek(self, start: int, time: int):
+        """Skip ahead from `start` to just before the frame at `time`.
+
+        This brings the elements and background to the same state as if
+        every frame from `start` up to `time` had been rendered, without
+        drawing any of them. Permanent elements are drawn into the
+        background, in the same order that rendering would have done.
+        """
+        burn = []
+        keep = []
+        for i, element in enumerate(self.elements):
+            end = element.get_end(start)
+            if end >= time:
+                keep.append(element)
+            elif element.final_status == Status.PERMANENT:
+                burn.append((end, i, element))
+        burn.sort(key=lambda x: x[:2])
+        for end, _, element in burn:
+            element.render(self.background, end)
+        self.elements = keep
+        self.previous = None
+        self.layers = {}
+
+    def render_runs(self, start: int, stop: int, seek: int) -> list:
+        """Render the frames from `seek` to `stop`, having started at `start`.
+
+        Return a list of (data, ticks) for each run of identical frames,
+        where `data` is the raw RGBA bytes of the frame.
+        """
+        self.seek(start, seek)
+        result = []
+        for t in range(seek, stop + 1):
+            data = self.render_frame(t).tobytes()
+            if result and result[-1][0] == data:
+                result[-1][1] += 1
+            else:
+                result.append([data, 1])
+        return [tuple(x) for x in result]
+
+    def iter_runs_parallel(self, start: int, end: int, workers: int):
+        """Generate the runs of frames from `start` to `end`, in order.
+
+        The frames are rendered in chunks by a pool of worker processes,
+        each of which starts from its own copy of the animation.
+        """
+        chunk = max(int(self.rate), 1) * CHUNK_SECONDS
+        executor = ProcessPoolExecutor(
+                workers, initializer=init_render_worker,
+                initargs=(pickle.dumps(self),))
+        try:
+            pending = []
+            low = start
+            while pending or low <= end:
+                while len(pending) < 2 * workers and low <= end:
+                    high = min(low + chunk - 1, end)
+                    pending.append(executor.submit(
+                            render_chunk, start, high, low))
+                    low = high + 1
+                yield from pending.pop(0).result()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def render(
+            self, filename: str, start: int = 0, stop: int = INF,
+            writer=None, workers: int = 1):
+        """Render the animation to `filename`, and return the first frame.
+
+        Frames are rendered from time `start` until `stop`, or until there are
+        no elements left. Each frame is passed to `writer` as soon as it is
+        rendered. By default, the writer is chosen by `open_writer`.
+
+        If `workers` is more than one, the frames are rendered in chunks by
+        that many worker processes, and passed to the writer in order.
+        Every element must then be picklable, and must look the same at
+        any given time, no matter which frames were rendered before it.
+        """
+        if writer is None:
+            writer = open_writer(filename, self.rate)
+        end = self.get_end(start, stop)
+        parallel = (
+                workers > 1 and end < INF and
+                not multiprocessing.current_process().daemon)
+        initial = None
+        with writer:
+            if parallel:
+                size = (self.width, self.height)
+                for data, ticks in self.iter_runs_parallel(
+                        start, end, workers):
+                    frame = Image.frombytes('RGBA', size, data)
+                    if initial is None:
+                        initial = frame
+                    writer.write(frame, ticks)
+                self.seek(start, end + 1)
+                return initial
+
+            t = start
+            while self.elements and t <= stop:
+                frame = self.render_frame(t)
+                if initial is None:
+                    initial = frame.copy()
+                writer.write(frame)
+                t += 1
         return initial
+
+
+# The animation being rendered by a worker process, pickled.
+WORKER_ANIMATION = None
+
+
+def init_render_worker(data: bytes):
+    global WORKER_ANIMATION
+    WORKER_ANIMATION = data
+
+
+def render_chunk(start: int, stop: int, seek: int) -> list:
+    """Render a chunk of frames from a fresh copy of the worker's animation.
+    """
+    animation = pickle.loads(WORKER_ANIMATION)
+    return animation.render_runs(start, stop, seek)
+
+
+class FrameWriter:
+    """Abstract base class for writing the frames of an animation to a file.
+
+    Frames are given to `write` one at a time. The writer keeps the latest
+    frame, and counts how many identical frames follow it. Once a different
+    frame arrives (or the writer is closed), the held frame is passed to
+    `encode`, along with how many ticks it lasts, which is left up to
+    inheriting classes to implement.
+
+    Writers are context managers, which close the writer on exit.
+    """
+    def __init__(self, filename: str, rate: float):
+        self.filename = filename
+        self.rate = rate
+        self.held = None
+        self.held_bytes = None
+        self.hold = 0
+        self.frames = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def get_duration(self, ticks: int) -> float:
+        """Return the duration of `ticks` frames, in milliseconds."""
+        return ticks * 1000 / self.rate
+
+    def write(self, frame: Image.Image, ticks: int = 1):
+        """Add `frame` to the animation, shown for `ticks` ticks."""
+        data = frame.tobytes()
+        if data == self.held_bytes and frame.size == self.held.size:
+            self.hold += ticks
+            return
+        self.flush()
+        # The caller may go on drawing over the same image, so hold a copy.
+        self.held = frame.copy()
+        self.held_bytes = data
+        self.hold = ticks
+
+    def flush(self):
+        """Encode the held frame, if there is one."""
+        if self.held is not None:
+            self.encode(self.held, self.hold)
+            self.frames += 1
+            self.held = None
+            self.held_bytes = None
+            self.hold = 0
+
+    def encode(self, frame: Image.Image, ticks: int):
+        raise NotImplementedError()
+
+    def finish(self):
+        """Finish writing the file, after the last frame has been encoded."""
+        pass
+
+    def close(self):
+        self.flush()
+        self.finish()
+
+
+class GifWriter(FrameWriter):
+    """A FrameWriter for animated GIF files.
+
+    Each frame after the first only stores the rectangle that changed since
+    the frame before, which is drawn over the previous frame. Every frame
+    gets its own palette, so the colours of one frame don't limit the next.
+    """
+    def __init__(self, filename: str, rate: float, loop: int = 0):
+        super().__init__(filename, rate)
+        self.loop = loop
+        self.fp = open(filename, 'wb')
+        self.previous = None
+
+    def encode(self, frame: Image.Image, ticks: int):
+        frame = frame.convert('RGB')
+        offset = (0, 0)
+        image = frame
+        if self.previous is not None:
+            box = ImageChops.difference(self.previous, frame).getbbox()
+            if box is None:
+                # Only possible after a change of size, which GIF can't do.
+                box = (0, 0, 1, 1)
+            offset = box[:2]
+            image = frame.crop(box)
+        image = image.quantize()
+        if self.previous is None:
+            header, _ = GifImagePlugin.getheader(
+                    image, None, {'loop': self.loop})
+            self.fp.write(b''.join(header))
+        self.fp.write(b''.join(GifImagePlugin.getdata(
+                image, offset,
+                duration=self.get_duration(ticks),
+                disposal=1,
+                include_color_table=True)))
+        self.previous = frame
+
+    def finish(self):
+        self.fp.write(b';')
+        self.fp.close()
+
+
+def get_png_chunk(kind: bytes, data: bytes) -> bytes:
+    crc = zlib.crc32(kind + data)
+    return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', crc)
+
+
+def iter_png_chunks(data: bytes):
+    """Generate the (kind, data) of each chunk in a PNG file."""
+    offset = 8  # Skip the signature
+    while offset < len(data):
+        (length,) = struct.unpack('>I', data[offset:offset + 4])
+        kind = data[offset + 4:offset + 8]
+        yield kind, data[offset + 8:offset + 8 + length]
+        offset += length + 12
+
+
+class ApngWriter(FrameWriter):
+    """A FrameWriter for animated PNG files.
+
+    Each frame is compressed on its own by PIL's PNG encoder, and its image
+    data is copied into the animation. The number of frames isn't known until
+    the end, so it is filled in when the writer is closed.
+    """
+    SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+    def __init__(self, filename: str, rate: float, loop: int = 0):
+        super().__init__(filename, rate)
+        self.loop = loop
+        self.fp = open(filename, 'wb')
+        self.sequence = 0
+        self.actl = None
+
+    def encode(self, frame: Image.Image, ticks: int):
+        frame = frame.convert('RGBA')
+        buffer = io.BytesIO()
+        frame.save(buffer, 'PNG')
+        chunks = list(iter_png_chunks(buffer.getvalue()))
+        first = self.actl is None
+        if first:
+            self.fp.write(self.SIGNATURE)
+            self.fp.write(get_png_chunk(b'IHDR', dict(chunks)[b'IHDR']))
+            self.actl = self.fp.tell()
+            self.fp.write(get_png_chunk(
+                    b'acTL', struct.pack('>II', 0, self.loop)))
+
+        width, height = frame.size
+        fctl = struct.pack(
+                '>IIIIIHHBB', self.sequence, width, height, 0, 0,
+                round(self.get_duration(ticks)), 1000, 0, 0)
+        self.fp.write(get_png_chunk(b'fcTL', fctl))
+        self.sequence += 1
+        for kind, data in chunks:
+            if kind != b'IDAT':
+                continue
+            if first:
+                self.fp.write(get_png_chunk(b'IDAT', data))
+            else:
+                self.fp.write(get_png_chunk(
+                        b'fdAT', struct.pack('>I', self.sequence) + data))
+                self.sequence += 1
+
+    def finish(self):
+        if self.actl is not None:
+            self.fp.write(get_png_chunk(b'IEND', b''))
+            self.fp.seek(self.actl)
+            self.fp.write(get_png_chunk(
+                    b'acTL', struct.pack('>II', self.frames, self.loop)))
+        self.fp.close()
+
+
+def has_ffmpeg() -> bool:
+    return shutil.which('ffmpeg') is not None
+
+
+class FFmpegWriter(FrameWriter):
+    """A FrameWriter that pipes raw frames into ffmpeg to encode a video.
+
+    Video runs at a constant frame rate, so a held frame is simply sent again
+    for each tick that it lasts. ffmpeg picks the format of the video from
+    the extension of `filename`.
+    """
+    def __init__(self, filename: str, rate: float, options=('-crf', '18')):
+        super().__init__(filename, rate)
+        self.options = tuple(options)
+        self.process = None
+
+    def start(self, size: tuple):
+        width, height = size
+        command = (
+                'ffmpeg', '-y', '-loglevel', 'error',
+                '-f', 'rawvideo', '-pix_fmt', 'rgba',
+                '-s', f'{width}x{height}', '-r', str(self.rate),
+                '-i', '-',
+                '-pix_fmt', 'yuv420p',
+                # yuv420p needs even dimensions
+                '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2',
+                *self.options, self.filename)
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE)
+
+    def encode(self, frame: Image.Image, ticks: int):
+        if self.process is None:
+            self.start(frame.size)
+        data = frame.convert('RGBA').tobytes()
+        for _ in range(ticks):
+            self.process.stdin.write(data)
+
+    def finish(self):
+        if self.process is not None:
+            self.process.stdin.close()
+            code = self.process.wait()
+            if code:
+                raise RuntimeError(f"ffmpeg exited with code {code}")
+
+
+def open_writer(filename: str, rate: float) -> FrameWriter:
+    """Return a FrameWriter for `filename`, chosen by its extension."""
+    ext = os.path.splitext(filename)[1].lower()
+    if ext == '.gif':
+        return GifWriter(filename, rate)
+    if ext in ('.png', '.apng'):
+        return ApngWriter(filename, rate)
+    if not has_ffmpeg():
+        raise RuntimeError(
+                f"Writing '{ext}' files needs ffmpeg, which wasn't found")
+    return FFmpegWriter(filename, rate)
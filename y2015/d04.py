@@ -1,17 +1,10 @@
-from _md5 import md5
+import hashing
 
 
 def find_digest(prefix: str, target: str) -> int:
-    h = md5(prefix.encode('ascii'))
-    length = len(target)
-    digest = ''
-    suffix = 0
-    while digest[:length] != target:
-        h2 = h.copy()
-        suffix += 1
-        h2.update(str(suffix).encode('ascii'))
-        digest = h2.hexdigest()
-    return suffix
+    test = hashing.HexPrefix(target)
+    for nonce, _ in hashing.mine(prefix.encode('ascii'), test, start=1):
+        return nonce
 
 
 def run(stream, test=False):
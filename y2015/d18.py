@@ -1,45 +1,40 @@
+import numpy as np
 from PIL import Image, ImageDraw
 
+import automaton
+
 
 class Grid:
     """A square grid of binary light cells"""
     def __init__(self):
-        self.lights = []
-        self.size = None
+        self.board = None
 
     def parse(self, stream):
-        for line in stream:
-            line = line.strip()
-            self.lights.append([int(x == '#') for x in line])
-        self.size = len(self.lights)
+        lights = [[int(x == '#') for x in line.strip()] for line in stream]
+        self.set_lights(np.array(lights, dtype=np.uint8))
+
+    def set_lights(self, lights: np.ndarray):
+        self.board = automaton.DenseAutomaton(lights, self.update_lights)
+
+    @property
+    def lights(self) -> np.ndarray:
+        return self.board.cells
+
+    @property
+    def size(self) -> int:
+        return len(self.lights)
 
     def count_on(self):
-        return sum(map(sum, self.lights))
+        return int(self.lights.sum())
 
-    def count_on_neighbours(self, row: int, col: int) -> int:
-        result = 0
-        for i in range(max(0, row - 1), min(self.size, row + 2)):
-            result += sum(self.lights[i][max(0, col - 1): col + 2])
-        return result
+    def update_lights(self, board) -> np.ndarray:
+        return automaton.LIFE(board)
 
     def update(self):
-        new = []
-        for i in range(self.size):
-            row = []
-            for j in range(self.size):
-                v = self.lights[i][j]
-                n = self.count_on_neighbours(i, j) - v
-                if v:
-                    v = int(n in {2, 3})
-                else:
-                    v = int(n == 3)
-                row.append(v)
-            new.append(row)
-        self.lights = new
+        self.board.step()
 
     def run(self, steps: int):
-        for _ in range(steps):
-            self.update()
+        self.board.run(steps)
 
     def draw(self) -> Image:
         size = 3 * self.size + 1  # 2 pixels per cell, plus border
@@ -69,27 +64,15 @@ class CornerLockedGrid(Grid):
         m = self.size - 1
         return {(0, 0), (0, m), (m, 0), (m, m)}
 
-    def update(self):
-        new = []
-        for i in range(self.size):
-            row = []
-            for j in range(self.size):
-                if (i, j) in self.corners:
-                    v = 1
-                else:
-                    v = self.lights[i][j]
-                    n = self.count_on_neighbours(i, j) - v
-                    if v:
-                        v = int(n in {2, 3})
-                    else:
-                        v = int(n == 3)
-                row.append(v)
-            new.append(row)
-        self.lights = new
+    def update_lights(self, board) -> np.ndarray:
+        result = super().update_lights(board)
+        for i, j in self.corners:
+            result[i, j] = 1
+        return result
 
     def setup_corners(self):
         for i, j in self.corners:
-            self.lights[i][j] = 1
+            self.lights[i, j] = 1
 
     def run(self, steps: int):
         self.setup_corners()
@@ -105,8 +88,7 @@ def run(stream, test=False, draw=False):
     grid = Grid()
     grid.parse(stream)
     grid2 = CornerLockedGrid()
-    grid2.lights = grid.lights
-    grid2.size = grid.size
+    grid2.set_lights(grid.lights.copy())
     if draw:
         images = grid.run_and_draw(steps)
         images[0].save(
@@ -0,0 +1,99 @@
+"""assembunny.py
+
+The assembunny computer used by several of the 2016 puzzles.
+
+Programs are run by the compiled engine in `assembly.Computer`, which also
+fuses the increment loops that assembunny uses for addition and
+multiplication. The `tgl` instruction modifies the program, so it is always
+interpreted, as are any instructions it toggles into an invalid form.
+"""
+import assembly
+from assembly import Branch
+
+
+TEMPLATES = {
+        'cpy': '{w1} = {v0}',
+        'inc': '{w0} += 1',
+        'dec': '{w0} -= 1',
+        'jnz': Branch('{v0} != 0', 1),
+        }
+
+
+def parse_program(stream) -> tuple:
+    program = []
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        words = line.split(' ')
+        program.append((words[0], tuple(words[1:])))
+    return tuple(program)
+
+
+class Computer(assembly.Computer):
+    templates = TEMPLATES
+
+    def __init__(self):
+        super().__init__(
+                {k: 0 for k in 'abcd'},
+                {
+                    'cpy': self.do_copy,
+                    'inc': self.do_increment,
+                    'dec': self.do_decrement,
+                    'jnz': self.do_jump,
+                    'tgl': self.do_toggle,
+                    })
+
+    def reset(self):
+        self.counter = 0
+        self.pointer = 0
+        self.halt = False
+        self.registers = {k: 0 for k in 'abcd'}
+
+    def parse(self, stream) -> tuple:
+        self.load_program(parse_program(stream))
+        return self.program
+
+    def get_value(self, value: str) -> int:
+        """Get the value for a split-type operand.
+
+        The value can either be an integer literal, or a reference to a
+        register. If it's an integer literal, return that value as an integer.
+        If it's a register reference, return the value held in that register.
+        """
+        if value in self.registers:
+            return self.registers[value]
+        return int(value)
+
+    def do_copy(self, src: str, dest: str):
+        if dest in self.registers:
+            # If this instruction refers to an invalid register (e.g. by being
+            # toggled by a `tgl` instruction), skip it.
+            self.registers[dest] = self.get_value(src)
+
+    def do_increment(self, register: str):
+        if register in self.registers:
+            self.registers[register] += 1
+
+    def do_decrement(self, register: str):
+        if register in self.registers:
+            self.registers[register] -= 1
+
+    def do_jump(self, test: str, offset: str) -> int | None:
+        if self.get_value(test) != 0:
+            return self.get_value(offset)
+        return None
+
+    def do_toggle(self, offset: str):
+        index = self.pointer + self.get_value(offset)
+        if index < 0 or index >= len(self.program):
+            return
+        inst, ops = self.program[index]
+        numops = len(ops)
+        if numops == 1:
+            inst = 'dec' if inst == 'inc' else 'inc'
+        elif numops == 2:
+            inst = 'cpy' if inst == 'jnz' else 'jnz'
+        program = list(self.program)
+        program[index] = (inst, ops)
+        self.load_program(program)
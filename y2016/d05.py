@@ -1,4 +1,8 @@
-from _md5 import md5
+import hashing
+
+
+ZEROES = hashing.HexPrefix('00000')
+LENGTH = 8
 
 
 def parse(stream) -> list:
@@ -7,40 +11,28 @@ def parse(stream) -> list:
         return line
 
 
-def get_password(door: str) -> str:
-    result = []
-    i = 0
-    base = md5(door.encode('ascii'))
-    while len(result) < 8:
-        h = base.copy()
-        h.update(str(i).encode('ascii'))
-        digest = h.hexdigest()
-        if digest.startswith('00000'):
-            result.append(digest[5])
-        i += 1
-    return ''.join(result)
-
-
-def get_password2(door: str) -> str:
-    result = [' ', ' ', ' ', ' ', ' ', ' ', ' ', ' ']
-    i = 0
-    base = md5(door.encode('ascii'))
-    while ' ' in result:
-        h = base.copy()
-        h.update(str(i).encode('ascii'))
-        digest = h.hexdigest()
-        if digest.startswith('00000'):
-            index = int(digest[5], 16)
-            if index < len(result) and result[index] == ' ':
-                result[index] = digest[6]
-        i += 1
-    return ''.join(result)
+def get_passwords(door: str) -> tuple:
+    """Return the passwords for both parts of the puzzle.
+
+    Both passwords come from the same sequence of digests that start with
+    five zeroes, so the digests are only mined once.
+    """
+    result1 = []
+    result2 = [' '] * LENGTH
+    for _, digest in hashing.mine(door.encode('ascii'), ZEROES):
+        if len(result1) < LENGTH:
+            result1.append(digest[5])
+        index = int(digest[5], 16)
+        if index < LENGTH and result2[index] == ' ':
+            result2[index] = digest[6]
+        if len(result1) == LENGTH and ' ' not in result2:
+            break
+    return ''.join(result1), ''.join(result2)
 
 
 def run(stream, test=False, draw=False):
     door = parse(stream)
 
-    result1 = get_password(door)
-    result2 = get_password2(door)
+    result1, result2 = get_passwords(door)
 
     return (result1, result2)
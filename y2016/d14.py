@@ -1,8 +1,7 @@
-import json
-import os
 import re
 from collections import defaultdict
-from _md5 import md5
+
+import hashing
 
 
 TRIPLES = re.compile(r'(.)\1\1')
@@ -13,45 +12,19 @@ def parse(stream) -> list:
     return stream.readline().strip()
 
 
-def stretch_key(digest: str, count: int) -> str:
-    for _ in range(count):
-        digest = md5(digest.encode('ascii')).hexdigest()
-    return digest
-
-
 def get_index(
         salt: bytes,
         keys: int,
         stretch: int = 0,
-        md5cache: dict = None,
-        stretch_cache: dict = None,
+        cache: hashing.DigestCache | None = None,
         ) -> int:
     found = set()
     triples = defaultdict(set)
-    index = 0
-    base = md5(salt)
-    saltstr = salt.decode('ascii')
     finish = float('inf')
-    while index < finish:
-        k = saltstr + str(index)
-        if md5cache and k in md5cache:
-            digest = md5cache[k]
-        else:
-            h = base.copy()
-            h.update(str(index).encode('ascii'))
-            digest = h.hexdigest()
-            if md5cache is not None:
-                md5cache[k] = digest
-
-        if stretch > 0:
-            initial = digest
-            if stretch_cache and initial in stretch_cache:
-                digest = stretch_cache[initial]
-            else:
-                digest = stretch_key(initial, stretch)
-                if stretch_cache is not None:
-                    stretch_cache[initial] = digest
-
+    digests = hashing.iter_digests(salt, stretch, cache)
+    for index, digest in enumerate(digests):
+        if index >= finish:
+            break
         m = TRIPLES.search(digest)
         if m:
             t = m.group(1)
@@ -65,7 +38,7 @@ def get_index(
                 if len(found) >= keys:
                     finish = index + 1000
             triples[t].add(index)
-        index += 1
+    digests.close()
     found = sorted(found)
     return found[keys - 1]
 
@@ -73,29 +46,8 @@ def get_index(
 def run(stream, test=False, draw=False):
     salt = parse(stream).encode('ascii')
 
-    stretch = 2016
-    os.makedirs('out', exist_ok=True)
-    md5_cache_name = 'out/md5.json'
-    stretch_cache_name = f'out/md5_stretch{stretch}.json'
-    try:
-        with open(md5_cache_name, 'r') as fp:
-            md5cache = json.load(fp)
-    except FileNotFoundError:
-        md5cache = {}
-
-    try:
-        with open(stretch_cache_name, 'r') as fp:
-            stretch_cache = json.load(fp)
-    except FileNotFoundError:
-        stretch_cache = {}
-
-    result1 = get_index(salt, 64, md5cache=md5cache)
-    result2 = get_index(
-            salt, 64, 2016, md5cache=md5cache, stretch_cache=stretch_cache)
-
-    with open(md5_cache_name, 'w') as fp:
-        json.dump(md5cache, fp, separators=(',', ':'))
-    with open(stretch_cache_name, 'w') as fp:
-        json.dump(stretch_cache, fp, separators=(',', ':'))
+    cache = hashing.DigestCache()
+    result1 = get_index(salt, 64)
+    result2 = get_index(salt, 64, 2016, cache)
 
     return (result1, result2)
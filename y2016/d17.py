@@ -18,17 +18,25 @@ def move(location: tuple, vector: tuple) -> tuple:
     return (location[0] + vector[0], location[1] + vector[1])
 
 
-def get_neighbours(location: tuple, path: str) -> list:
+def get_neighbours(location: tuple, path: str, base=None) -> list:
     """Return a list of valid neighbours of the current location.
 
     At most there are four possible neighbours for a location: up, down, left
     and right of it. This is bounded by the edges of a 4x4 grid space, and
     possibly bounded further by locked doors.
 
+    If `base` is given, it is an md5 hash that has already been fed the
+    passcode, and `path` is only the directions taken so far.
+
     The return value is a list of (direction, (x, y)) tuples.
     """
     a = ord('a')
-    digest = md5(path.encode('ascii')).hexdigest()[:4]
+    if base is None:
+        h = md5(path.encode('ascii'))
+    else:
+        h = base.copy()
+        h.update(path.encode('ascii'))
+    digest = h.hexdigest()[:4]
 
     y, x = location
     directions = []
@@ -59,6 +67,7 @@ def find_shortest_path(start: tuple, goal: tuple, code: str) -> str | None:
 
     The result is a string of U, D, L and R directions.
     """
+    base = md5(code.encode('ascii'))
     q = PriorityQueue()
     q.push((start, ''), get_min_distance(start, goal))
     dist = defaultdict(lambda: INF)
@@ -70,7 +79,7 @@ def find_shortest_path(start: tuple, goal: tuple, code: str) -> str | None:
         if node == goal:
             return path
 
-        for d, n in get_neighbours(node, code + path):
+        for d, n in get_neighbours(node, path, base):
             score = dist[(node, path)] + 1
             if score < dist[n]:
                 newpath = path + d
@@ -88,6 +97,7 @@ def find_longest_path(start: tuple, goal: tuple, code: str) -> str | None:
 
     The result is a string of U, D, L and R directions.
     """
+    base = md5(code.encode('ascii'))
     q = []
     q.append((start, ''))
     longest = ''
@@ -100,7 +110,7 @@ def find_longest_path(start: tuple, goal: tuple, code: str) -> str | None:
                 longest = path
             continue
 
-        for d, n in get_neighbours(node, code + path):
+        for d, n in get_neighbours(node, path, base):
             newpath = path + d
             if (n, newpath) not in explored:
                 q.append((n, newpath))
@@ -22,7 +22,7 @@ def get_spans_total(spans: set) -> int:
 def get_lowest_value(blocks: SpanSet) -> int:
     """Get the lowest non-negative integer that is not blocked."""
     i = 0
-    for low, high in sorted(blocks.spans):
+    for low, high in blocks:
         if i < low:
             return i
         i = high + 1
@@ -7,7 +7,7 @@ https://adventofcode.com/2017/day/16
 import logging  # noqa: F401
 import string
 
-from util import timing
+from util import timing, fast_forward
 
 
 def spin(values: list, count: int) -> list:
@@ -53,27 +53,25 @@ def run_program(values: list, program: tuple, count: int = 1) -> list:
     return values
 
 
-def find_cycle(initial: tuple, program: tuple) -> int:
-    values = run_program(list(initial), program)
-    i = 1
-    while values != initial:
-        values = run_program(values, program)
-        i += 1
-    return i
+def dance(values: str, program: tuple) -> str:
+    return ''.join(run_program(list(values), program))
 
 
 def run(stream, test: bool = False):
     with timing("Part 1"):
         count = 5 if test else 16
-        initial = tuple(string.ascii_lowercase[:count])
+        initial = string.ascii_lowercase[:count]
         program = parse(stream)
-        result1 = ''.join(run_program(list(initial), program))
+        result1 = dance(initial, program)
 
     with timing("Part 2"):
-        cycle = find_cycle(list(initial), program)
-        logging.debug(f"Found cycle after {cycle} runs")
+        # The dance is a permutation, so it always comes back around to the
+        # initial state, and Brent's algorithm finds that without keeping a
+        # history of past states.
+        def step(values):
+            return dance(values, program)
+
         count = 10 ** 9  # 1 billion
-        values = run_program(list(initial), program, count % cycle)
-        result2 = ''.join(values)
+        result2 = fast_forward(initial, step, count, brent=True)
 
     return (result1, result2)
@@ -6,6 +6,7 @@ https://adventofcode.com/2017/day/17
 """
 import logging  # noqa: F401
 
+from linkedlist import Ring
 from util import timing, jit
 
 
@@ -13,60 +14,16 @@ COUNT1 = 2017
 COUNT2 = 50 * 10 ** 6
 
 
-class Node:
-    def __init__(self, value: int, nextnode: 'Node' = None):
-        self.value = value
-        self.next = nextnode
-
-
-def create_list(values: list):
-    assert len(values) > 0
-    start = Node(values[0])
-    prev = start
-    for value in values[1:]:
-        node = Node(value)
-        prev.next = node
-        prev = node
-    prev.next = start
-    return start
-
-
-def get_list_values(start: Node) -> list:
-    result = [start.value]
-    if start.next is start:
-        return result
-    node = start
-    while node.next is not start:
-        node = node.next
-        result.append(node.value)
-    return result
-
-
-def update_list(current: Node, steps: int) -> Node:
-    """Update the list for one iteration.
-
-    Seek forward through the list `steps` times, then insert a new node and
-    return it.
-    """
-    value = current.value
-    if current.next is current:
-        node = Node(value + 1, current)
-        current.next = node
-        return node
-
-    for _ in range(steps):
-        current = current.next
-    post = current.next
-    node = Node(value + 1, post)
-    current.next = node
-    return node
-
-
 def get_final_value(steps: int, count: int) -> int:
-    node = create_list([0])
-    for _ in range(count):
-        node = update_list(node, steps)
-    return node.next.value
+    """Update the buffer `count` times and return the value after the last.
+    """
+    ring = Ring([0], count + 1)
+    current = 0
+    for value in range(1, count + 1):
+        current = ring.step(current, steps % len(ring))
+        ring.insert_after(current, value)
+        current = value
+    return ring.get_next(current)
 
 
 @jit
@@ -5,26 +5,46 @@ Day 9: Marble Mania
 https://adventofcode.com/2018/day/9
 """
 import logging  # noqa: F401
-from collections import defaultdict
 
-from util import timing
+import numpy as np
 
+from linkedlist import Ring, ring_insert_after, ring_remove_after
+from util import timing, jit
 
-class Node:
-    """A node in a continuous doubly-linked list."""
-    def __init__(self, value, pre=None, nex=None):
-        self.value = value
-        self.pre = pre
-        self.nex = nex
+
+@jit
+def play(succ, prev, players: int, last: int) -> tuple:
+    """Play the game with marbles up to `last` on the ring.
+
+    Return a tuple of (scores, current), where `scores` is an array of the
+    score for each player, and `current` is the current marble at the end.
+    """
+    scores = np.zeros(players, dtype=np.int64)
+    current = 0
+    for marble in range(1, last + 1):
+        if marble % 23 == 0:
+            # Scoring marble. Find the marble before the one that is seven
+            # marbles counter-clockwise, and remove the marble after it.
+            node = current
+            for _ in range(8):
+                node = prev[node]
+            scores[marble % players] += marble + ring_remove_after(
+                    succ, prev, node)
+            current = succ[node]
+        else:
+            # Normal marble
+            ring_insert_after(succ, prev, succ[current], marble)
+            current = marble
+    return scores, current
 
 
 class Game:
     def __init__(self):
         self.players = 0
         self.last = 0
-        self.turn = 0
-        self.current = None
-        self.scores = defaultdict(lambda: 0)
+        self.circle = None
+        self.current = 0
+        self.scores = None
 
     def parse(self, stream):
         line = stream.readline().strip()
@@ -32,65 +52,19 @@ class Game:
         self.players = int(words[0])
         self.last = int(words[-2])
 
-    def move(self, node: Node, count: int) -> Node:
-        """Return the node `count` steps clockwise from `node`."""
-        for _ in range(abs(count)):
-            node = node.nex if count > 0 else node.pre
-        return node
-
-    def insert(self, node: Node, value: int) -> Node:
-        """Insert a new node before `node`."""
-        pre = node.pre
-        new = Node(value, pre, node)
-        pre.nex = new
-        node.pre = new
-        return new
-
-    def remove(self, node: Node) -> int:
-        """Remove a node and return its value."""
-        pre = node.pre
-        nex = node.nex
-        pre.nex = nex
-        nex.pre = pre
-        return node.value
-
-    def do_turn(self, marble: int):
-        if marble % 23 == 0:
-            # Scoring marble
-            player = self.turn % self.players
-            self.scores[player] += marble
-
-            node = self.move(self.current, -7)
-            self.current = node.nex
-            self.scores[player] += node.value
-            self.remove(node)
-            return
-        # Normal marble
-        node = self.move(self.current, 2)
-        self.current = self.insert(node, marble)
-
     def get_nodes_string(self) -> str:
-        result = [str(self.current.value)]
-        node = self.current
-        while node.nex != self.current:
-            node = node.nex
-            result.append(str(node.value))
-        return ' '.join(result)
+        return ' '.join(map(str, self.circle.iter_values(self.current)))
 
     def play(self):
-        self.current = Node(0)
-        self.current.pre = self.current
-        self.current.nex = self.current
-        self.turn = 1
-        marble = 1
-
-        while marble <= self.last:
-            self.do_turn(marble)
-            self.turn += 1
-            marble += 1
+        self.circle = Ring([0], self.last + 1, backward=True)
+        self.scores, current = play(
+                self.circle.succ, self.circle.prev, self.players, self.last)
+        self.current = int(current)
+        # Every scoring marble takes one marble out, rather than adding one.
+        self.circle.length = self.last + 1 - 2 * (self.last // 23)
 
     def get_win_score(self):
-        return max(self.scores.values())
+        return int(self.scores.max())
 
 
 def run(stream, test: bool = False):
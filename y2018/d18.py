@@ -6,107 +6,59 @@ https://adventofcode.com/2018/day/18
 """
 import logging  # noqa: F401
 
+import numpy as np
+
+import automaton
 from util import timing
 
 
+OPEN = 0
+WOODS = 1
+YARD = 2
+SYMBOLS = '.|#'
+
+
 class Grid:
     def __init__(self, size: int = 50):
         self.size = size
-        self.woods = set()
-        self.yards = set()
-        self.counter = 0
-        self.history = [(self.woods, self.yards)]
+        self.board = automaton.DenseAutomaton(
+                np.zeros((size, size), dtype=np.uint8), self.update_acres)
 
     def parse(self, stream):
-        y = 0
-        for line in stream:
-            line = line.strip()
-            for x, ch in enumerate(line):
-                if ch == '#':
-                    self.yards.add((x, y))
-                elif ch == '|':
-                    self.woods.add((x, y))
-            y += 1
-        return stream.readline().strip()
-
-    def update(self):
-        self.counter += 1
-        newwoods = set()
-        newyards = set()
-
-        for y in range(self.size):
-            for x in range(self.size):
-                p = (x, y)
-                adj = {
-                        (x - 1, y - 1),
-                        (x - 1, y),
-                        (x - 1, y + 1),
-                        (x + 1, y - 1),
-                        (x + 1, y),
-                        (x + 1, y + 1),
-                        (x, y - 1),
-                        (x, y + 1),
-                        }
-                if p in self.woods:
-                    yards = len(self.yards & adj)
-                    if yards > 2:
-                        newyards.add(p)
-                    else:
-                        newwoods.add(p)
-                elif p in self.yards:
-                    woods = len(self.woods & adj)
-                    yards = len(self.yards & adj)
-                    if woods > 0 and yards > 0:
-                        newyards.add(p)
-                else:
-                    woods = len(self.woods & adj)
-                    if woods > 2:
-                        newwoods.add(p)
-        self.woods = newwoods
-        self.yards = newyards
-        self.history.append((self.woods, self.yards))
+        cells = [[SYMBOLS.index(ch) for ch in line.strip()] for line in stream]
+        self.board.cells = np.array(cells, dtype=np.uint8)
+        self.size = len(cells)
+
+    @staticmethod
+    def update_acres(board) -> np.ndarray:
+        cells = board.cells
+        woods = board.count(WOODS)
+        yards = board.count(YARD)
+        result = cells.copy()
+        result[(cells == OPEN) & (woods > 2)] = WOODS
+        result[(cells == WOODS) & (yards > 2)] = YARD
+        result[(cells == YARD) & ((woods == 0) | (yards == 0))] = OPEN
+        return result
+
+    @property
+    def counter(self) -> int:
+        return self.board.generation
 
     def run(self, count: int):
-        while self.counter < count:
-            self.update()
-
-    def find_cycle(self) -> tuple:
-        while self.woods:
-            self.update()
-            entry = (self.woods, self.yards)
-            if entry in self.history[:-1]:
-                index = self.history.index(entry)
-                logging.info(
-                        f"Found a cycle between update {self.counter} "
-                        f"and {index}")
-                return (index, self.counter)
+        self.board.run(count - self.counter)
 
     def predict(self, count: int) -> int:
-        start, end = self.find_cycle()
-        diff = count - start
-        period = end - start
-        index = start + (diff % period)
-        woods, yards = self.history[index]
-        return len(woods) * len(yards)
+        self.board.advance(count)
+        return self.total_resource
 
     @property
     def total_resource(self) -> int:
-        return len(self.woods) * len(self.yards)
+        return self.board.count_state(WOODS) * self.board.count_state(YARD)
 
     def to_string(self) -> str:
-        lines = []
-        for y in range(self.size):
-            line = []
-            for x in range(self.size):
-                p = (x, y)
-                if p in self.woods:
-                    line.append('|')
-                elif p in self.yards:
-                    line.append('#')
-                else:
-                    line.append(' ')
-            lines.append(''.join(line))
-        return '\n'.join(lines)
+        return '\n'.join(
+                ''.join(SYMBOLS[v] for v in row).replace('.', ' ')
+                for row in self.board.cells.tolist())
 
 
 def run(stream, test: bool = False):
@@ -0,0 +1,160 @@
+"""elfcode.py
+
+The device computer used by several of the 2018 puzzles.
+
+It has six registers, and one of them may be bound to the instruction
+pointer, by an '#ip' directive at the top of the program. Programs are run by
+the compiled engine in `assembly.Computer`. Every instruction has a template,
+so there is no need for an interpreted fallback.
+
+Loops in these programs jump by writing to the instruction pointer register,
+so they can't be fused by the generic optimiser. Instead, the divisor sum
+idiom is recognised directly.
+"""
+import assembly
+from util import get_divisors
+
+
+TEMPLATES = {
+        'addr': '{w2} = {r0} + {r1}',
+        'addi': '{w2} = {r0} + {i1}',
+        'mulr': '{w2} = {r0} * {r1}',
+        'muli': '{w2} = {r0} * {i1}',
+        'banr': '{w2} = {r0} & {r1}',
+        'bani': '{w2} = {r0} & {i1}',
+        'borr': '{w2} = {r0} | {r1}',
+        'bori': '{w2} = {r0} | {i1}',
+        'setr': '{w2} = {r0}',
+        'seti': '{w2} = {i0}',
+        'gtir': '{w2} = 1 if {i0} > {r1} else 0',
+        'gtri': '{w2} = 1 if {r0} > {i1} else 0',
+        'gtrr': '{w2} = 1 if {r0} > {r1} else 0',
+        'eqir': '{w2} = 1 if {i0} == {r1} else 0',
+        'eqri': '{w2} = 1 if {r0} == {i1} else 0',
+        'eqrr': '{w2} = 1 if {r0} == {r1} else 0',
+        }
+
+
+COMMUTATIVE = {'addr', 'mulr', 'banr', 'borr', 'eqrr'}
+
+# Sum the divisors of N into A, by brute force:
+#
+#   for B in 1..N:
+#       for C in 1..N:
+#           if B * C == N:
+#               A += B
+#
+# In the pattern, letters are registers, with P being the instruction pointer
+# register. Integers are literals, '@X' is the literal address X relative to
+# the start of the pattern, and '_' is unused.
+DIVISOR_SUM = (
+        ('seti', (1, '_', 'B')),
+        ('seti', (1, '_', 'C')),
+        ('mulr', ('B', 'C', 'T')),
+        ('eqrr', ('T', 'N', 'T')),
+        ('addr', ('T', 'P', 'P')),
+        ('addi', ('P', 1, 'P')),
+        ('addr', ('B', 'A', 'A')),
+        ('addi', ('C', 1, 'C')),
+        ('gtrr', ('C', 'N', 'T')),
+        ('addr', ('P', 'T', 'P')),
+        ('seti', ('@1', '_', 'P')),
+        ('addi', ('B', 1, 'B')),
+        ('gtrr', ('B', 'N', 'T')),
+        ('addr', ('T', 'P', 'P')),
+        ('seti', ('@0', '_', 'P')),
+        )
+
+
+def match_operand(pattern, operand: int, start: int, bindings: dict) -> bool:
+    if pattern == '_':
+        return True
+    if isinstance(pattern, int):
+        return operand == pattern
+    if pattern.startswith('@'):
+        return operand == start + int(pattern[1:])
+    if pattern in bindings:
+        return bindings[pattern] == operand
+    if operand in bindings.values():
+        # Each letter must be a different register.
+        return False
+    bindings[pattern] = operand
+    return True
+
+
+def match_pattern(
+        pattern: tuple, program: tuple, start: int,
+        index: int = 0, bindings: dict | None = None) -> dict | None:
+    """Match `pattern` against the program at `start`.
+
+    Return the register for each letter in the pattern, or None if the
+    program doesn't match.
+    """
+    if bindings is None:
+        bindings = {}
+    if index == len(pattern):
+        return bindings
+    addr = start + index
+    if addr >= len(program):
+        return None
+    opcode, expect = pattern[index]
+    actual, operands = program[addr]
+    if actual != opcode:
+        return None
+    orders = [expect]
+    if opcode in COMMUTATIVE:
+        orders.append((expect[1], expect[0], expect[2]))
+    for order in orders:
+        attempt = dict(bindings)
+        if all(
+                match_operand(p, o, start, attempt)
+                for p, o in zip(order, operands)):
+            result = match_pattern(pattern, program, start, index + 1, attempt)
+            if result is not None:
+                return result
+    return None
+
+
+class Computer(assembly.Computer):
+    templates = TEMPLATES
+    namespace = {'get_divisors': get_divisors}
+
+    def __init__(self):
+        super().__init__([0] * 6)
+        self.program = ()
+        self.ip_register = None
+
+    def match_idiom(self, addr: int) -> tuple | None:
+        found = match_pattern(DIVISOR_SUM, self.program, addr)
+        if found is None or found['P'] != self.ip_register:
+            return None
+        a, b, c, t, n, p = (
+                f'r_{found[k]}' for k in ('A', 'B', 'C', 'T', 'N', 'P'))
+        code = [
+                f'{a} += sum(get_divisors({n}))',
+                f'{b} = {n} + 1',
+                f'{c} = {n} + 1',
+                f'{t} = 1',
+                f'{p} = {addr + 14}',
+                f'steps += 8 * {n} * {n} + 4 * {n}',
+                ]
+        return f'{n} >= 1', code, addr + len(DIVISOR_SUM)
+
+    def parse(self, stream):
+        program = []
+        for line in stream:
+            line = line.strip()
+            if not line:
+                continue
+            words = line.split()
+            if line.startswith('#ip'):
+                self.ip_register = int(words[1])
+                continue
+            program.append((words[0], tuple(int(x) for x in words[1:])))
+        self.load_program(program)
+
+    def reset(self):
+        self.pointer = 0
+        self.counter = 0
+        self.registers = [0] * 6
+        self.halt = False
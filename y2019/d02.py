@@ -7,11 +7,11 @@ https://adventofcode.com/2019/day/2
 import logging  # noqa: F401
 
 from util import timing
-from y2019.intcode import Computer
+from y2019.intcode import FastComputer
 
 
-def parse(stream) -> Computer:
-    comp = Computer()
+def parse(stream) -> FastComputer:
+    comp = FastComputer()
     comp.parse(stream)
     return comp
 
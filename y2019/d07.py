@@ -8,7 +8,18 @@ import logging  # noqa: F401
 from itertools import permutations
 
 from util import NINF, timing
-from y2019.intcode import Computer
+from y2019.intcode import FastComputer, Network
+
+
+class FeedbackLoop(Network):
+    """Amplifiers connected in a ring, each feeding the next one."""
+    signal = None
+
+    def route(self, source: int, packet: tuple) -> tuple:
+        if source == len(self.computers) - 1:
+            # Remember the last signal from the final amplifier.
+            (self.signal,) = packet
+        return super().route(source, packet)
 
 
 class Chain:
@@ -27,22 +38,13 @@ class Chain:
         return signal
 
     def run_loop(self, phases: tuple[int]) -> int:
-        for i in range(len(phases)):
-            amp = self.amplifiers[i]
-            amp.add_input(phases[i])
+        for amp, phase in zip(self.amplifiers, phases):
+            amp.add_input(phase)
+        self.amplifiers[0].add_input(0)
 
-        signal = 0
-        i = 0
-        length = len(self.amplifiers)
-        try:
-            while not self.amplifiers[-1].halt:
-                amp = self.amplifiers[i % length]
-                amp.add_input(signal)
-                signal = next(amp.generate())
-                i += 1
-        except StopIteration:
-            pass
-        return signal
+        loop = FeedbackLoop(self.amplifiers)
+        loop.run()
+        return loop.signal
 
     def find_highest_signal(self):
         best = NINF
@@ -65,7 +67,7 @@ class Chain:
 
 
 def parse(stream) -> Chain:
-    comp = Computer()
+    comp = FastComputer()
     comp.parse(stream)
 
     amps = [comp]
@@ -7,11 +7,11 @@ https://adventofcode.com/2019/day/9
 import logging  # noqa: F401
 
 from util import timing
-from y2019.intcode import Computer
+from y2019.intcode import FastComputer
 
 
-def parse(stream) -> Computer:
-    return Computer(stream.readline().strip())
+def parse(stream) -> FastComputer:
+    return FastComputer(stream.readline().strip())
 
 
 def run(stream, test: bool = False):
@@ -7,7 +7,7 @@ https://adventofcode.com/2019/day/11
 import logging  # noqa: F401
 
 from util import timing
-from y2019.intcode import Computer
+from y2019.intcode import FastComputer
 
 
 DIRECTIONS = '^>v<'
@@ -26,7 +26,7 @@ def move(position: tuple, direction: int) -> tuple:
 
 class Grid:
     def __init__(self):
-        self.robot = Computer()
+        self.robot = FastComputer()
         self.position = (0, 0)
         self.direction = 0
         self.painted = set()
@@ -8,13 +8,13 @@ import logging  # noqa: F401
 from collections import defaultdict
 
 from util import timing
-from y2019.intcode import Computer
+from y2019.intcode import FastComputer
 
 
 class Game:
     def __init__(self):
         self.tiles = defaultdict(lambda: 0)
-        self.computer = Computer()
+        self.computer = FastComputer()
         self.ball = (0, 0)
         self.paddle = (0, 0)
         self.score = 0
@@ -8,7 +8,7 @@ import logging  # noqa: F401
 from collections import defaultdict
 
 from util import INF, PriorityQueue, get_manhattan_distance, timing
-from y2019.intcode import Computer
+from y2019.intcode import FastComputer
 
 
 try:
@@ -37,7 +37,7 @@ class Grid:
         self.target = (0, 0)
         self.goal = None
         self.halt = False
-        self.robot = Computer()
+        self.robot = FastComputer()
         self.robot.set_input_hook(self.get_next_input)
         self.moves = []
         self.images = []
@@ -7,7 +7,7 @@ https://adventofcode.com/2019/day/17
 import logging  # noqa: F401
 
 from util import timing
-from y2019.intcode import Computer
+from y2019.intcode import FastComputer
 
 
 DIRECTIONS = '^>v<'
@@ -24,7 +24,7 @@ class Grid:
         self.scaffolds = set()
         self.position = (0, 0)
         self.direction = 0
-        self.computer = Computer()
+        self.computer = FastComputer()
 
         if stream:
             self.parse(stream)
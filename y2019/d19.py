@@ -7,7 +7,7 @@ https://adventofcode.com/2019/day/19
 import logging  # noqa: F401
 
 from util import timing
-from y2019.intcode import Computer
+from y2019.intcode import FastComputer
 
 
 class Grid:
@@ -16,7 +16,7 @@ class Grid:
         self.misses = set()
         self.left = (0, 0)
         self.right = (0, 0)
-        self.computer = Computer()
+        self.computer = FastComputer()
         if program:
             self.computer.parse(program)
 
@@ -7,12 +7,12 @@ https://adventofcode.com/2019/day/21
 import logging  # noqa: F401
 
 from util import timing
-from y2019.intcode import Computer
+from y2019.intcode import FastComputer
 
 
 class Droid:
     def __init__(self, intcode_program):
-        self.computer = Computer(intcode_program)
+        self.computer = FastComputer(intcode_program)
         self.program = ''
 
     def reset(self):
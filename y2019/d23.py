@@ -5,26 +5,9 @@ Day 23: Category Six
 https://adventofcode.com/2019/day/23
 """
 import logging  # noqa: F401
-import queue
-from collections import defaultdict
-from threading import Thread
 
 from util import timing
-from y2019.intcode import Computer
-
-
-class Nic(Computer):
-    input_queue = None
-
-    def read_input(self) -> int:
-        try:
-            value = self.input_queue.get(block=True, timeout=0.1)
-            return value
-        except queue.Empty:
-            return -1
-        except queue.ShutDown:
-            self.halt = True
-            return -1
+from y2019.intcode import FastComputer, Network
 
 
 class Nat:
@@ -32,115 +15,68 @@ class Nat:
     last = None
 
 
-class Network:
+class NicNetwork(Network):
     def __init__(self, size: int, stream, nat: bool = False):
-        self.size = size
-        self.result = None
-        self.nat = None
-        self.threads = []
-        if nat:
-            self.nat = Nat()
-        self.messages = defaultdict(queue.Queue)
-
         # Get the first Nic to parse the stream, all other Nics will load a
         # copy of its program.
-        zero = Nic(stream)
-        zero.name = '0'
-        zero.input_queue = self.messages[0]
-        zero.set_output_hook(self.send)
-        self.nics = [zero]
-
-        for i in range(1, size):
-            comp = Nic()
-            comp.name = str(i)
-            comp.program = self.nics[0].program
-            comp.load_program()
-            comp.input_queue = self.messages[i]
-            comp.set_output_hook(self.send)
-            self.nics.append(comp)
+        zero = FastComputer(stream)
+        nics = [zero] + [zero.clone() for _ in range(1, size)]
+        for i, nic in enumerate(nics):
+            nic.name = str(i)
+
+        # NICs receive -1 when there are no packets waiting for them.
+        super().__init__(nics, packet_size=3, default=-1)
+        self.size = size
+        self.result = None
+        self.nat = Nat() if nat else None
 
     def reset(self):
         self.result = None
-        for nic in self.nics:
+        for nic in self.computers:
             nic.reset()
 
-        # Drain all message queues
-        for k in self.messages:
-            q = self.messages[k]
-            while not q.empty():
-                try:
-                    q.get(block=False)
-                except queue.Empty:
-                    pass
-
         if self.nat:
             self.nat.packet = None
             self.nat.last = None
 
-    def recv(self, addr: int) -> int:
-        if self.messages[addr].empty():
-            return -1
-        value = self.messages[addr].get()
-        return value
-
-    def send(self, outputs: list) -> None:
-        if len(outputs) > 2:
-            addr = outputs.pop(0)
-            x = outputs.pop(0)
-            y = outputs.pop(0)
-            logging.debug(f"  -> {addr} {x} {y}")
-            if addr == 255:
-                # In non-NAT mode, the first packet sent to address 255 gives
-                # the final result of the run. In NAT mode, the packet goes
-                # into the NAT memory, and will get sent when the network is
-                # idle.
-                if self.nat:
-                    self.nat.packet = (x, y)
-                else:
-                    self.result = y
-            if addr < 50:
-                self.messages[addr].put(x)
-                self.messages[addr].put(y)
-
-    def do_idle_check(self):
-        if self.nat.packet is None:
+    def route(self, source: int, packet: tuple) -> tuple | None:
+        addr, x, y = packet
+        logging.debug(f"{source} -> {addr} {x} {y}")
+        if addr == 255:
+            # In non-NAT mode, the first packet sent to address 255 gives the
+            # final result of the run. In NAT mode, the packet goes into the
+            # NAT memory, and will get sent when the network is idle.
+            if self.nat:
+                self.nat.packet = (x, y)
+            else:
+                self.result = y
+                self.stop()
+            return None
+        if addr < self.size:
+            return addr, (x, y)
+        return None
+
+    async def on_idle(self):
+        if self.nat is None or self.nat.packet is None:
             # No point continuing, we have nothing to send anyway.
             return
 
-        # Is the network currently idle?
-        if not all(q.empty() for q in self.messages.values()):
-            return
-
         x, y = self.nat.packet
         logging.debug(f"Network is idle, -> 0 {x} {y}")
         if y == self.nat.last:
             # Sent the same Y value twice in a row, that's the final run
             # result.
             self.result = y
-        self.messages[0].put(x)
-        self.messages[0].put(y)
+            self.stop()
+            return
+        await self.send(0, (x, y))
         self.nat.last = y
 
     def run(self):
-        for i in range(self.size):
-            self.messages[i].put(i)
-
-        self.threads = [Thread(target=nic.run) for nic in self.nics]
-        for thread in self.threads:
-            thread.start()
-
-        while self.result is None:
-            self.threads[0].join(0.2)
-            if self.nat:
-                self.do_idle_check()
-
-        # Signal all the NICs to stop processing
-        for nic in self.nics:
-            nic.halt = True
-
-        # Wait for all threads to conclude
-        for thread in self.threads:
-            thread.join()
+        # Each NIC first receives its own network address.
+        for i, nic in enumerate(self.computers):
+            nic.add_input(i)
+        super().run()
 
 
 def run(stream, test: bool = False):
@@ -149,7 +85,7 @@ def run(stream, test: bool = False):
         return (0, 0)
 
     with timing("Part 1"):
-        net = Network(50, stream)
+        net = NicNetwork(50, stream)
         net.run()
         result1 = net.result
 
@@ -7,12 +7,12 @@ https://adventofcode.com/2019/day/25
 import logging  # noqa: F401
 
 from util import timing
-from y2019.intcode import Computer
+from y2019.intcode import FastComputer
 
 
 class Game:
     def __init__(self, stream):
-        comp = Computer(stream)
+        comp = FastComputer(stream)
         comp.set_input_hook(self.get_input)
         comp.set_output_hook(self.write_output)
         self.computer = comp
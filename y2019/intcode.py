@@ -1,4 +1,43 @@
-from collections import defaultdict
+"""intcode.py
+
+The Intcode computer used by many of the 2019 puzzles.
+
+`Computer` is a straightforward interpreter, which decodes every instruction
+each time it is executed. `FastComputer` has the same interface, but keeps
+memory in a flat list and decodes each instruction only once, into a
+specialised closure that it reuses until the instruction is overwritten.
+
+`Network` runs a group of computers concurrently on an asyncio event loop,
+passing packets between them.
+"""
+import asyncio
+from collections import defaultdict, namedtuple
+from itertools import repeat, zip_longest
+
+
+MAX_MEMORY = 1 << 26
+PAGE_BITS = 8
+PAGE_SIZE = 1 << PAGE_BITS
+BUDGET = 10_000
+CHANNEL_SIZE = 256
+
+# The number of words (opcode plus parameters) in each instruction.
+LENGTHS = {1: 4, 2: 4, 3: 2, 4: 2, 5: 3, 6: 3, 7: 4, 8: 4, 9: 2, 99: 1}
+
+
+# The complete state of a computer at a point in time. For a Computer,
+# `memory` is a dict. For a FastComputer, it is a tuple of pages, each being a
+# tuple of PAGE_SIZE values (the last page may be shorter).
+Snapshot = namedtuple('Snapshot', [
+    'memory', 'pointer', 'relative_base', 'halt', 'inputs', 'outputs'])
+
+
+class InputRequired(IndexError):
+    """Raised when a computer needs to read an input, but has none queued.
+
+    The input instruction is not executed, so the computer can carry on from
+    the same place once an input has been added.
+    """
 
 
 class Computer:
@@ -50,11 +89,45 @@ class Computer:
         self.outputs = []
 
     def clone(self):
-        new = Computer()
+        new = type(self)()
         new.program = self.program
         new.load_program()
         return new
 
+    def snapshot(self) -> Snapshot:
+        """Return a snapshot of the current state of this computer.
+
+        The snapshot can be passed to `restore` later, to return this computer
+        (or any other computer running the same program) to the same state.
+        """
+        return Snapshot(
+                dict(self.memory), self.pointer, self.relative_base,
+                self.halt, tuple(self.inputs), tuple(self.outputs))
+
+    def restore(self, snapshot: Snapshot):
+        """Return this computer to the state captured in `snapshot`."""
+        self.memory.clear()
+        self.memory.update(snapshot.memory)
+        self.pointer = snapshot.pointer
+        self.relative_base = snapshot.relative_base
+        self.halt = snapshot.halt
+        self.inputs = list(snapshot.inputs)
+        self.outputs = list(snapshot.outputs)
+
+    def fork(self):
+        """Return a new computer in the same state as this one.
+
+        Unlike `clone`, which starts the program again from scratch, the new
+        computer carries on from wherever this one is up to. It has the same
+        input and output hooks as this computer.
+        """
+        new = self.clone()
+        new.name = self.name
+        new.input_hook = self.input_hook
+        new.output_hook = self.output_hook
+        new.restore(self.snapshot())
+        return new
+
     def add_input(self, value: int):
         self.inputs.append(value)
 
@@ -76,9 +149,11 @@ class Computer:
         Otherwise, we take the first value off the input queue.
 
         If the computer doesn't have an input hook, and the queue is empty when
-        we try to read an input, the program will crash.
+        we try to read an input, raise InputRequired.
         """
         if self.input_hook is None:
+            if not self.inputs:
+                raise InputRequired()
             return self.inputs.pop(0)
         return self.input_hook()
 
@@ -197,6 +272,19 @@ class Computer:
             raise ValueError(f"Unknown opcode {opcode} at {self.pointer}")
         self.instructions[opcode](modes)
 
+    def execute(self, stop_on_output: bool = False, budget: int = -1):
+        """Execute instructions until the computer halts.
+
+        If `stop_on_output` is true, also stop as soon as there is a value in
+        the output queue. If `budget` is positive, also stop after executing
+        that many instructions.
+        """
+        while not self.halt and budget:
+            self.do_instruction()
+            budget -= 1
+            if stop_on_output and self.outputs:
+                break
+
     def run(self, inputs: tuple[int] = ()) -> tuple[int]:
         self.inputs.extend(list(inputs))
         while not self.halt:
@@ -209,3 +297,523 @@ class Computer:
                 self.do_instruction()
             if self.outputs:
                 yield self.outputs.pop(0)
+
+
+def get_page_count(size: int) -> int:
+    return (size + PAGE_SIZE - 1) >> PAGE_BITS
+
+
+def make_read(mode: int, index: int) -> str:
+    """Return a source expression that reads parameter `index`."""
+    match mode:
+        case 0:
+            return f'mem[p{index}]'
+        case 1:
+            return f'p{index}'
+        case 2:
+            # Negative addresses would silently index from the end of memory,
+            # so they are rejected here.
+            addr = f'a{index}'
+            return (
+                    f'mem[{addr} if ({addr} := vm.relative_base + p{index})'
+                    f' >= 0 else vm.invalid_address({addr})]')
+    raise ValueError(f"Unknown parameter mode {mode}")
+
+
+def make_write(mode: int, index: int, value: str) -> str:
+    """Return source statements that write `value` to parameter `index`."""
+    match mode:
+        case 0:
+            # Position mode addresses are already known to be in range (see
+            # FastComputer.decode), so write directly.
+            return (
+                    f'mem[p{index}] = {value}\n'
+                    f'        vm.dirty.add(p{index} >> {PAGE_BITS})\n'
+                    f'        if vm.covered[p{index}]:\n'
+                    f'            vm.invalidate(p{index})')
+        case 2:
+            return f'vm.store(vm.relative_base + p{index}, {value})'
+    raise ValueError(f"Invalid mode for write: {mode}")
+
+
+def make_step_source(opcode: int, modes: tuple) -> str:
+    """Return the source of a factory for one instruction variant.
+
+    The factory takes the instruction's address and parameter values, and
+    returns a `step(vm, mem)` function that executes the instruction and
+    returns the address of the next one.
+    """
+    size = LENGTHS[opcode]
+    r = [None] + [make_read(m, i + 1) for i, m in enumerate(modes)]
+    match opcode:
+        case 1:
+            body = make_write(modes[2], 3, f'{r[1]} + {r[2]}')
+        case 2:
+            body = make_write(modes[2], 3, f'{r[1]} * {r[2]}')
+        case 3:
+            body = make_write(modes[0], 1, 'vm.read_input()')
+        case 4:
+            body = f'vm.write_output({r[1]})'
+        case 5:
+            body = f'if {r[1]} != 0:\n            return {r[2]}'
+        case 6:
+            body = f'if {r[1]} == 0:\n            return {r[2]}'
+        case 7:
+            body = make_write(modes[2], 3, f'1 if {r[1]} < {r[2]} else 0')
+        case 8:
+            body = make_write(modes[2], 3, f'1 if {r[1]} == {r[2]} else 0')
+        case 9:
+            body = f'vm.relative_base += {r[1]}'
+        case 99:
+            body = 'vm.halt = True'
+            size = 0
+    return (
+            'def factory(ptr, p1=0, p2=0, p3=0):\n'
+            '    def step(vm, mem):\n'
+            f'        {body}\n'
+            f'        return ptr + {size}\n'
+            '    return step\n')
+
+
+FACTORIES = {}
+
+
+def get_factory(opcode: int, modes: tuple):
+    key = (opcode, modes)
+    if key not in FACTORIES:
+        namespace = {}
+        exec(make_step_source(opcode, modes), namespace)
+        FACTORIES[key] = namespace['factory']
+    return FACTORIES[key]
+
+
+class Memory:
+    """Mapping-style access to the memory of a FastComputer.
+
+    Reading an address beyond the end of memory returns zero, and writes go
+    through `FastComputer.store`, so that decoded instructions are invalidated
+    when they are overwritten.
+    """
+    def __init__(self, computer: 'FastComputer'):
+        self.computer = computer
+
+    def __getitem__(self, addr: int) -> int:
+        cells = self.computer.cells
+        if 0 <= addr < len(cells):
+            return cells[addr]
+        return 0
+
+    def __setitem__(self, addr: int, value: int):
+        self.computer.store(addr, value)
+
+    def __len__(self) -> int:
+        return len(self.computer.cells)
+
+
+class FastComputer(Computer):
+    """A faster Intcode computer, with the same interface as `Computer`.
+
+    Memory is a flat list of ints in `cells`, which grows as needed. The first
+    time an instruction is executed, it is decoded into a `step` closure
+    specialised for its opcode, parameter modes and parameter values, which is
+    stored in `code` at the instruction's address. Any write that lands inside
+    a decoded instruction discards it, so self-modifying programs still work.
+
+    The `memory` attribute still supports reading and writing by address, as
+    for `Computer`.
+
+    Snapshots are copy-on-write. Memory is divided into pages of PAGE_SIZE
+    words, and the computer keeps track of which pages have been written
+    since its last snapshot or restore. A new snapshot copies only those dirty
+    pages, and shares all the others with the previous snapshot. Restoring a
+    snapshot likewise only copies back the pages that differ from the current
+    state. So a search over program states which snapshots and restores a
+    single computer costs O(dirty pages) per branch, rather than a replay of
+    the program from the start. A `fork` avoids the replay too, but has to
+    copy the whole of memory for the new computer.
+    """
+    def __init__(self, program: str = ''):
+        self.cells = []
+        self.code = []
+        self.covered = bytearray()
+        self.pages = ()
+        self.dirty = set()
+        super().__init__()
+        self.memory = Memory(self)
+        if program:
+            self.parse(program)
+
+    def load_program(self):
+        self.cells = list(self.program)
+        self.code = [None] * len(self.cells)
+        self.covered = bytearray(len(self.cells))
+        self.pages = ()
+        self.dirty = set(range(get_page_count(len(self.cells))))
+
+    def grow(self, addr: int):
+        """Extend memory, so that it includes address `addr`."""
+        if addr >= MAX_MEMORY:
+            raise ValueError(f"Invalid address {addr}")
+        size = max(addr + 1, len(self.cells) * 2)
+        extra = size - len(self.cells)
+        first = len(self.cells) >> PAGE_BITS
+        self.cells.extend([0] * extra)
+        self.code.extend([None] * extra)
+        self.covered.extend(bytes(extra))
+        self.dirty.update(range(first, get_page_count(size)))
+
+    def invalidate(self, addr: int):
+        """Discard any decoded instructions that include address `addr`."""
+        for i in range(max(addr - 3, 0), addr + 1):
+            self.code[i] = None
+
+    def store(self, addr: int, value: int):
+        if addr < 0:
+            raise ValueError(f"Invalid address {addr}")
+        if addr >= len(self.cells):
+            self.grow(addr)
+        self.cells[addr] = value
+        self.dirty.add(addr >> PAGE_BITS)
+        if self.covered[addr]:
+            self.invalidate(addr)
+
+    def snapshot(self) -> Snapshot:
+        """Return a snapshot of the current state of this computer.
+
+        Only the pages written since the last snapshot or restore are copied,
+        the rest are shared with the previous snapshot.
+        """
+        cells = self.cells
+        if self.dirty:
+            pages = list(self.pages)
+            count = get_page_count(len(cells))
+            pages.extend([None] * (count - len(pages)))
+            for i in self.dirty:
+                start = i << PAGE_BITS
+                pages[i] = tuple(cells[start:start + PAGE_SIZE])
+            self.pages = tuple(pages)
+            self.dirty = set()
+        return Snapshot(
+                self.pages, self.pointer, self.relative_base,
+                self.halt, tuple(self.inputs), tuple(self.outputs))
+
+    def restore(self, snapshot: Snapshot):
+        """Return this computer to the state captured in `snapshot`.
+
+        Only the pages that have been written since the last snapshot or
+        restore, or that differ between that snapshot and this one, are
+        copied back into memory.
+        """
+        pages = snapshot.memory
+        changed = self.dirty
+        if pages is not self.pages:
+            for i, (a, b) in enumerate(zip_longest(self.pages, pages)):
+                if a is not b:
+                    changed.add(i)
+
+        size = sum(len(p) for p in pages[-1:]) + (len(pages) - 1) * PAGE_SIZE
+        if size > len(self.cells):
+            self.grow(size - 1)
+        cells = self.cells
+        for i in changed:
+            start = i << PAGE_BITS
+            end = min(start + PAGE_SIZE, len(cells))
+            page = pages[i] if i < len(pages) else ()
+            cells[start:start + len(page)] = page
+            cells[start + len(page):end] = [0] * (end - start - len(page))
+            # Discard decoded instructions that overlap this page, including
+            # any that start up to 3 words before it.
+            lower = max(start - 3, 0)
+            self.code[lower:end] = [None] * (end - lower)
+
+        self.pages = pages
+        self.dirty = set()
+        self.pointer = snapshot.pointer
+        self.relative_base = snapshot.relative_base
+        self.halt = snapshot.halt
+        self.inputs = list(snapshot.inputs)
+        self.outputs = list(snapshot.outputs)
+
+    def fork(self):
+        """Return a new computer in the same state as this one.
+
+        The new computer is built directly from this one's state, with no
+        replay of the program and no page-by-page restore. It shares this
+        one's snapshot pages, so neither computer has any dirty pages
+        afterwards. Since step functions don't refer to any particular
+        computer, it keeps this one's decoded instructions as well.
+
+        That still takes a flat copy of `cells`, `code` and `covered`, so a
+        fork costs O(memory), although each copy is a single fast list copy.
+        A search that explores many branches from the same state should
+        instead `snapshot` and `restore` a single computer, which costs
+        O(dirty pages) per branch.
+        """
+        self.snapshot()
+        new = type(self)()
+        new.program = self.program
+        new.name = self.name
+        new.input_hook = self.input_hook
+        new.output_hook = self.output_hook
+        new.cells = list(self.cells)
+        new.code = list(self.code)
+        new.covered = bytearray(self.covered)
+        new.pages = self.pages
+        new.dirty = set()
+        new.pointer = self.pointer
+        new.relative_base = self.relative_base
+        new.halt = self.halt
+        new.inputs = list(self.inputs)
+        new.outputs = list(self.outputs)
+        return new
+
+    def decode(self, ptr: int):
+        """Decode the instruction at `ptr` and return its step function."""
+        if ptr + 3 >= len(self.cells):
+            self.grow(ptr + 3)
+        mem = self.cells
+        modes, opcode = divmod(mem[ptr], 100)
+        if opcode not in LENGTHS:
+            raise ValueError(f"Unknown opcode {opcode} at {ptr}")
+        size = LENGTHS[opcode]
+        params = mem[ptr + 1:ptr + size]
+        kinds = []
+        for param in params:
+            modes, mode = divmod(modes, 10)
+            kinds.append(mode)
+            if mode == 0:
+                if param < 0:
+                    raise ValueError(f"Invalid address {param}")
+                if param >= len(mem):
+                    self.grow(param)
+        step = get_factory(opcode, tuple(kinds))(ptr, *params)
+        self.code[ptr] = step
+        self.covered[ptr:ptr + size] = b'\x01' * size
+        return step
+
+    def execute(self, stop_on_output: bool = False, budget: int = -1):
+        """Execute instructions until the computer halts.
+
+        If `stop_on_output` is true, also stop as soon as there is a value in
+        the output queue. If `budget` is positive, also stop after executing
+        that many instructions.
+        """
+        # Memory only ever grows in place, so these references stay valid.
+        mem = self.cells
+        code = self.code
+        ptr = self.pointer
+        # Counting down the budget with an iterator is cheaper than doing it
+        # by hand in the loop.
+        ticks = repeat(None) if budget < 0 else repeat(None, budget)
+        try:
+            for _ in ticks:
+                if self.halt:
+                    break
+                step = code[ptr] if ptr < len(code) else None
+                if step is None:
+                    step = self.decode(ptr)
+                try:
+                    ptr = step(self, mem)
+                except InputRequired:
+                    raise
+                except IndexError:
+                    self.grow_for_relative(ptr)
+                    continue
+                if stop_on_output and self.outputs:
+                    break
+        finally:
+            self.pointer = ptr
+
+    def grow_for_relative(self, ptr: int):
+        """Handle an IndexError raised by the instruction at `ptr`.
+
+        Relative mode reads aren't bounds checked, because their addresses
+        aren't known until they execute. If one of them went beyond the end
+        of memory, grow memory so that the instruction can be retried. That is
+        safe, because no instruction has side effects before its reads.
+
+        If the error came from somewhere else, raise it again.
+        """
+        mem = self.cells
+        modes, opcode = divmod(mem[ptr], 100)
+        need = -1
+        for param in mem[ptr + 1:ptr + LENGTHS[opcode]]:
+            modes, mode = divmod(modes, 10)
+            if mode == 2:
+                addr = self.relative_base + param
+                if addr < 0:
+                    self.invalid_address(addr)
+                need = max(need, addr)
+        if need < len(mem):
+            raise
+        self.grow(need)
+
+    def invalid_address(self, addr: int):
+        raise ValueError(f"Invalid address {addr}")
+
+    def do_instruction(self):
+        ptr = self.pointer
+        step = self.code[ptr] if ptr < len(self.code) else None
+        if step is None:
+            step = self.decode(ptr)
+        try:
+            self.pointer = step(self, self.cells)
+        except InputRequired:
+            raise
+        except IndexError:
+            self.grow_for_relative(ptr)
+            self.do_instruction()
+
+    def run(self, inputs: tuple[int] = ()) -> tuple[int]:
+        self.inputs.extend(list(inputs))
+        self.execute()
+        return tuple(self.outputs)
+
+    def generate(self):
+        while not self.halt:
+            if not self.outputs:
+                self.execute(stop_on_output=True)
+            if self.outputs:
+                yield self.outputs.pop(0)
+
+
+class Network:
+    """A group of Intcode computers running concurrently, passing packets.
+
+    Each computer runs as a task on an asyncio event loop, and has its own
+    input channel, a bounded `asyncio.Queue`. A computer executes at most
+    `budget` instructions before yielding to the others. When it needs input
+    and its channel is empty, it waits on the channel, instead of spinning.
+
+    Every `packet_size` output values make up a packet, which is passed to
+    `route` to find its destination. The payload is then put on the
+    destination's channel, waiting for room if the channel is full, and added
+    to the destination's inputs when it next needs them.
+
+    If `default` is not None, a computer that needs input when its channel is
+    empty gets `default` as its input, rather than waiting. If it needs input
+    again before anything arrives on its channel, then it waits.
+
+    When every running computer is waiting and no packets are in flight, the
+    network is idle, and `on_idle` is called. If the network is still idle
+    afterwards, it stops. It also stops when all the computers have halted,
+    or when `stop` is called.
+
+    The computers must not have input hooks or output hooks set.
+    """
+    def __init__(
+            self, computers: list, packet_size: int = 1,
+            default: int | None = None, budget: int = BUDGET,
+            maxsize: int = CHANNEL_SIZE):
+        self.computers = list(computers)
+        self.packet_size = packet_size
+        self.default = default
+        self.budget = budget
+        self.maxsize = maxsize
+        self.channels = []
+        self.tasks = []
+        self.running = 0
+        self.waiting = 0
+        self.stopped = False
+
+    def route(self, source: int, packet: tuple) -> tuple | None:
+        """Return the destination and payload for a packet from `source`.
+
+        Return None to discard the packet. By default, each computer sends
+        its packets on to the next one, and the last one sends back to the
+        first, as in a ring.
+        """
+        return (source + 1) % len(self.computers), packet
+
+    async def on_idle(self):
+        """Called whenever the network goes idle.
+
+        Subclasses can send packets from here to wake the network up again.
+        """
+        pass
+
+    async def send(self, dest: int, payload: tuple):
+        """Send `payload` to the computer at index `dest`.
+
+        Payloads sent to a computer that has halted are discarded.
+        """
+        if not self.computers[dest].halt:
+            await self.channels[dest].put(payload)
+
+    def stop(self):
+        self.stopped = True
+        for task in self.tasks:
+            task.cancel()
+
+    def is_idle(self) -> bool:
+        return (
+                self.waiting == self.running and
+                all(channel.empty() for channel in self.channels))
+
+    async def check_idle(self):
+        if self.running and self.is_idle():
+            await self.on_idle()
+            if self.is_idle():
+                self.stop()
+
+    async def receive(self, index: int) -> tuple:
+        self.waiting += 1
+        try:
+            await self.check_idle()
+            return await self.channels[index].get()
+        finally:
+            self.waiting -= 1
+
+    async def run_computer(self, index: int):
+        comp = self.computers[index]
+        outputs = comp.outputs
+        size = self.packet_size
+        polled = False
+        while not comp.halt and not self.stopped:
+            blocked = False
+            try:
+                comp.execute(budget=self.budget)
+            except InputRequired:
+                blocked = True
+
+            while len(outputs) >= size:
+                packet = tuple(outputs[:size])
+                del outputs[:size]
+                target = self.route(index, packet)
+                if target is not None:
+                    await self.send(*target)
+
+            if not blocked:
+                # Used up our time slice, let the others have a turn.
+                await asyncio.sleep(0)
+            elif (
+                    self.default is not None and not polled and
+                    self.channels[index].empty()):
+                comp.add_input(self.default)
+                polled = True
+            else:
+                comp.add_inputs(await self.receive(index))
+                polled = False
+        self.running -= 1
+        await self.check_idle()
+
+    async def run_async(self):
+        self.channels = [asyncio.Queue(self.maxsize) for _ in self.computers]
+        self.running = sum(not comp.halt for comp in self.computers)
+        self.waiting = 0
+        self.stopped = False
+        self.tasks = [
+                asyncio.create_task(self.run_computer(i))
+                for i in range(len(self.computers))]
+        await asyncio.wait(
+                self.tasks, return_when=asyncio.FIRST_EXCEPTION)
+        # If any computer crashed, stop the rest of them.
+        self.stop()
+        await asyncio.wait(self.tasks)
+        for task in self.tasks:
+            if not task.cancelled() and task.exception():
+                raise task.exception()
+
+    def run(self):
+        """Run the network until it stops."""
+        asyncio.run(self.run_async())
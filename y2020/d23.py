@@ -6,87 +6,46 @@ https://adventofcode.com/2020/day/23
 """
 import logging  # noqa: F401
 
-from util import timing
+import numpy as np
 
+from linkedlist import Ring, ring_move_after
+from util import timing, jit
 
-class Node:
-    """A node of a singly-linked (forward) list."""
-    def __init__(self, value: int, tail: 'Node' = None):
-        self.value = value
-        self.tail = tail
+
+@jit
+def play(succ, prev, current: int, rounds: int, maximum: int) -> int:
+    """Play `rounds` rounds of the game, and return the new current cup."""
+    for _ in range(rounds):
+        a = succ[current]
+        b = succ[a]
+        c = succ[b]
+        dest = current - 1 if current > 1 else maximum
+        while dest == a or dest == b or dest == c:
+            dest = dest - 1 if dest > 1 else maximum
+        ring_move_after(succ, prev, current, 3, dest)
+        current = succ[current]
+    return current
 
 
 class Game:
     def __init__(self, source: list[int]):
-        self.maximum = 0
-        self.current = None
-        self.values = {}
-
-        prev = None
-        for value in source:
-            self.maximum = max(value, self.maximum)
-            node = Node(value)
-            if prev is None:
-                self.current = node
-            else:
-                prev.tail = node
-            self.values[value] = node
-            prev = node
-        prev.tail = self.current
+        self.maximum = max(source)
+        self.current = source[0]
+        self.cups = Ring(source)
 
     def __str__(self) -> str:
-        line = []
-        node = self.current
-        while node.tail != self.current:
-            line.append(str(node.value))
-            node = node.tail
-        line.append(str(node.value))
-        return ' '.join(line)
-
-    def get_node(self, value: int) -> Node:
-        return self.values[value]
-
-    def do_round(self):
-        node = self.current
-        head = self.current.tail
-        collected = set()
-        for _ in range(3):
-            node = node.tail
-            collected.add(node.value)
-        node = node.tail
-        self.current.tail = node
-
-        dest = self.current.value - 1
-        if dest < 1:
-            dest = self.maximum
-        while dest in collected:
-            dest = dest - 1 if dest > 1 else self.maximum
-
-        node = self.get_node(dest)
-        tail = node.tail
-        node.tail = head
-        head.tail.tail.tail = tail
-        self.current = self.current.tail
+        return ' '.join(map(str, self.cups.iter_values(self.current)))
 
     def do_rounds(self, count: int = 1):
-        for i in range(count):
-            self.do_round()
+        cups = self.cups
+        self.current = int(play(
+                cups.succ, cups.prev, self.current, count, self.maximum))
 
     def get_order(self) -> str:
-        node = self.get_node(1).tail
-        line = []
-        while node.value != 1:
-            line.append(str(node.value))
-            node = node.tail
-        return ''.join(line)
+        return ''.join(map(str, self.cups.get_values(1, len(self.cups) - 1)))
 
     def get_next_values(self, target: int, count: int):
-        result = []
-        node = self.get_node(target)
-        for _ in range(count):
-            node = node.tail
-            result.append(node.value)
-        return result
+        return self.cups.get_values(target, count)
 
 
 def parse(stream) -> list[int]:
@@ -111,8 +70,7 @@ def run(stream, test: bool = False):
         else:
             count = 1_000_000
             rounds = 10_000_000
-        for n in range(maximum + 1, count + 1):
-            source.append(n)
+        source = np.concatenate((source, np.arange(maximum + 1, count + 1)))
         game = Game(source)
         game.do_rounds(rounds)
         a, b = game.get_next_values(1, 2)
@@ -6,6 +6,7 @@ https://adventofcode.com/2020/day/24
 """
 import logging  # noqa: F401
 
+import automaton
 from util import timing
 
 
@@ -34,46 +35,30 @@ def move(position: tuple, direction: str) -> tuple:
     return (se + vse, ne + vne)
 
 
+# A black tile with one or two black neighbours stays black, and a white tile
+# with exactly two black neighbours turns black.
+RULE = automaton.LifeRule((2,), (1, 2))
+
+
 class Grid:
     def __init__(self):
         self.flipped = set()
-        self.max_se = 0
-        self.min_se = 0
-        self.max_ne = 0
-        self.min_ne = 0
 
     def flip(self, position: tuple):
         if position in self.flipped:
             self.flipped.remove(position)
         else:
             self.flipped.add(position)
-            self.max_se = max(position[0], self.max_se)
-            self.min_se = min(position[0], self.min_se)
-            self.max_ne = max(position[1], self.max_ne)
-            self.min_ne = min(position[1], self.min_ne)
 
     def get_adjacent(self, position: tuple):
         se, ne = position
         return {(se + vse, ne + vne) for vse, vne in VECTORS.values()}
 
-    def update(self):
-        new = set()
-        for se in range(self.min_se - 1, self.max_se + 2):
-            for ne in range(self.min_ne - 1, self.max_ne + 2):
-                p = (se, ne)
-                flipped = p in self.flipped
-                count = len(self.get_adjacent(p) & self.flipped)
-                if count == 2 or (count == 1 and flipped):
-                    new.add(p)
-                    self.max_se = max(se, self.max_se)
-                    self.min_se = min(se, self.min_se)
-                    self.max_ne = max(ne, self.max_ne)
-                    self.min_ne = min(ne, self.min_ne)
-        self.flipped = new
-
     def run(self, count: int = 1):
-        for _ in range(count):
-            self.update()
+        board = automaton.SparseAutomaton(
+                self.flipped, RULE, tuple(VECTORS.values()))
+        board.run(count)
+        self.flipped = board.cells
 
 
 def parse_line(line: str) -> tuple:
@@ -5,9 +5,8 @@ Day 15: Chiton
 https://adventofcode.com/2021/day/15
 """
 import logging  # noqa: F401
-from collections import defaultdict
-
-from util import get_manhattan_distance, timing, INF, PriorityQueue
+import search
+from util import get_manhattan_distance, timing, BucketQueue
 
 
 class Grid:
@@ -53,24 +52,17 @@ class Grid:
         start = (0, 0)
         goal = (self.width - 1, self.height - 1)
 
-        # AStar
-        q = PriorityQueue()
-        q.push(start, get_manhattan_distance(start, goal))
-        dist = defaultdict(lambda: INF)
-        dist[start] = 0
-
-        while q:
-            est, node = q.pop()
-            if node == goal:
-                return est
-
-            for n in self.get_adjacent(node):
-                score = dist[node] + self.get_value(n)
-                if score < dist[n]:
-                    dist[n] = score
-                    f = score + get_manhattan_distance(n, goal)
-                    q.set_priority(n, f)
-        raise ValueError("Did not find any path!")
+        def get_neighbours(node):
+            return [(n, self.get_value(n)) for n in self.get_adjacent(node)]
+
+        def heuristic(node):
+            return get_manhattan_distance(node, goal)
+
+        result = search.find_path(
+                start, goal, get_neighbours, heuristic, queue=BucketQueue)
+        if result is None:
+            raise ValueError("Did not find any path!")
+        return result[0]
 
 
 class MultiGrid(Grid):
@@ -5,10 +5,10 @@ Day 12: Hill Climbing Algorithm
 https://adventofcode.com/2022/day/12
 """
 import logging  # noqa: F401
-from collections import defaultdict
 from functools import cache
 
-from util import get_manhattan_distance, timing, INF, PriorityQueue
+import search
+from util import timing, INF
 
 
 @cache
@@ -73,39 +73,32 @@ class Grid:
                     result.add((x, y))
         return result
 
+    def get_reverse_neighbours(self, position: tuple) -> set:
+        """Return the positions that can step to `position`."""
+        adj = self.get_adjacent(position)
+        limit = self.get_value(position) - 1
+        return {x for x in adj if self.get_value(x) >= limit}
+
     def find_path(self, start=None) -> int:
         if not start:
             start = self.start
-        # AStar
-        q = PriorityQueue()
-        q.push(start, get_manhattan_distance(start, self.goal))
-        dist = defaultdict(lambda: INF)
-        dist[start] = 0
-
-        while q:
-            est, node = q.pop()
-            if node == self.goal:
-                return est
-
-            for n in self.get_neighbours(node):
-                score = dist[node] + 1
-                if score < dist[n]:
-                    dist[n] = score
-                    f = score + get_manhattan_distance(n, self.goal)
-                    q.set_priority(n, f)
-        raise ValueError("Did not find any path!")
+        dist = search.bfs(start, self.get_neighbours, self.goal)
+        if self.goal not in dist:
+            raise ValueError("Did not find any path!")
+        return dist[self.goal]
 
     def find_best_start_path(self):
-        result = INF
-        options = self.get_positions_at_height(0) - {self.start}
-        for option in options:
-            try:
-                steps = self.find_path(option)
-                if steps < result:
-                    result = steps
-            except ValueError:
-                pass
-        return result
+        """Find the fewest steps to the goal from any other lowest position.
+
+        Rather than search from every candidate start, search backwards from
+        the goal until the nearest candidate turns up.
+        """
+        def is_start(position):
+            return self.get_value(position) == 0 and position != self.start
+
+        dist = search.bfs(self.goal, self.get_reverse_neighbours, is_start)
+        found = [d for p, d in dist.items() if is_start(p)]
+        return min(found, default=INF)
 
 
 def parse(stream) -> Grid:
@@ -146,11 +146,8 @@ class Grid:
         return (low, high)
 
     def count_possible(self, y: int) -> int:
-        spans = SpanSet()
-        for sensor in self.sensors:
-            span = self.get_sensor_slice(sensor, y)
-            if span:
-                spans.add_span(span)
+        spans = SpanSet(filter(None, (
+                self.get_sensor_slice(sensor, y) for sensor in self.sensors)))
         beacons = {x[0] for x in self.beacons if x[1] == y}
         return spans.total - len(beacons)
 
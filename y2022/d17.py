@@ -7,7 +7,7 @@ https://adventofcode.com/2022/day/17
 import logging  # noqa: F401
 from functools import cache
 
-from util import timing
+from util import timing, extrapolate
 
 
 VERTICAL_GAP = 3    # New rocks begin this far above the top of the tower ...
@@ -44,7 +44,7 @@ class Grid:
         self.height = 0
         self.rocks = 0
         self.rounds = 0
-        self.history = []
+        self.tops = [0] * width
 
     def drop_rock(self):
         index = self.rocks % len(ROCKS)
@@ -79,67 +79,37 @@ class Grid:
                 break
 
         self.dropped |= cells
+        for cx, cy in cells:
+            self.tops[cx] = max(self.tops[cx], cy + 1)
         self.rocks += 1
         self.height = max(self.height, y + ROCK_HEIGHTS[index])
-        self.history.append((x, self.height))
 
     def drop_rocks(self, count: int):
         for i in range(count):
             self.drop_rock()
 
-    def find_cycle(self, rock: int):
-        self.dropped = set()
-        self.height = 0
-        self.rocks = 0
-        self.rounds = 0
-        self.history = []
-        step = len(ROCKS)
-        while True:
-            self.drop_rock()
-            if len(self.history) < 100 or self.rocks % step != rock:
-                continue
-
-            index = len(self.history) - step
-            pattern = tuple(x[0] for x in self.history[index:])
-            i = index - step
-            while i >= 0:
-                xs = tuple(x[0] for x in self.history[i: i + step])
-                if xs == pattern:
-                    # Check the previous two iterations of this cycle
-                    cycle = index - i
-                    if i < cycle * 2:
-                        # Not enough history to check two full cycles
-                        break
-                    i1 = i - cycle
-                    i2 = i - cycle * 2
-                    x1 = tuple(x[0] for x in self.history[i1: i1 + step])
-                    x2 = tuple(x[0] for x in self.history[i2: i2 + step])
-                    if x1 == pattern and x2 == pattern:
-                        return (i, index)
-                i -= step
-
-    def predict_height(self, rocks: int):
-        i1, i2 = self.find_cycle(rocks % len(ROCKS))
-        h1 = self.history[i1][1]
-        h2 = self.history[i2][1]
-        growth = h2 - h1
-        cycle = i2 - i1
-        logging.debug(f'height grows {growth} per {cycle} rocks from {i2}')
-
-        diff = rocks - i2 - 1
-        cycles, remain = divmod(diff, cycle)
-        logging.debug(
-                f'require {diff} more rocks = {cycles} cycles '
-                f'and {remain} remaining')
-
-        height = h2 + growth * cycles
-        i = i2 + cycle * cycles
-        logging.debug(f'height will be {height} at rock {i}')
-
-        h = self.history[i1 + remain][1] - h1
-        logging.debug(f'tower grew {h} over {remain} drops')
-
-        return height + h
+    def get_key(self) -> tuple:
+        """Return a key for the state of the tower, ignoring its height.
+
+        The state is the next rock and move to come, and the shape of the top
+        of the tower, as the depth of each column below the top.
+        """
+        return (
+                self.rocks % len(ROCKS),
+                self.rounds % len(self.moves),
+                tuple(self.height - top for top in self.tops),
+                )
+
+    def predict_height(self, rocks: int) -> int:
+        def step(grid):
+            grid.drop_rock()
+            return grid
+
+        def measure(grid):
+            return grid.height
+
+        return extrapolate(
+                self, step, rocks - self.rocks, measure, Grid.get_key)
 
     def __str__(self) -> str:
         lines = []
@@ -160,6 +130,7 @@ def run(stream, test: bool = False):
         result1 = grid.height
 
     with timing("Part 2"):
+        grid = Grid(moves)
         result2 = grid.predict_height(1000000000000)
 
     return (result1, result2)
@@ -6,74 +6,38 @@ https://adventofcode.com/2022/day/20
 """
 import logging  # noqa: F401
 
+from linkedlist import ArrayList
 from util import timing
 
 
 KEY = 811589153
 
 
-class Node:
-    def __init__(self, value, head=None, tail=None):
-        self.value = value
-        self.head = head
-        self.tail = tail
-
-
 class Mixer:
     def __init__(self, values):
-        self.zero = None
-        self.size = 0
-        self.index = {}
-        self.values = []
-
-        last = None
-
-        for value in values:
-            node = Node(value, last)
-            if last:
-                last.tail = node
-            else:
-                first = node
-            self.size += 1
-            if value == 0:
-                self.zero = node
-            self.values.append(node)
-            last = node
-        first.head = last
-        last.tail = first
-
-    def shift_node(self, node):
-        steps = node.value % (self.size - 1)
+        self.numbers = ArrayList(values, 'q')
+        self.size = len(self.numbers)
+        # The handles are in the original order of the values.
+        self.order = tuple(self.numbers.iter_handles())
+        self.zero = next(
+                x for x in self.order if self.numbers.get_value(x) == 0)
+
+    def shift_node(self, node: int):
+        steps = self.numbers.get_value(node) % (self.size - 1)
         if steps == 0:
             return
-
-        head = node.head
-        tail = node.tail
-
-        # remove the node from its current position
-        head.tail = tail
-        tail.head = head
-
-        pos = tail
-        for _ in range(steps):
-            pos = pos.tail
-
-        # insert the node back into the list at this new position
-        head = pos.head
-        pos.head = node
-        head.tail = node
-        node.head = head
-        node.tail = pos
+        # Since the node moves fewer than `size - 1` steps, it never passes
+        # itself, so the place to move it to can be found before cutting it
+        # out of the list.
+        after = self.numbers.step(node, steps)
+        self.numbers.move(node, 1, after)
 
     def mix(self):
-        for node in self.values:
+        for node in self.order:
             self.shift_node(node)
 
     def get_value(self, offset: int) -> int:
-        node = self.zero
-        for _ in range(offset):
-            node = node.tail
-        return node.value
+        return self.numbers.get_value(self.numbers.step(self.zero, offset))
 
     def get_coords(self) -> int:
         result = []
@@ -85,10 +49,9 @@ class Mixer:
     def __str__(self) -> str:
         items = []
         node = self.zero
-        items.append(str(node.value))
-        while node.tail != self.zero:
-            node = node.tail
-            items.append(str(node.value))
+        for _ in range(self.size):
+            items.append(str(self.numbers.get_value(node)))
+            node = self.numbers.step(node, 1)
         return ','.join(items)
 
 
@@ -1,5 +1,5 @@
 #!/usr/bin/env python
-from util import timing, Direction
+from util import timing, Direction, fast_forward
 
 
 def get_total_load(pattern: list[list]) -> int:
@@ -77,6 +77,14 @@ def to_string(rows: list[list]) -> str:
     return '\n'.join([''.join(row) for row in rows])
 
 
+def spin(rows: list[list]) -> list[list]:
+    """Tilt the rows north, west, south and east in turn."""
+    for direction in (
+            Direction.NORTH, Direction.WEST, Direction.SOUTH, Direction.EAST):
+        rows = tilt(rows, direction)
+    return rows
+
+
 def run(stream, test=False):
     rows = []
     for line in stream:
@@ -91,36 +99,9 @@ def run(stream, test=False):
     print(f"Result for Part 1 = {load1}\n")
 
     # Part 2
-    results = []
     limit = 1000000000
     with timing("Part 2\n"):
-        cycles = 0
-        results.append(rows)
-        while cycles < limit:
-            rows = tilt(rows, Direction.NORTH)
-            rows = tilt(rows, Direction.WEST)
-            rows = tilt(rows, Direction.SOUTH)
-            rows = tilt(rows, Direction.EAST)
-            if rows == results[-1]:
-                # If it's the same every cycle, no need to keep going
-                break
-            cycles += 1
-            matches = [i for i, x in enumerate(results) if x == rows]
-            if matches:
-                # Loop detected
-                start = matches[0]
-                diff = cycles - start
-                print(
-                    f"Cycle {cycles} matched {start} -- "
-                    f"looping every {diff} cycles")
-                index = ((limit - start) % diff) + start
-                if index < cycles:
-                    rows = results[index]
-                    print(f"Found target result at {index}")
-                    break
-                limit = index
-                print(f"Continuing until we get to {index} ...")
-            results.append(rows)
+        rows = fast_forward(rows, spin, limit, key=to_string)
         load2 = get_total_load(rows)
     print(f"Result for Part 2 = {load2}\n")
     return (load1, load2)
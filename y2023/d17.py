@@ -1,8 +1,7 @@
 #!/usr/bin/env python
-import heapq
 from collections import defaultdict, namedtuple
 
-from util import timing, Direction
+from util import timing, Direction, BucketQueue
 
 
 VECTORS = {
@@ -43,44 +42,6 @@ def get_min_distance(a: tuple[int], b: tuple[int]) -> int:
 Node = namedtuple('node', ['y', 'x', 'd', 'r'])
 
 
-class PriorityQueue:
-    def __init__(self):
-        self.queue = []
-        self.finder = {}
-        self.deleted = set()
-
-    def __len__(self):
-        return len(self.queue)
-
-    def __bool__(self):
-        return bool(self.finder)
-
-    def push(self, node, priority):
-        entry = (priority, node)
-        heapq.heappush(self.queue, entry)
-        self.finder[node] = entry
-
-    def has_node(self, node):
-        return node in self.finder
-
-    def has_position(self, position):
-        return position in {(n.y, n.x) for n in self.finder.keys()}
-
-    def set_priority(self, node, priority):
-        if node in self.finder:
-            self.deleted.add(id(self.finder[node]))
-        self.push(node, priority)
-
-    def pop(self):
-        while self.queue:
-            entry = heapq.heappop(self.queue)
-            if id(entry) not in self.deleted:
-                del self.finder[entry[1]]
-                return entry
-            self.deleted.discard(id(entry))
-        raise KeyError('Cannot pop from empty priority queue')
-
-
 def get_neighbours(
         node: Node,
         height: int,
@@ -146,7 +107,7 @@ def find_path_astar(rows: list, min_run: int = 0, max_run: int = 3) -> int:
 
     start = Node(0, 0, Direction.EAST, 0)
     dest = Node(height - 1, width - 1, Direction.EAST, 0)
-    nodes = PriorityQueue()
+    nodes = BucketQueue()
     nodes.push(start, get_min_distance(start, dest))
     origins = {}
     g = defaultdict(inf)
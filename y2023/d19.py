@@ -1,16 +1,14 @@
 #!/usr/bin/env python
-import math
 from collections import namedtuple
 
+from spans import BoxSet
 from util import timing
 
 
 MIN_RATING = 1
 MAX_RATING = 4000
 RATINGS = 'xmas'
-ALL_RATINGS = {
-        k: frozenset(range(MIN_RATING, MAX_RATING + 1))
-        for k in RATINGS}
+ALL_RATINGS = tuple((MIN_RATING, MAX_RATING) for _ in RATINGS)
 
 Condition = namedtuple('condition', ['key', 'operator', 'value'])
 Rule = namedtuple('rule', ['cond', 'effect'])
@@ -71,81 +69,47 @@ def process_part(workflows: dict, part: dict) -> bool:
     return workflow == 'A'
 
 
-def intersect_ranges(a: dict, b: dict) -> dict:
-    result = {}
-    for k in RATINGS:
-        result[k] = a.get(k, set()) & b.get(k, set())
-    return result
+def split_box(box: tuple, cond: Condition) -> tuple:
+    """Split `box` into the parts that do and don't meet `cond`.
 
-
-def union_ranges(a: dict, b: dict) -> dict:
-    result = {}
-    for k in RATINGS:
-        result[k] = a.get(k, set()) | b.get(k, set())
-    return result
-
-
-def get_total_combinations(ranges: dict) -> int:
-    combos = []
-    for k in RATINGS:
-        r = ranges.get(k, set())
-        length = len(r)
-        if length > 0:
-            combos.append(length)
-    return math.prod(combos)
-
-
-def get_effect_combos(effect: str | Branch, ranges: dict) -> int:
-    if effect == 'A':
-        return get_total_combinations(ranges)
-    if effect == 'R':
-        return 0
-    return get_tree_combos(effect, ranges)
-
-
-def describe_ranges(ranges: dict) -> str:
-    labels = []
-    for k, v in ranges.items():
-        if len(v) == MAX_RATING:
-            labels.append(f"{k}: ALL")
-            continue
-        if len(v) == 0:
-            labels.append(f"{k}: NONE")
-            continue
-        spans = []
-        low = None
-        high = None
-        for i in range(MIN_RATING, MAX_RATING + 1):
-            if i in v:
-                if low is None:
-                    low = i
-                high = i
-            elif low is not None:
-                span = f"{low}-{high}" if low < high else str(low)
-                spans.append(span)
-                low = None
-        if low is not None:
-            spans.append(f"{low}-{high}")
-        labels.append(f"{k}: {','.join(spans)}")
-    return ', '.join(labels)
-
-
-def get_tree_combos(tree: Branch, ranges: dict = None) -> dict:
-    key, operator, value = tree.cond
-    left = ALL_RATINGS.copy()
-    right = ALL_RATINGS.copy()
+    Return a tuple of (match, other), where either may be None if it is
+    empty.
+    """
+    key, operator, value = cond
+    axis = RATINGS.index(key)
+    low, high = box[axis]
     if operator == '<':
-        left[key] = set(range(MIN_RATING, value))
-        right[key] = set(range(value, MAX_RATING + 1))
+        match = (low, min(high, value - 1))
+        other = (max(low, value), high)
     else:
-        left[key] = set(range(value + 1, MAX_RATING + 1))
-        right[key] = set(range(MIN_RATING, value + 1))
-    if ranges is not None:
-        left = intersect_ranges(ranges, left)
-        right = intersect_ranges(ranges, right)
-    left_combos = get_effect_combos(tree.left, left)
-    right_combos = get_effect_combos(tree.right, right)
-    return left_combos + right_combos
+        match = (max(low, value + 1), high)
+        other = (low, min(high, value))
+    result = []
+    for span in (match, other):
+        if span[0] > span[1]:
+            result.append(None)
+        else:
+            result.append(box[:axis] + (span,) + box[axis + 1:])
+    return tuple(result)
+
+
+def get_accepted(effect: str | Branch, box: tuple, result: BoxSet):
+    """Add the parts of `box` that are accepted by `effect` to `result`."""
+    if box is None or effect == 'R':
+        return
+    if effect == 'A':
+        result.add_box(box)
+        return
+    match, other = split_box(box, effect.cond)
+    get_accepted(effect.left, match, result)
+    get_accepted(effect.right, other, result)
+
+
+def get_tree_combos(tree: Branch) -> int:
+    """Return the number of rating combinations accepted by `tree`."""
+    result = BoxSet()
+    get_accepted(tree, ALL_RATINGS, result)
+    return result.volume
 
 
 def make_tree(workflows: dict, name: str, index: int) -> Branch:
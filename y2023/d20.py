@@ -1,7 +1,6 @@
 #!/usr/bin/env python
-import heapq
 import math
-from collections import defaultdict, namedtuple
+from collections import defaultdict, deque, namedtuple
 
 from util import timing
 
@@ -9,26 +8,6 @@ from util import timing
 Pulse = namedtuple('pulse', ['depth', 'high', 'source', 'dest'])
 
 
-class PriorityQueue:
-    def __init__(self):
-        self.queue = []
-
-    def __len__(self):
-        return len(self.queue)
-
-    def __bool__(self):
-        return bool(self.queue)
-
-    def push(self, task):
-        heapq.heappush(self.queue, task)
-
-    def has_task(self, task):
-        return task in self.queue
-
-    def pop(self):
-        return heapq.heappop(self.queue)
-
-
 class Module:
     def __init__(self, name, targets):
         self.name = name
@@ -154,18 +133,19 @@ def make_graph(modules: dict) -> str:
 
 
 def get_pulses(modules: dict):
-    pq = PriorityQueue()
-    pulse = Pulse(0, False, 'button', 'broadcaster')
-    pq.push(pulse)
-    while pq:
-        pulse = pq.pop()
+    # Every pulse arrives one step after the pulse that caused it, so a FIFO
+    # queue delivers them in order.
+    q = deque()
+    q.append(Pulse(0, False, 'button', 'broadcaster'))
+    while q:
+        pulse = q.popleft()
         yield pulse
         if pulse.dest not in modules:
             continue
         module = modules[pulse.dest]
         outputs = module.handle_pulse(pulse)
         for output in outputs:
-            pq.push(output)
+            q.append(output)
 
 
 def get_total_pulses(modules: dict) -> tuple[int, int]:
@@ -1,167 +1,98 @@
 #!/usr/bin/env python
-from collections import namedtuple
-
 from rich import print
 
-from util import timing, Point
+import grid
+from util import timing
 
 
-Segment = namedtuple('segment', ['start', 'end', 'length', 'choices'])
+SLOPES = {
+        '>': (1, 0),
+        '<': (-1, 0),
+        '^': (0, -1),
+        'v': (0, 1),
+        }
 
 
-class Grid:
+class Grid(grid.Grid):
     def __init__(self):
-        self.rows = []
+        super().__init__()
         self.start = None
         self.end = None
-        self.head = None
-        self.segments = {}
         self.slopes = True
 
     def parse(self, stream):
-        for line in stream:
-            line = line.strip()
-            if not self.rows:
-                self.start = Point(0, line.index('.'))
-                self.width = len(line)
-            self.rows.append(line)
-        self.height = len(self.rows)
-        self.end = Point(self.height - 1, line.index('.'))
-        self.segments = {}
-        self.head = self.find_paths(self.start, set())
-
-    def get_tile(self, point) -> str:
-        if (point.y < 0 or point.y >= self.height or
-                point.x < 0 or point.x >= self.width):
-            return None
-        return self.rows[point.y][point.x]
-
-    def is_tile_valid(self, point) -> bool:
-        tile = self.get_tile(point)
-        return tile is not None and tile != '#'
-
-    def get_neighbours(self, point) -> set:
+        super().parse(stream)
+        self.start = (self.cells[0].index('.'), 0)
+        self.end = (self.cells[-1].index('.'), self.height - 1)
+        return self
+
+    def is_tile_valid(self, position) -> bool:
+        return self.in_bound(position) and self.get_value(position) != '#'
+
+    def get_neighbours(self, position) -> list:
         """Return all neighbours of the tile that are valid next steps.
 
         If the current tile is a slope, and the grid is in slopes mode, the
         only possible valid neighbour is the tile it points to.
         """
-        tile = self.get_tile(point)
-        if self.slopes and tile in '><^v':
-            match tile:
-                case '>':
-                    n = {Point(point.y, point.x + 1)}
-                case '<':
-                    n = {Point(point.y, point.x - 1)}
-                case '^':
-                    n = {Point(point.y - 1, point.x)}
-                case 'v':
-                    n = {Point(point.y + 1, point.x)}
-        elif point == self.start:
-            n = {Point(point.y + 1, point.x)}
+        tile = self.get_value(position)
+        if self.slopes and tile in SLOPES:
+            dx, dy = SLOPES[tile]
+            n = {(position[0] + dx, position[1] + dy)}
         else:
-            n = {
-                Point(point.y, point.x + 1),
-                Point(point.y, point.x - 1),
-                Point(point.y - 1, point.x),
-                Point(point.y + 1, point.x),
-                }
+            n = self.get_adjacent(position)
         # exclude walls and out-of-bounds
-        n = {x for x in n if self.is_tile_valid(x)}
-        return n
-
-    def reset_paths(self):
-        self.segments = {}
-        self.head = None
-
-    def find_paths(self, start, prev=None) -> Point | None:
-        """Build a tree of valid paths through the maze."""
-        if start in self.segments:
-            # We've already explored this start point, don't repeat
-            return start
-        # Special case: the starting tile of the map doesn't count as a step
-        length = 1 if start != self.start else 0
-        end = start
-        while True:
-            neighbours = self.get_neighbours(end)
-            if prev:
-                neighbours.discard(prev)
-            if not neighbours:
-                # No valid way forward -> this is a dead end.
-                return None
-            if len(neighbours) == 1:
-                # Only one way forward -> continue this segment.
-                length += 1
-                prev = end
-                (end,) = neighbours
-                if end == self.end:
-                    # We have reached the goal.
-                    segment = Segment(start, end, length, [])
-                    self.segments[start] = segment
-                    return start
+        return [x for x in n if self.is_tile_valid(x)]
+
+    def get_longest_path_length(self) -> int | None:
+        """Return the length of the longest path from start to end.
+
+        The path may not visit any tile more than once. The corridors of the
+        maze are contracted into a graph of junctions, which is then searched
+        exhaustively.
+        """
+        graph = self.get_junction_graph(
+                self.is_tile_valid, (self.start, self.end),
+                self.get_neighbours)
+        index = graph.index
+        edges = [
+                [(index[other], cost) for other, cost in edges.items()]
+                for edges in graph.edges.values()]
+        start = index[self.start]
+        end = index[self.end]
+
+        # If only one junction leads to the end, then any path that reaches
+        # that junction has to go straight to the end, or it can never get
+        # there.
+        last = [i for i, e in enumerate(edges) if any(j == end for j, _ in e)]
+        if len(last) == 1:
+            (last,) = last
+            edges[last] = [(j, cost) for j, cost in edges[last] if j == end]
+
+        best = None
+        stack = [(start, 1 << start, 0)]
+        while stack:
+            node, visited, length = stack.pop()
+            if node == end:
+                if best is None or length > best:
+                    best = length
                 continue
-            # Multiple ways forward -> recurse into each choice.
-            choices = []
-            segment = Segment(start, end, length, choices)
-            self.segments[start] = segment
-            for n in neighbours:
-                choice = self.find_paths(n, end)
-                if choice is not None:
-                    choices.append(choice)
-            if not choices:
-                return None
-            return start
-
-    def get_longest_path(
-            self, start, visited) -> tuple[int, list[Point]] | None:
-        segment = self.segments[start]
-        if start in visited or segment.end in visited:
-            return None
-        if segment.end == self.end:
-            return segment.length, [segment.end]
-        visited = visited | {start, segment.end}
-        choices = [
-                (self.get_longest_path(x, visited), x)
-                for x in segment.choices
-                if x not in visited]
-        choices = list(filter(lambda x: x[0] is not None, choices))
-        if not choices:
-            return None
-        choices.sort(key=lambda x: x[0][0], reverse=True)
-        (length, path), choice = choices[0]
-        path.insert(0, choice)
-        return segment.length + length, path
-
-    def get_longest_path_length(self, start, visited=None) -> int | None:
-        if visited is None:
-            visited = set()
-        segment = self.segments[start]
-        if start in visited or segment.end in visited:
-            return None
-        if segment.end == self.end:
-            return segment.length
-        visited = visited | {start, segment.end}
-        choices = [
-                self.get_longest_path_length(x, visited)
-                for x in segment.choices
-                if x not in visited]
-        choices = list(filter(lambda x: x is not None, choices))
-        if not choices:
-            return None
-        return segment.length + max(choices)
+            for other, cost in edges[node]:
+                bit = 1 << other
+                if not visited & bit:
+                    stack.append((other, visited | bit, length + cost))
+        return best
 
 
 def run(stream, test=False):
     with timing("Part 1\n"):
         grid = Grid()
         grid.parse(stream)
-        result1 = grid.get_longest_path_length(grid.head)
+        result1 = grid.get_longest_path_length()
     print(f"Result for Part 1 = {result1} \n")
 
     with timing("Part 2\n"):
-        grid.reset_paths()
         grid.slopes = False
-        grid.head = grid.find_paths(grid.start)
-        result2 = grid.get_longest_path_length(grid.head)
+        result2 = grid.get_longest_path_length()
     print(f"Result for Part 2 = {result2} \n")
     return (result1, result2)
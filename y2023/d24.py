@@ -4,7 +4,7 @@ from itertools import combinations
 
 from rich import print
 
-from matrix import solve_gaussian
+from matrix import solve_exact
 from util import timing
 
 
@@ -102,7 +102,7 @@ def get_intercept(hails: list[Hail]) -> Hail:
     matrix = []
     matrix.extend(get_matrix_rows(a, b))
     matrix.extend(get_matrix_rows(a, c))
-    solution = solve_gaussian(matrix)
+    solution = solve_exact(matrix)
     rounded = ([int(round(x)) for x in solution])
     return Hail(Point3(*rounded[:3]), Vector(*rounded[3:]))
 
@@ -8,16 +8,20 @@ import logging  # noqa: F401
 import math
 import os
 
+from linkedlist import ArrayList, NIL
 from util import timing
 
 
 IMAGE_WIDTH = 420
 BG_COLOUR = '#101010'
+FRAME_RATE = 30
 
 
 try:
     from PIL import Image
 
+    import visualise
+
     PIXELS = {
             'green': Image.open('assets/green_pixel_2.png'),
             'blue': Image.open('assets/blue_pixel_2.png'),
@@ -29,60 +33,34 @@ except ImportError:
     pass
 
 
-class Node:
-    def __init__(self, value, head=None, tail=None):
-        self.value = value
-        self.head = head
-        self.tail = tail
-
-    def __str__(self):
-        return str(self.value)
-
+class Disk(ArrayList):
+    """A list of disk blocks, holding a file ID, or None for free space.
 
-class List:
+    Blocks are only ever appended while the disk is being built, so the
+    handle of each block is also its offset on the disk.
+    """
     def __init__(self):
-        self.start = None
-        self.end = None
+        super().__init__()
         self.space = 0
-        self.index = []
         self.spacemap = []
         self.files = {}
         self.images = []
 
-    def append(self, value):
-        node = Node(value, self.end)
-        if self.start is None:
-            self.start = node
-        if self.end is not None:
-            self.end.tail = node
-        self.end = node
+    def append(self, value) -> int:
         if value is None:
             self.space += 1
-        self.index.append(node)
-        return node
-
-    def pop(self):
-        """Remove and return the last value of the list."""
-        node = self.end
-        self.end = node.head
-        self.end.tail = None
-        return node.value
+        return super().append(value)
 
     def __str__(self):
-        node = self.start
-        result = []
-        while node is not None:
-            result.append(str(node.value) if node.value is not None else '.')
-            node = node.tail
-        return ''.join(result)
+        return ''.join('.' if x is None else str(x) for x in self)
 
 
 def parse(stream) -> str:
     return tuple(map(int, stream.readline().strip()))
 
 
-def make_list(values) -> Node:
-    result = List()
+def make_list(values) -> Disk:
+    result = Disk()
     offset = 0
     for i, value in enumerate(values):
         blank = (i % 2 != 0)
@@ -98,31 +76,31 @@ def make_list(values) -> Node:
     return result
 
 
-def get_next_blank(node):
-    while node is not None and node.value is not None:
-        node = node.tail
+def get_next_blank(nodes: Disk, node: int) -> int:
+    while node != NIL and nodes.values[node] is not None:
+        node = nodes.get_tail(node)
     return node
 
 
-def defrag(nodes: List):
+def defrag(nodes: Disk):
     node = nodes.start
     space = nodes.space
     while space > 0:
         # Scan forward until we hit a blank node
-        node = get_next_blank(node)
+        node = get_next_blank(nodes, node)
         value = nodes.pop()
-        node.value = value
+        nodes.values[node] = value
         space -= 1
 
 
-def defrag_files(nodes: List, draw: bool = False):
+def defrag_files(nodes: Disk, draw: bool = False):
     fileids = reversed(sorted(nodes.files.keys()))
-    frameid = 0
     if draw:
-        os.makedirs('out/y2024d09', exist_ok=True)
+        os.makedirs('out', exist_ok=True)
+        ext = 'mp4' if visualise.has_ffmpeg() else 'gif'
+        writer = visualise.open_writer(f'out/y2024d09.{ext}', FRAME_RATE)
         frame = create_image(nodes)
-        save_frame(frame, frameid)
-        frameid += 1
+        writer.write(frame)
 
     for fileid in fileids:
         offset, length = nodes.files[fileid]
@@ -133,56 +111,47 @@ def defrag_files(nodes: List, draw: bool = False):
             if space_length >= length:
                 if draw:
                     draw_pixels(frame, offset, length, 'red')
-                    save_frame(frame, frameid)
-                    frameid += 1
+                    writer.write(frame)
 
                     draw_pixels(frame, space_offset, space_length, 'green')
-                    save_frame(frame, frameid)
-                    frameid += 1
+                    writer.write(frame)
 
                 for j in range(length):
-                    nodes.index[space_offset + j].value = fileid
-                    nodes.index[offset + j].value = None
+                    nodes.values[space_offset + j] = fileid
+                    nodes.values[offset + j] = None
 
                 if draw:
                     draw_pixels(frame, offset, length, 'grey')
-                    save_frame(frame, frameid)
-                    frameid += 1
+                    writer.write(frame)
 
                     draw_pixels(frame, space_offset, space_length, 'blue')
-                    save_frame(frame, frameid)
-                    frameid += 1
+                    writer.write(frame)
 
                 space_offset += length
                 space_length -= length
                 nodes.spacemap[i] = (space_offset, space_length)
                 break
 
+    if draw:
+        writer.close()
 
-def get_checksum(nodes: List) -> int:
-    node = nodes.start
-    i = 0
+
+def get_checksum(nodes: Disk) -> int:
     result = 0
-    while node is not None:
-        if node.value is not None:
-            result += i * node.value
-        node = node.tail
-        i += 1
+    for i, value in enumerate(nodes):
+        if value is not None:
+            result += i * value
     return result
 
 
-def create_image(nodes: List) -> Image:
+def create_image(nodes: Disk) -> Image:
     width = IMAGE_WIDTH
-    height = math.ceil(len(nodes.index) / width)
+    height = math.ceil(len(nodes) / width)
     im = Image.new('RGB', (width * 2, height * 2), BG_COLOUR)
-    node = nodes.start
-    i = 0
-    while node is not None:
+    for i, value in enumerate(nodes):
         y, x = divmod(i, width)
-        if node.value is not None:
+        if value is not None:
             im.paste(PIXELS['blue'], (x * 2, y * 2))
-        node = node.tail
-        i += 1
     return im
 
 
@@ -194,10 +163,6 @@ def draw_pixels(image, start, length, colour) -> Image:
     return image
 
 
-def save_frame(image, frameid):
-    image.save(f'out/y2024d09/{frameid:08d}.png')
-
-
 def run(stream, test: bool = False, draw: bool = False):
     with timing("Part 1"):
         parsed = parse(stream)
@@ -7,7 +7,7 @@ https://adventofcode.com/2024/day/13
 import logging  # noqa: F401
 import re
 
-from matrix import solve_gaussian
+from matrix import solve_batch
 from util import timing
 
 
@@ -33,19 +33,17 @@ def get_cost(a, b) -> int:
     return a * 3 + b
 
 
-def find_solution(machine) -> int | None:
-    matrix = get_matrix_form(machine)
-    a, b = solve_gaussian(matrix)
-    if a.denominator == 1 and b.denominator == 1:
-        logging.debug(f'{machine} -> A = {a}, B = {b}')
-        a = a.numerator
-        b = b.numerator
-        return get_cost(a, b)
-    return None
-
-
 def get_best_total_cost(machines) -> int:
-    return sum(find_solution(x) or 0 for x in machines)
+    solutions = solve_batch([get_matrix_form(x) for x in machines])
+    total = 0
+    for machine, solution in zip(machines, solutions):
+        if solution is None:
+            continue
+        a, b = solution
+        if a.denominator == 1 and b.denominator == 1:
+            logging.debug(f'{machine} -> A = {a}, B = {b}')
+            total += get_cost(a.numerator, b.numerator)
+    return total
 
 
 def get_matrix_form(machine) -> list:
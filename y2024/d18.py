@@ -5,11 +5,11 @@ Day 18: RAM Run
 https://adventofcode.com/2024/day/18
 """
 import logging  # noqa: F401
-from collections import defaultdict
-from functools import cache
+
+import numpy as np
 
 import grid
-from util import timing, INF, PriorityQueue
+from util import timing
 
 
 class Grid(grid.SparseGrid):
@@ -18,40 +18,25 @@ class Grid(grid.SparseGrid):
         self.height = size
         self.blocks = []
 
-    @cache
-    def get_neighbours(self, position, time):
-        adjacent = self.get_adjacent(position)
-        corrupt = self.blocks[:time]
-        return {x for x in adjacent if x not in corrupt}
-
-    def find_best_path(self, time):
-        q = PriorityQueue()
-        start = (0, 0)
-        end = (self.width - 1, self.height - 1)
-        q.push(start, grid.get_distance(start, end))
-        dist = defaultdict(lambda: INF)
-        dist[start] = 0
-        trace = {}
-
-        while q:
-            est, p = q.pop()
-            if p == end:
-                path = [p]
-                while p in trace:
-                    path.append(trace[p])
-                    p = trace[p]
-                return tuple(reversed(path))
-
-            neighbours = self.get_neighbours(p, time)
-            for n in neighbours:
-                cost = dist[p] + 1
-                if cost < dist[n]:
-                    dist[n] = cost
-                    f = cost + grid.get_distance(n, end)
-                    q.set_priority(n, f)
-                    trace[n] = p
+    def find_best_path(self, time) -> tuple | None:
+        """Return the cells on a shortest path from corner to corner.
+
+        Only the first `time` blocks have fallen. Return None if there is no
+        path.
+        """
+        passable = np.ones((self.height, self.width), dtype=bool)
+        for x, y in self.blocks[:time]:
+            passable[y, x] = False
+        table = self.get_neighbour_table(passable)
+        start = table.to_index((0, 0))
+        end = table.to_index((self.width - 1, self.height - 1))
+        path = table.get_path(start, end)
+        if path is None:
+            return None
+        return tuple(map(table.to_position, path))
 
     def find_last_viable_time(self, path, mintime):
+        path = set(path)
         for t in range(mintime + 1, len(self.blocks)):
             if self.blocks[t - 1] not in path:
                 # The path is still intact so don't re-calculate it.
@@ -59,6 +44,7 @@ class Grid(grid.SparseGrid):
             path = self.find_best_path(t)
             if path is None:
                 return t - 1
+            path = set(path)
 
 
 def parse(stream) -> str:
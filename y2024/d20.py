@@ -5,11 +5,10 @@ Day 20: Race Condition
 https://adventofcode.com/2024/day/20
 """
 import logging  # noqa: F401
-from collections import defaultdict, deque, Counter
-from functools import cache
+from collections import Counter
 
 import grid
-from util import timing, INF, PriorityQueue
+from util import timing
 
 
 def parse(stream) -> str:
@@ -31,36 +30,18 @@ class Grid(grid.SparseGrid):
         elif value == 'E':
             self.end = position
 
-    @cache
-    def get_neighbours(self, position):
-        return set(self.get_adjacent(position)) - self.walls
-
-    def find_best_path(self):
-        q = PriorityQueue()
-        node = self.start
-        q.push(node, grid.get_distance(self.start, self.end))
-        dist = defaultdict(lambda: INF)
-        dist[node] = 0
-        trace = {}
-
-        while q:
-            est, position = q.pop()
-            if position == self.end:
-                path = [position]
-                while position in trace:
-                    path.append(trace[position])
-                    position = trace[position]
-                return tuple(reversed(path))
-
-            neighbours = self.get_neighbours(position)
-            for n in neighbours:
-                cost = dist[position] + 1
-                if cost < dist[n]:
-                    dist[n] = cost
-                    f = cost + grid.get_distance(n, self.end)
-                    q.set_priority(n, f)
-                    trace[n] = position
-        return None
+    def find_best_path(self) -> tuple | None:
+        """Return the cells on a shortest path from start to end.
+
+        Return None if there is no path.
+        """
+        table = self.get_neighbour_table(lambda p: p not in self.walls)
+        start = table.to_index(self.start)
+        end = table.to_index(self.end)
+        path = table.get_path(start, end)
+        if path is None:
+            return None
+        return tuple(map(table.to_position, path))
 
     def find_cheats(self, path):
         result = []
@@ -10,28 +10,25 @@ import grid
 from util import timing
 
 
-class Grid(grid.Grid):
+class Grid(grid.ArrayGrid):
     def parse_cell(self, position, value):
         return 1 if value == '@' else 0
 
-    def is_accessible(self, cell):
-        if not self.get_value(cell):
-            return False
-        neighbours = len({x for x in self.get_surround(cell) if self.get_value(x)})
-        return neighbours < 4
+    def get_accessible(self):
+        """Return a mask of the rolls with fewer than four neighbouring rolls.
+        """
+        return (self.cells == 1) & (self.get_neighbour_sums() < 4)
 
     def count_accessible(self):
-        return sum([
-            int(self.is_accessible(x))
-            for x in self.iter_cells()])
+        return int(self.get_accessible().sum())
 
     def remove_cells(self):
-        result = 0
-        for cell in self.iter_cells():
-            if self.is_accessible(cell):
-                result += 1
-                self.cells[cell[1]][cell[0]] = 0
-        return result
+        # Removing a roll can only make other rolls more accessible, so
+        # removing a whole round at once ends up at the same place as
+        # removing them one at a time.
+        accessible = self.get_accessible()
+        self.fill(0, accessible)
+        return int(accessible.sum())
 
     def count_removable(self):
         total = 0
@@ -6,10 +6,9 @@ https://adventofcode.com/2025/day/10
 """
 import logging  # noqa: F401
 from collections import defaultdict
-from itertools import product
 
 import matrix
-from util import timing, is_integer, INF, PriorityQueue
+from util import timing, INF, PriorityQueue
 
 
 def toggle(lights, button):
@@ -67,28 +66,18 @@ class Machine:
         return min(self.joltages[x] for x in button)
 
     def find_joltage_presses(self):
-        width = len(self.buttons)
-        c = [1] * width
         a = [
                 [int(i in b) for b in self.buttons] + [self.joltages[i]]
                 for i in range(len(self.joltages))]
-        m = matrix.row_reduce(a)
-
-        free = tuple(matrix.find_free(m))
-        options = [range(self.get_max_presses(i) + 1) for i in free]
-
-        # Iterate through all viable number of presses for each of the free
-        # buttons, and plug those values back into the matrix to get the total
-        # number of button presses. Return the lowest such valid result
-        result = INF
-        for p in product(*options):
-            s = matrix.solve_values(m, dict(zip(free, p)))
-            if any(x < 0 or not is_integer(x) for x in s):
-                continue
-            total = sum(map(int, s)) + sum(p)
-            if total < result:
-                result = total
-        return result
+        # No button can be pressed more times than the lowest joltage of any
+        # of the counters it increments.
+        bounds = [
+                (0, self.get_max_presses(i))
+                for i in range(len(self.buttons))]
+        result = matrix.minimise_integer(a, bounds)
+        if result is None:
+            return INF
+        return result[0]
 
 
 def parse(stream) -> str: